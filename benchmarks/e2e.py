@@ -0,0 +1,169 @@
+"""
+End-to-end scraping benchmark against the local fixture website (see benchmarks/fixture_site.py).
+
+Runs `Scraper.scrape` for every pagination variant with `RequestsCrawler` and a headless local Chrome
+and reports pages/s, rows/s, CPU time and peak RSS of the benchmark process. CPU time of the browser is
+counted only when its processes have exited. RequestsCrawler does not execute JavaScript, so it runs only
+the `urls` and `nested` variants. Run from the repository root:
+
+    python -m benchmarks.e2e                                  # all crawlers and variants
+    python -m benchmarks.e2e --crawler requests --pages 50    # larger catalog
+    python -m benchmarks.e2e --setup                          # also benchmark ParserAI setup flow with a fake model
+
+The setup flow counts tokens to fit prompts. It uses the default encoding if it is available and a byte-level one
+otherwise (see `get_benchmark_encoding`), so that it runs offline. The encoding is printed with the timings.
+    python -m benchmarks.e2e --variant nested --parse-processes 2   # extract nested pages in parser processes
+"""
+import argparse
+import multiprocessing
+import resource
+import time
+from unittest import mock
+
+from scraperai import Scraper, RequestsCrawler, SeleniumCrawler, ParserAI
+from scraperai.crawlers.base import BaseCrawler
+from scraperai.crawlers.webdriver import DefaultChromeWebdriver
+from scraperai.models import WebpageType
+
+from .fixture_site import FixtureSite, FixtureJsonLM, FixtureVision, FixturePythonCodeLM, VARIANTS
+from .suite import get_benchmark_encoding
+
+CRAWLERS = ['requests', 'selenium']
+JS_VARIANTS = {'button', 'scroll'}
+
+
+def create_crawler(name: str) -> BaseCrawler:
+    if name == 'requests':
+        return RequestsCrawler()
+    if name == 'selenium':
+        return SeleniumCrawler(DefaultChromeWebdriver(headless=True))
+    raise ValueError(f'Unknown crawler: {name}')
+
+
+def _run_scrape(crawler_name: str, variant: str, pages: int, items_per_page: int, delay: float, concurrency: int,
+                parse_processes: int, queue: multiprocessing.Queue):
+    with FixtureSite(pages=pages, items_per_page=items_per_page, delay=delay) as site:
+        config = site.make_config(variant, concurrency=concurrency)
+        config.parse_processes = parse_processes
+        crawler = create_crawler(crawler_name)
+        usage_before = resource.getrusage(resource.RUSAGE_SELF)
+        children_before = resource.getrusage(resource.RUSAGE_CHILDREN)
+        start = time.perf_counter()
+        try:
+            factory = (lambda: create_crawler(crawler_name)) if concurrency > 1 else None
+            rows = sum(1 for _ in Scraper(config, crawler, crawler_factory=factory).scrape())
+        finally:
+            crawler.close()
+        elapsed = time.perf_counter() - start
+        usage_after = resource.getrusage(resource.RUSAGE_SELF)
+        children_after = resource.getrusage(resource.RUSAGE_CHILDREN)
+        queue.put({
+            'time': elapsed,
+            'pages': site.pages_served,
+            'rows': rows,
+            'expected_rows': site.items_count,
+            'cpu': (usage_after.ru_utime + usage_after.ru_stime) - (usage_before.ru_utime + usage_before.ru_stime),
+            'children_cpu': (children_after.ru_utime + children_after.ru_stime) -
+                            (children_before.ru_utime + children_before.ru_stime),
+            'memory': usage_after.ru_maxrss / 1024,
+        })
+
+
+def run_scrape(crawler_name: str, variant: str, **kwargs) -> dict:
+    """Runs the scrape in a fresh process, so that peak memory of runs does not mix"""
+    ctx = multiprocessing.get_context('spawn')
+    queue = ctx.Queue()
+    process = ctx.Process(target=_run_scrape, args=(crawler_name, variant), kwargs=kwargs | {'queue': queue})
+    process.start()
+    process.join()
+    if process.exitcode != 0:
+        raise RuntimeError(f'Benchmark process failed with exit code {process.exitcode}')
+    return queue.get()
+
+
+def run_setup(pages: int, items_per_page: int, latency: float) -> tuple[str, dict[str, float]]:
+    """
+    Times ParserAI setup steps on the fixture catalog with a deterministic fake model.
+    Returns the name of the encoding used to count tokens and the timings
+    """
+    json_lm = FixtureJsonLM(latency=latency)
+    parser = ParserAI(json_lm_model=json_lm, vision_model=FixtureVision(latency=latency),
+                      code_model=FixturePythonCodeLM(), parallel=True)
+    timings = {}
+    # ParserAI loads the default encoding where prompts are compressed, so it is replaced in those modules
+    encoding = get_benchmark_encoding()
+    with FixtureSite(pages=pages, items_per_page=items_per_page) as site, \
+            mock.patch('scraperai.parsers.compression.get_encoding', return_value=encoding), \
+            mock.patch('scraperai.utils.html.get_encoding', return_value=encoding):
+        crawler = RequestsCrawler()
+        crawler.get(f'{site.url}/catalog/button')
+        page_source = crawler.page_source
+        crawler.close()
+
+        start = time.perf_counter()
+        page_type = parser.detect_page_type(page_source=page_source)
+        timings['detect_page_type'] = time.perf_counter() - start
+        assert page_type == WebpageType.CATALOG, page_type
+
+        start = time.perf_counter()
+        pagination = parser.detect_pagination(page_source)
+        timings['detect_pagination'] = time.perf_counter() - start
+        assert pagination.type == 'xpath', pagination
+
+        start = time.perf_counter()
+        catalog_item = parser.detect_catalog_item(page_source, site.url)
+        timings['detect_catalog_item'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        parser.extract_fields(catalog_item.html_snippet)
+        timings['extract_fields'] = time.perf_counter() - start
+    timings['model_calls'] = json_lm.calls
+    return encoding.name, timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description='End-to-end scraping benchmark on a local fixture website')
+    parser.add_argument('--crawler', choices=CRAWLERS, action='append', help='crawlers to run, all by default')
+    parser.add_argument('--variant', choices=VARIANTS, action='append', help='variants to run, all by default')
+    parser.add_argument('--pages', type=int, default=10, help='number of catalog pages')
+    parser.add_argument('--items-per-page', type=int, default=20)
+    parser.add_argument('--delay', type=float, default=0.0, help='server latency, s')
+    parser.add_argument('--concurrency', type=int, default=1, help='crawlers opening nested pages')
+    parser.add_argument('--parse-processes', type=int, default=0, help='processes extracting nested pages')
+    parser.add_argument('--setup', action='store_true', help='benchmark ParserAI setup flow')
+    parser.add_argument('--latency', type=float, default=0.0, help='fake model latency for --setup, s')
+    args = parser.parse_args()
+
+    print(f'{"crawler":<10}{"variant":<9}{"time, s":>9}{"pages":>7}{"rows":>7}{"pages/s":>9}{"rows/s":>9}'
+          f'{"CPU, s":>8}{"child CPU, s":>14}{"peak MB":>9}')
+    for crawler_name in args.crawler or CRAWLERS:
+        for variant in args.variant or VARIANTS:
+            if crawler_name == 'requests' and variant in JS_VARIANTS:
+                continue
+            try:
+                r = run_scrape(crawler_name, variant, pages=args.pages, items_per_page=args.items_per_page,
+                               delay=args.delay, concurrency=args.concurrency,
+                               parse_processes=args.parse_processes)
+            except Exception as e:
+                print(f'{crawler_name:<10}{variant:<9}  failed: {e!r}')
+                continue
+            line = (f'{crawler_name:<10}{variant:<9}{r["time"]:>9.2f}{r["pages"]:>7}{r["rows"]:>7}'
+                    f'{r["pages"] / r["time"]:>9.1f}{r["rows"] / r["time"]:>9.1f}'
+                    f'{r["cpu"]:>8.2f}{r["children_cpu"]:>14.2f}{r["memory"]:>9.1f}')
+            if r['rows'] != r['expected_rows']:
+                line += f'  expected {r["expected_rows"]} rows'
+            print(line, flush=True)
+
+    if args.setup:
+        try:
+            encoding_name, timings = run_setup(args.pages, args.items_per_page, args.latency)
+        except Exception as e:
+            print(f'ParserAI setup failed: {e!r}')
+            return
+        print(f'\nParserAI setup with {timings.pop("model_calls")} model calls, {encoding_name} encoding:')
+        for step, seconds in timings.items():
+            print(f'{step:<22}{seconds:>8.3f} s')
+
+
+if __name__ == '__main__':
+    main()
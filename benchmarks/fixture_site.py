@@ -0,0 +1,307 @@
+"""
+Local fixture website for offline end-to-end benchmarks.
+
+The site is a catalog of `pages * items_per_page` items with several pagination variants and detail pages:
+
+    /catalog?page=N             catalog pages with url pagination
+    /catalog/button             the first catalog page with a "Next" button that replaces cards (xpath pagination)
+    /catalog/scroll             infinite scroll feed that appends cards while scrolling
+    /catalog/fragment?page=N    cards of the page, loaded by the button and scroll variants
+    /items/N                    detail page of the item
+
+`FixtureJsonLM`, `FixtureVision` and `FixturePythonCodeLM` answer ParserAI prompts about the site deterministically,
+so that setup flows can be benchmarked without calling real models.
+"""
+import re
+import threading
+import time
+from collections import Counter
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+from langchain_core.messages import BaseMessage
+
+from scraperai.llm.base import BaseJsonLM, BaseVision, BasePythonCodeLM, _Dict
+from scraperai.models import ScraperConfig, WebpageType, Pagination, CatalogItem, WebpageFields, StaticField, \
+    DynamicField
+
+VARIANTS = ['urls', 'button', 'scroll', 'nested']
+CARD_XPATH = '//div[@class="card"]'
+URL_XPATH = '//div[@class="card"]/a/@href'
+BUTTON_XPATH = '//button[@class="next"]'
+CATALOG_FIELDS = WebpageFields(
+    static_fields=[
+        StaticField(field_name='Title', field_xpath='//h2[@class="title"]/text()'),
+        StaticField(field_name='Price', field_xpath='//span[@class="price"]/text()'),
+        StaticField(field_name='Url', field_xpath='//a/@href'),
+    ],
+    dynamic_fields=[]
+)
+DETAILS_FIELDS = WebpageFields(
+    static_fields=[
+        StaticField(field_name='Title', field_xpath='//h1/text()'),
+        StaticField(field_name='Price', field_xpath='//span[@class="price"]/text()'),
+        StaticField(field_name='Description', field_xpath='//p[@class="description"]/text()'),
+    ],
+    dynamic_fields=[
+        DynamicField(section_name='Specifications', name_xpath='//table[@class="specs"]//th',
+                     value_xpath='//table[@class="specs"]//td'),
+    ]
+)
+
+_PAGE_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head>
+<title>{title}</title>
+<style>
+body {{ font-family: sans-serif; margin: 0 auto; max-width: 960px; }}
+.card {{ height: 120px; border-bottom: 1px solid #ddd; }}
+</style>
+</head>
+<body>
+<header><a href="/">Fixture shop</a><nav><a href="/catalog?page=1">Catalog</a></nav></header>
+{body}
+<footer>Fixture shop footer</footer>
+{script}
+</body>
+</html>"""
+
+_BUTTON_SCRIPT = """<script>
+var page = 1;
+document.querySelector('button.next').addEventListener('click', function () {
+    page += 1;
+    fetch('/catalog/fragment?page=' + page).then(r => r.text()).then(function (cards) {
+        document.querySelector('.catalog').innerHTML = cards;
+        if (page >= %(pages)d) document.querySelector('button.next').remove();
+    });
+});
+</script>"""
+
+_SCROLL_SCRIPT = """<script>
+var page = 1, loading = false;
+function loadMore() {
+    if (loading || page >= %(pages)d) return;
+    // Cards are loaded two screens ahead, so scrolling never reaches the bottom while more cards exist
+    if (window.innerHeight + window.pageYOffset < document.body.offsetHeight - 2 * window.innerHeight) return;
+    loading = true;
+    page += 1;
+    fetch('/catalog/fragment?page=' + page).then(r => r.text()).then(function (cards) {
+        document.querySelector('.catalog').insertAdjacentHTML('beforeend', cards);
+        loading = false;
+        loadMore();
+    });
+}
+window.addEventListener('scroll', loadMore);
+loadMore();
+</script>"""
+
+
+class FixtureSite:
+    """
+    Serves the fixture website on localhost in a background thread. `delay` simulates server latency in seconds.
+    Served requests are counted by kind: catalog, fragment and item.
+    """
+
+    def __init__(self, pages: int = 10, items_per_page: int = 20, delay: float = 0.0, port: int = 0):
+        self.pages = pages
+        self.items_per_page = items_per_page
+        self.delay = delay
+        self.requests = Counter()
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(('127.0.0.1', port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    @property
+    def items_count(self) -> int:
+        return self.pages * self.items_per_page
+
+    def start(self) -> 'FixtureSite':
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @property
+    def pages_served(self) -> int:
+        """Catalog pages, loaded fragments and detail pages"""
+        with self._lock:
+            return sum(self.requests.values())
+
+    def render_cards(self, page: int) -> str:
+        cards = []
+        for i in range((page - 1) * self.items_per_page, min(page, self.pages) * self.items_per_page):
+            cards.append(f'<div class="card"><a href="/items/{i}"><img src="/images/{i}.jpg" alt="Item {i}">'
+                         f'<h2 class="title">Item {i}</h2></a><span class="price">{i * 3 % 1000 + 0.99} USD</span>'
+                         f'</div>')
+        return ''.join(cards)
+
+    def render_catalog(self, page: int, variant: str) -> str:
+        body = f'<h1>Catalog</h1><div class="catalog">{self.render_cards(page)}</div>'
+        script = ''
+        if variant == 'urls':
+            links = ''.join(f'<a class="page" href="/catalog?page={i}">{i}</a>' for i in range(1, self.pages + 1))
+            body += f'<div class="pagination">{links}</div>'
+        elif variant == 'button':
+            body += '<button class="next">Next</button>'
+            script = _BUTTON_SCRIPT % {'pages': self.pages}
+        elif variant == 'scroll':
+            script = _SCROLL_SCRIPT % {'pages': self.pages}
+        return _PAGE_TEMPLATE.format(title=f'Catalog, page {page}', body=body, script=script)
+
+    def render_item(self, index: int) -> str:
+        specs = ''.join(f'<tr><th>Property {j}</th><td>{(index + j) % 7}</td></tr>' for j in range(5))
+        body = (f'<div class="product"><h1>Item {index}</h1><span class="price">{index * 3 % 1000 + 0.99} USD</span>'
+                f'<p class="description">Description of item {index}. ' + 'Lorem ipsum dolor sit amet. ' * 10 +
+                f'</p><table class="specs">{specs}</table></div>')
+        return _PAGE_TEMPLATE.format(title=f'Item {index}', body=body, script='')
+
+    def route(self, path: str, query: dict[str, list[str]]) -> tuple[str, str] | None:
+        """Returns the kind and the content of the page or None if not found"""
+        page = int(query.get('page', ['1'])[0])
+        if path == '/catalog':
+            return 'catalog', self.render_catalog(page, 'urls')
+        if path == '/catalog/button':
+            return 'catalog', self.render_catalog(1, 'button')
+        if path == '/catalog/scroll':
+            return 'catalog', self.render_catalog(1, 'scroll')
+        if path == '/catalog/fragment' and 1 <= page <= self.pages:
+            return 'fragment', self.render_cards(page)
+        match = re.fullmatch(r'/items/(\d+)', path)
+        if match and int(match.group(1)) < self.items_count:
+            return 'item', self.render_item(int(match.group(1)))
+        return None
+
+    def _make_handler(self):
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url_parts = urlparse(self.path)
+                result = site.route(url_parts.path, parse_qs(url_parts.query))
+                if result is None:
+                    self.send_error(404)
+                    return
+                kind, content = result
+                if site.delay:
+                    time.sleep(site.delay)
+                with site._lock:
+                    site.requests[kind] += 1
+                data = content.encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def make_config(self, variant: str, max_rows: int = 1_000_000, concurrency: int = 1) -> ScraperConfig:
+        """Scraper config of the variant, as ParserAI would detect it"""
+        if variant in ('urls', 'nested'):
+            start_url = f'{self.url}/catalog?page=1'
+            pagination = Pagination(type='urls', urls=[f'{self.url}/catalog?page={i}'
+                                                       for i in range(2, self.pages + 1)])
+        elif variant == 'button':
+            start_url = f'{self.url}/catalog/button'
+            pagination = Pagination(type='xpath', xpath=BUTTON_XPATH)
+        elif variant == 'scroll':
+            start_url = f'{self.url}/catalog/scroll'
+            pagination = Pagination(type='scroll')
+        else:
+            raise ValueError(f'Unknown variant: {variant}')
+        return ScraperConfig(
+            start_url=start_url,
+            page_type=WebpageType.CATALOG,
+            pagination=pagination,
+            catalog_item=CatalogItem(card_xpath=CARD_XPATH, url_xpath=URL_XPATH, html_snippet='', urls_on_page=[]),
+            open_nested_pages=variant == 'nested',
+            fields=DETAILS_FIELDS if variant == 'nested' else CATALOG_FIELDS,
+            # Scrolled feeds have more "pages" than the catalog, since each scroll is counted as a page
+            max_pages=self.pages * 100 if variant == 'scroll' else self.pages,
+            max_rows=max_rows,
+            concurrency=concurrency
+        )
+
+
+def _get_text(message: BaseMessage) -> str:
+    if isinstance(message.content, str):
+        return message.content
+    return ' '.join(part.get('text', '') for part in message.content if isinstance(part, dict))
+
+
+class FixtureJsonLM(BaseJsonLM):
+    """
+    Answers ParserAI prompts about the fixture site like a perfect model. `latency` simulates response time.
+    Unknown prompts are answered with an empty object.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def invoke(self, messages: list[BaseMessage]) -> _Dict:
+        with self._lock:
+            self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        system_prompt = _get_text(messages[0])
+        content = ' '.join(_get_text(message) for message in messages[1:])
+        if 'classify website' in system_prompt:
+            is_catalog = 'class="card"' in content
+            return {'category': WebpageType.CATALOG.value if is_catalog else WebpageType.DETAILS.value}
+        if 'find pagination' in system_prompt:
+            if 'classname' in system_prompt:
+                return {'classname': 'next' if 'class="next"' in content else None}
+            if '"text"' in system_prompt:
+                return {'text': 'Next', 'tag': 'button'} if 'class="next"' in content else {'text': None, 'tag': None}
+            return {'xpath': BUTTON_XPATH if 'class="next"' in content else None}
+        if 'catalog elements' in system_prompt:
+            return {'card': CARD_XPATH, 'url': URL_XPATH}
+        if 'Extract static data fields' in system_prompt:
+            fields = DETAILS_FIELDS if '<h1>' in content else CATALOG_FIELDS
+            return {'fields': [{'field_name': field.field_name, 'field_xpath': field.field_xpath}
+                               for field in fields.static_fields]}
+        if 'Extract dynamic sections' in system_prompt:
+            if 'class="specs"' not in content:
+                return {'fields': []}
+            return {'fields': [{'section_name': field.section_name, 'name_xpath': field.name_xpath,
+                                'value_xpath': field.value_xpath} for field in DETAILS_FIELDS.dynamic_fields]}
+        return {}
+
+
+class FixtureVision(BaseVision):
+    """Describes every screenshot as a catalog page"""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls = 0
+
+    def invoke(self, messages: list[BaseMessage]) -> str:
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return WebpageType.CATALOG.value
+
+
+class FixturePythonCodeLM(BasePythonCodeLM):
+    def invoke(self, messages: list[BaseMessage]) -> str:
+        return 'print("Hello")'
@@ -0,0 +1,144 @@
+"""
+Compares `minify_html` with the previous BeautifulSoup + htmlmin implementation on pages from tests/data.
+
+Checks that both implementations produce the same tags, attributes, texts and substitutions and reports
+time and peak memory of each implementation. Memory is the growth of the peak RSS over the RSS of the process
+before the page is loaded, so it includes the page itself. It is measured only on Linux, where the peak RSS
+can be reset after imports, and is nan elsewhere. Run from the repository root:
+
+    python -m benchmarks.minify_html
+"""
+import multiprocessing
+import re
+import time
+from pathlib import Path
+
+import htmlmin
+from bs4 import BeautifulSoup
+from lxml import html
+
+from scraperai.utils.html import minify_html, GOOD_ATTRS, BAD_TAGS
+
+DATA_DIR = Path(__file__).resolve().parent.parent / 'tests' / 'data'
+OPTIONS = [
+    {},
+    {'good_attrs': {'class'}},
+    {'use_substituions': False, 'remove_empty_tags': True},
+]
+
+
+def minify_html_bs4(html_content: str,
+                    good_attrs: set[str] = None,
+                    bad_tags: set[str] = None,
+                    use_substituions: bool = True,
+                    remove_empty_tags: bool = False) -> tuple[str, dict[str, str]]:
+    """Previous implementation of `minify_html`"""
+    if good_attrs is None:
+        good_attrs = GOOD_ATTRS
+    if bad_tags is None:
+        bad_tags = BAD_TAGS
+    html_content = htmlmin.minify(str(BeautifulSoup(html_content, "html.parser")), remove_empty_space=True)
+    soup = BeautifulSoup(html_content, "html.parser")
+    for tag in bad_tags:
+        [x.extract() for x in soup.find_all(tag)]
+    all_attrs = set()
+    for tag in soup():
+        for attr in tag.attrs:
+            all_attrs.add(attr)
+    bad_attrs = all_attrs.difference(good_attrs)
+    for tag in soup():
+        for attribute in bad_attrs:
+            del tag[attribute]
+    index = 0
+    substituions = {}
+    if use_substituions:
+        for p in soup.find_all('p') + soup.find_all('cite'):
+            if len(str(p.string)) > 100:
+                _id = f'my_text_{index}'
+                substituions[_id] = str(p.string)
+                p.string = _id
+                index += 1
+    if remove_empty_tags:
+        for tag in soup.find_all():
+            if tag.text.strip() == '':
+                tag.extract()
+    return str(soup), substituions
+
+
+def structure(html_content: str) -> tuple[list, str]:
+    """Tags with attributes in document order and normalized text"""
+    root = html.fromstring(html_content)
+    tags = [(node.tag, tuple(sorted(node.attrib.items()))) for node in root.iter()
+            if isinstance(node.tag, str) and node.tag not in {'html', 'head', 'body'}]
+    text = re.sub(r'\s+', ' ', root.text_content()).strip()
+    return tags, text
+
+
+def reset_peak_rss() -> bool:
+    """Resets the peak RSS of the process to the current RSS. Returns False if it is not supported (not Linux)"""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def get_peak_rss() -> float:
+    """Peak RSS of the process in MB since `reset_peak_rss`, nan if it is not supported"""
+    try:
+        with open('/proc/self/status') as f:
+            status = f.read()
+    except OSError:
+        return float('nan')
+    match = re.search(r'^VmHWM:\s+(\d+) kB', status, re.MULTILINE)
+    return int(match.group(1)) / 1024 if match else float('nan')
+
+
+def _measure(func_name: str, path: Path, options: dict, repeat: int, queue: multiprocessing.Queue):
+    func = {'lxml': minify_html, 'bs4': minify_html_bs4}[func_name]
+    # The peak RSS already includes imports, so it is reset before the page is loaded. ru_maxrss is not used,
+    # as it is not reset and also includes the peak of the parent process the spawned process was forked from
+    is_reset = reset_peak_rss()
+    rss_before = get_peak_rss()
+    html_content = path.read_text()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(html_content, **options)
+        timings.append(time.perf_counter() - start)
+    queue.put((min(timings), get_peak_rss() - rss_before if is_reset else float('nan')))
+
+
+def measure(func_name: str, path: Path, options: dict, repeat: int = 3) -> tuple[float, float]:
+    """Runs implementation on the page in a fresh process, returns best time (s) and peak RSS growth (MB)"""
+    ctx = multiprocessing.get_context('spawn')
+    queue = ctx.Queue()
+    process = ctx.Process(target=_measure, args=(func_name, path, options, repeat, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def main():
+    all_equal = True
+    print(f'{"page":<34}{"options":<58}{"bs4, s":>8}{"lxml, s":>9}{"speedup":>9}'
+          f'{"bs4, MB":>9}{"lxml, MB":>10}  parity')
+    for path in sorted(DATA_DIR.glob('*.html')):
+        html_content = path.read_text()
+        for options in OPTIONS:
+            expected, expected_subs = minify_html_bs4(html_content, **options)
+            actual, actual_subs = minify_html(html_content, **options)
+            equal = structure(expected) == structure(actual) and expected_subs == actual_subs
+            all_equal &= equal
+            bs4_time, bs4_memory = measure('bs4', path, options)
+            lxml_time, lxml_memory = measure('lxml', path, options)
+            print(f'{path.name:<34}{str(options):<58}{bs4_time:>8.3f}{lxml_time:>9.3f}{bs4_time / lxml_time:>8.1f}x'
+                  f'{bs4_memory:>9.1f}{lxml_memory:>10.1f}  {"ok" if equal else "DIFFERENT"}')
+    if not all_equal:
+        raise SystemExit('Outputs are different')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""
+Scaling benchmark of `Scheduler` against local fixture websites (see benchmarks/fixture_site.py).
+
+Every site is served by its own process, so that the servers do not compete for the GIL with each other,
+and has its own port, i.e. its own domain for the politeness limits. Configs are split evenly between the sites
+and scraped with the requests crawler by 1, 2, 4... worker processes up to the number of CPU cores.
+Reports rows/s and the speedup over one process,
+the time includes the start of worker processes. Run from the repository root:
+
+    python -m benchmarks.scheduler                            # 8 sites, 32 configs
+    python -m benchmarks.scheduler --sites 16 --configs 64 --pages 20
+"""
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from scraperai.runner import RunOptions
+from scraperai.scheduler import Scheduler, SchedulerOptions
+
+from .fixture_site import FixtureSite
+
+
+def _serve(pages: int, items_per_page: int, delay: float, configs: multiprocessing.Queue,
+           stop: multiprocessing.Event):
+    with FixtureSite(pages=pages, items_per_page=items_per_page, delay=delay) as site:
+        configs.put(site.make_config('urls').model_dump_json())
+        stop.wait()
+
+
+def run_benchmark(sites: int, configs: int, pages: int, items_per_page: int, delay: float,
+                  processes: list[int], workers: int) -> list[dict]:
+    ctx = multiprocessing.get_context('spawn')
+    site_configs, stop = ctx.Queue(), ctx.Event()
+    servers = [ctx.Process(target=_serve, args=(pages, items_per_page, delay, site_configs, stop), daemon=True)
+               for _ in range(sites)]
+    for server in servers:
+        server.start()
+    results = []
+    try:
+        configs_json = [site_configs.get(timeout=30) for _ in servers]
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            configs_dir = Path(tmp_dir) / 'configs'
+            configs_dir.mkdir()
+            for i in range(configs):
+                (configs_dir / f'config{i}.scraperai.json').write_text(configs_json[i % sites])
+
+            for count in processes:
+                options = RunOptions(output_dir=str(Path(tmp_dir) / f'results{count}'), workers=workers)
+                scheduler = Scheduler(options, SchedulerOptions(processes=count, max_per_domain=configs))
+                start = time.perf_counter()
+                summary = scheduler.run([configs_dir])
+                elapsed = time.perf_counter() - start
+                results.append({'processes': count, 'time': elapsed, 'rows': summary.to_dict()['rows'],
+                                'failed': summary.failed, 'expected_rows': configs * pages * items_per_page})
+    finally:
+        stop.set()
+        for server in servers:
+            server.join(timeout=10)
+    return results
+
+
+def main():
+    cores = os.cpu_count() or 1
+    default_processes = []
+    count = 1
+    while count <= cores:
+        default_processes.append(count)
+        count *= 2
+    parser = argparse.ArgumentParser(description='Scaling benchmark of the multi-process scheduler')
+    parser.add_argument('--sites', type=int, default=8, help='number of fixture sites (domains)')
+    parser.add_argument('--configs', type=int, default=32)
+    parser.add_argument('--pages', type=int, default=10, help='catalog pages of every site')
+    parser.add_argument('--items-per-page', type=int, default=50)
+    parser.add_argument('--delay', type=float, default=0.0, help='server latency, s')
+    parser.add_argument('--processes', type=int, action='append', help=f'default: {default_processes}')
+    parser.add_argument('--workers', type=int, default=1, help='threads of every process')
+    args = parser.parse_args()
+
+    results = run_benchmark(args.sites, args.configs, args.pages, args.items_per_page, args.delay,
+                            args.processes or default_processes, args.workers)
+    print(f'{"processes":>9}{"time, s":>9}{"rows":>8}{"rows/s":>9}{"speedup":>9}')
+    base = results[0]['rows'] / results[0]['time'] if results else 0
+    for r in results:
+        rate = r['rows'] / r['time']
+        line = f'{r["processes"]:>9}{r["time"]:>9.2f}{r["rows"]:>8}{rate:>9.1f}{rate / base:>9.2f}'
+        if r['failed'] or r['rows'] != r['expected_rows']:
+            line += f'  {r["failed"]} failed, expected {r["expected_rows"]} rows'
+        print(line, flush=True)
+
+
+if __name__ == '__main__':
+    main()
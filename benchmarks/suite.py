@@ -0,0 +1,265 @@
+"""
+Benchmarks of HTML utilities and extraction hot paths on pages from tests/data and synthetic catalog pages
+of 1k, 10k and 100k nodes.
+
+Every benchmark runs in a fresh process and reports the best and median time of `--repeat` runs and
+the peak RSS growth. Results are compared with the baseline file, a benchmark is a regression when it is
+`--tolerance` times slower or uses `--tolerance` times more memory than the baseline. Token counts depend on
+the encoding (the default one or a byte-level one when it can not be downloaded), so every encoding has its own
+baseline file `baseline_<encoding>.json` and results are compared only with the baseline of the same encoding.
+Run from the repository root:
+
+    python -m benchmarks.suite                          # run all benchmarks and compare with the baseline
+    python -m benchmarks.suite -k split_html -k 10k     # run benchmarks whose names contain all substrings
+    python -m benchmarks.suite --save                   # update the baseline with the results
+
+Timings depend on the machine, so update the baseline on the machine the suite is compared on.
+"""
+import argparse
+import json
+import multiprocessing
+import platform
+import resource
+import statistics
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable
+
+import lxml
+import tiktoken
+from lxml import html
+
+from scraperai.models import WebpageFields, StaticField, DynamicField
+from scraperai.parsers.utils import extract_items
+from scraperai.utils.html import (minify_html, split_html, remove_nodes_by_xpath, extract_field_by_xpath,
+                                  extract_json_from_html, get_encoding)
+
+DATA_DIR = Path(__file__).resolve().parent.parent / 'tests' / 'data'
+BENCHMARKS_DIR = Path(__file__).resolve().parent
+SYNTHETIC_SIZES = {'1k': 1_000, '10k': 10_000, '100k': 100_000}
+# Number of elements in a synthetic card, see `make_synthetic_page`
+CARD_NODES = 13
+
+
+@dataclass
+class Page:
+    name: str
+    html_content: str
+    card_xpath: str | None = None
+    fields: WebpageFields | None = None
+
+
+def make_synthetic_page(nodes_count: int) -> str:
+    """Catalog page with cards of `CARD_NODES` elements and a JSON state script"""
+    cards = []
+    for i in range(nodes_count // CARD_NODES):
+        cards.append(
+            f'<div class="card" data-id="{i}">'
+            f'<a href="/items/{i}?utm_source=catalog"><img src="/images/{i}.jpg" alt="Item {i}"></a>'
+            f'<h2 class="title">Item {i} with a reasonably long product name</h2>'
+            f'<div class="price"><span>{i * 7 % 1000} USD</span></div>'
+            f'<ul class="specs"><li><span>Color</span><span>Black</span></li>'
+            f'<li><span>Weight, g</span><span>{i % 500}</span></li></ul>'
+            f'</div>'
+        )
+    state = json.dumps({'page': 1, 'items_count': len(cards), 'title': 'Synthetic catalog page',
+                        'filters': ['color', 'weight', 'price'], 'currency': 'USD', 'sort': 'popular'})
+    return (f'<html><head><title>Catalog</title><style>.card {{ display: block; }}</style>'
+            f'<script type="application/json">{state}</script></head>'
+            f'<body><div class="catalog">{"".join(cards)}</div></body></html>')
+
+
+SYNTHETIC_FIELDS = WebpageFields(
+    static_fields=[
+        StaticField(field_name='title', field_xpath='//h2[@class="title"]/text()'),
+        StaticField(field_name='price', field_xpath='//div[@class="price"]/span/text()'),
+        StaticField(field_name='url', field_xpath='//a/@href'),
+    ],
+    dynamic_fields=[
+        DynamicField(section_name='specs', name_xpath='//ul[@class="specs"]/li/span[1]',
+                     value_xpath='//ul[@class="specs"]/li/span[2]'),
+    ]
+)
+OZON_CATALOG_FIELDS = WebpageFields(
+    static_fields=[
+        StaticField(field_name='Product Name', field_xpath='//div[@class="i8v"]/a/div/span/text()'),
+        StaticField(field_name='Links', field_xpath='//a/@href', multiple=True),
+    ],
+    dynamic_fields=[
+        DynamicField(section_name='Test',
+                     name_xpath="//div[@class='ba9 r9i']/span/font/preceding-sibling::text()[1]",
+                     value_xpath="//div[@class='ba9 r9i']/span/font"),
+    ]
+)
+
+
+def get_page_names() -> list[str]:
+    return [path.stem for path in sorted(DATA_DIR.glob('*.html'))] + \
+        [f'synthetic_{size}' for size in SYNTHETIC_SIZES]
+
+
+def load_page(name: str) -> Page:
+    if name.startswith('synthetic_'):
+        html_content = make_synthetic_page(SYNTHETIC_SIZES[name.removeprefix('synthetic_')])
+        return Page(name, html_content, card_xpath='//div[@class="card"]', fields=SYNTHETIC_FIELDS)
+    html_content = (DATA_DIR / f'{name}.html').read_text()
+    if name == 'ozon_catalog_page':
+        # Cards classes are stable only after minification, as during scraping
+        html_content, _ = minify_html(html_content)
+        return Page(name, html_content, card_xpath='//div[@class="vi6 v6i"]', fields=OZON_CATALOG_FIELDS)
+    return Page(name, html_content)
+
+
+def get_benchmark_encoding() -> tiktoken.Encoding:
+    """The default encoding, or a byte-level one if it can not be downloaded"""
+    try:
+        return get_encoding()
+    except Exception:
+        return tiktoken.Encoding(name='bytes', pat_str=r'\S+|\s+',
+                                 mergeable_ranks={bytes([i]): i for i in range(256)}, special_tokens={})
+
+
+# Benchmarks receive a page and return the measured function. Work done before returning is not measured.
+# None means that the benchmark is not applicable to the page.
+
+def bench_minify_html(page: Page) -> Callable[[], Any]:
+    return lambda: minify_html(page.html_content)
+
+
+def bench_split_html(page: Page) -> Callable[[], Any]:
+    encoding = get_benchmark_encoding()
+    return lambda: split_html(page.html_content, max_text_size=1000, encoding=encoding)
+
+
+def bench_remove_nodes_by_xpath(page: Page) -> Callable[[], Any]:
+    return lambda: remove_nodes_by_xpath(page.html_content, ['//script', '//style', '//svg', '//img'])
+
+
+def bench_extract_field_by_xpath(page: Page) -> Callable[[], Any]:
+    tree = html.fromstring(page.html_content)
+    return lambda: (extract_field_by_xpath(tree, '//a/@href'), extract_field_by_xpath(tree, '//span/text()'))
+
+
+def bench_extract_items(page: Page) -> Callable[[], Any] | None:
+    if page.card_xpath is None:
+        return None
+    return lambda: extract_items(page.html_content, page.fields, page.card_xpath)
+
+
+def bench_extract_json_from_html(page: Page) -> Callable[[], Any]:
+    return lambda: extract_json_from_html(page.html_content)
+
+
+BENCHMARKS: dict[str, Callable[[Page], Callable[[], Any] | None]] = {
+    'minify_html': bench_minify_html,
+    'split_html': bench_split_html,
+    'remove_nodes_by_xpath': bench_remove_nodes_by_xpath,
+    'extract_field_by_xpath': bench_extract_field_by_xpath,
+    'extract_items': bench_extract_items,
+    'extract_json_from_html': bench_extract_json_from_html,
+}
+
+
+def _measure(benchmark: str, page_name: str, repeat: int, queue: multiprocessing.Queue):
+    func = BENCHMARKS[benchmark](load_page(page_name))
+    if func is None:
+        queue.put(None)
+        return
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    queue.put({'time': min(timings), 'median': statistics.median(timings), 'memory': (rss_after - rss_before) / 1024})
+
+
+def measure(benchmark: str, page_name: str, repeat: int = 5) -> dict[str, float] | None:
+    """Runs the benchmark in a fresh process. Returns best and median time (s) and peak RSS growth (MB)"""
+    ctx = multiprocessing.get_context('spawn')
+    queue = ctx.Queue()
+    process = ctx.Process(target=_measure, args=(benchmark, page_name, repeat, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def get_machine_info() -> dict[str, str]:
+    return {
+        'platform': platform.platform(),
+        'processor': platform.processor() or platform.machine(),
+        'python': platform.python_version(),
+        'lxml': lxml.__version__,
+        'encoding': get_benchmark_encoding().name,
+    }
+
+
+def get_baseline_path(encoding_name: str) -> Path:
+    return BENCHMARKS_DIR / f'baseline_{encoding_name}.json'
+
+
+def is_regression(result: dict[str, float], baseline: dict[str, float], tolerance: float) -> bool:
+    # Small absolute differences are noise of the timer and the allocator
+    return result['time'] > max(baseline['time'] * tolerance, baseline['time'] + 0.001) or \
+        result['memory'] > max(baseline['memory'] * tolerance, baseline['memory'] + 5)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmarks of HTML utilities')
+    parser.add_argument('-k', dest='keywords', action='append', default=[],
+                        help='run benchmarks whose names contain the substring')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--tolerance', type=float, default=1.5)
+    parser.add_argument('--baseline', type=Path, help='baseline file, baseline_<encoding>.json by default')
+    parser.add_argument('--save', action='store_true', help='save results to the baseline file')
+    args = parser.parse_args()
+
+    machine = get_machine_info()
+    baseline_path = args.baseline or get_baseline_path(machine['encoding'])
+    baseline = {'machine': {}, 'results': {}}
+    if baseline_path.exists():
+        baseline = json.loads(baseline_path.read_text())
+    if baseline['machine'].get('encoding', machine['encoding']) != machine['encoding']:
+        print(f'Baseline {baseline_path} was recorded with {baseline["machine"]["encoding"]} encoding '
+              f'and is not compared with {machine["encoding"]} results')
+        baseline = {'machine': {}, 'results': {}}
+    elif baseline['machine'] and baseline['machine'] != machine:
+        print(f'Baseline was recorded on another machine or environment: {baseline["machine"]}')
+
+    results = {}
+    regressions = []
+    print(f'{"benchmark":<60}{"best, s":>10}{"median, s":>11}{"MB":>8}{"baseline, s":>13}{"ratio":>8}')
+    for benchmark in BENCHMARKS:
+        for page_name in get_page_names():
+            name = f'{benchmark}[{page_name}]'
+            if not all(keyword in name for keyword in args.keywords):
+                continue
+            result = measure(benchmark, page_name, repeat=args.repeat)
+            if result is None:
+                continue
+            results[name] = result
+            line = f'{name:<60}{result["time"]:>10.4f}{result["median"]:>11.4f}{result["memory"]:>8.1f}'
+            expected = baseline['results'].get(name)
+            if expected is not None:
+                line += f'{expected["time"]:>13.4f}{result["time"] / expected["time"]:>7.2f}x'
+                if is_regression(result, expected, args.tolerance):
+                    regressions.append(name)
+                    line += '  REGRESSION'
+            print(line, flush=True)
+
+    if args.save:
+        baseline['machine'] = machine
+        baseline['results'].update(results)
+        baseline_path.write_text(json.dumps(baseline, indent=2, sort_keys=True) + '\n')
+        print(f'Saved {len(results)} results to {baseline_path}')
+    elif regressions:
+        print(f'{len(regressions)} regressions: {", ".join(regressions)}')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
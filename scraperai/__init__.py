@@ -1,4 +1,13 @@
-from .crawlers import SeleniumCrawler, RequestsCrawler, BaseCrawler, SelenoidSettings, WebdriversManager
+from .crawlers import (
+    SeleniumCrawler,
+    RequestsCrawler,
+    BaseCrawler,
+    AsyncBaseCrawler,
+    AsyncHttpCrawler,
+    SelenoidSettings,
+    WebdriversManager,
+    WebdriversPool
+)
 from .parsers import ParserAI
 from .scraper import Scraper
 from .llm import BaseJsonLM, BaseVision, JsonOpenAI, VisionOpenAI
@@ -3,6 +3,7 @@ import logging
 import click
 
 from scraperai.cli.controller import Controller
+from scraperai.cli.runner import run
 from scraperai.cli.utils import validate_url
 
 
@@ -20,24 +21,36 @@ def logging_option(func):
 
 
 def validate_url_input(ctx, param, value):
+    if value is None or validate_url(value):
+        return value
+    raise click.BadParameter("Invalid URL")
+
+
+def _parse_url(value: str) -> str:
     if validate_url(value):
         return value
     raise click.BadParameter("Invalid URL")
 
 
-@click.command()
+@click.group(invoke_without_command=True)
 @click.option('--url',
-              prompt='Enter url',
               help='url of the catalog or product page of any website',
               callback=validate_url_input)
 @logging_option
-def main(url: str):
+@click.pass_context
+def main(ctx: click.Context, url: str | None):
     """ScraperAI CLI Application
 
     You need openai api key to use this application. There are two ways to pass the key.
     The first is to add OPENAI_API_KEY to your environment or create .env file.
     Second option is to pass api key to the script (you will be asked).
+
+    Use `scraperai run` to scrape saved configs without interaction.
     """
+    if ctx.invoked_subcommand is not None:
+        return
+    if url is None:
+        url = click.prompt('Enter url', value_proc=_parse_url)
     app = Controller(url)
     try:
         app.run()
@@ -47,5 +60,8 @@ def main(url: str):
         app.quit(exit_code=-1)
 
 
+main.add_command(run)
+
+
 if __name__ == '__main__':
     main()
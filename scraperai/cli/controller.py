@@ -12,16 +12,22 @@ from scraperai.cli.model import ScreenStatus
 from scraperai.cli.utils import convert_ranges_to_indices, delete_fields_by_range, delete_field_by_name, DATA_DIR
 from scraperai.cli.view import View
 from scraperai.exceptions import NotFoundError
+from scraperai.llm.cache import LLMCache
 from scraperai.models import CatalogItem, WebpageFields, ScraperConfig, WebpageType, Pagination
 from scraperai import ParserAI
 from scraperai.crawlers import SeleniumCrawler
+from scraperai.crawlers.webdriver import ReadinessWaiter, TimingProfile, ResourcePolicy
+from scraperai.dedup import Deduplicator
 from scraperai.scraper import Scraper
+from scraperai.writers import JsonLinesWriter, create_writer, read_json_lines
 
 
 class Controller:
     crawler: BaseCrawler = None
+    timing_profile: TimingProfile = None
     parser: ParserAI = None
-    rows: list = []
+    results_path: str = None
+    rows_count: int = 0
 
     def __init__(self, start_url: str):
         self.start_url = start_url
@@ -52,7 +58,9 @@ class Controller:
 
     def init_crawler(self):
         click.echo('Starting webdriver...')
-        self.crawler = SeleniumCrawler()
+        # Page load timings are learned across runs
+        self.timing_profile = TimingProfile(os.path.join(DATA_DIR, 'timings.json'))
+        self.crawler = SeleniumCrawler(waiter=ReadinessWaiter(profile=self.timing_profile))
         click.echo(f'Webdriver is ok')
 
     def init_scraper(self):
@@ -68,7 +76,8 @@ class Controller:
             if should_save:
                 with open('.env', 'w+') as f:
                     f.write(f'OPENAI_API_KEY={openai_api_key}')
-        self.parser = ParserAI(openai_api_key=openai_api_key)
+        cache = LLMCache(os.path.join(DATA_DIR, 'llm_cache.sqlite3'))
+        self.parser = ParserAI(openai_api_key=openai_api_key, cache=cache, parallel=True)
 
     def detect_page_type(self):
         self.view.show_page_type_screen(status=ScreenStatus.loading)
@@ -198,49 +207,54 @@ class Controller:
         self.config.fields = fields
 
     def scrape(self):
-        scraper = Scraper(self.config, self.crawler)
+        # Distinct items may have equal scraped fields, so only urls are deduplicated
+        dedup = Deduplicator(rows=False)
+        scraper = Scraper(self.config, self.crawler, dedup=dedup)
         if self.config.page_type == WebpageType.OTHER:
             self.quit('Unsupported page type. Aborting...')
             return
-        elif self.config.page_type == WebpageType.DETAILS:
-            if self.config.pagination.type == 'urls':
-                urls = set(self.config.pagination.urls)
-            else:
-                urls = {self.config.start_url}
-            rows = []
-            for row in scraper.scrape_nested_items(urls):
-                rows.append(row)
-        else:
-            if self.config.open_nested_pages:
-                urls: set[str] = set()
+
+        # Only page sources are used from now on, so images, fonts and trackers are not loaded
+        if isinstance(self.crawler, SeleniumCrawler):
+            self.crawler.set_resource_policy(ResourcePolicy())
+
+        # Rows are written to disk as they are scraped and exported to other formats afterward
+        timestamp = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
+        self.results_path = f'results_{timestamp}.jsonl'
+        with JsonLinesWriter(self.results_path) as writer:
+            if self.config.page_type == WebpageType.DETAILS:
+                if self.config.pagination.type == 'urls':
+                    urls = self.config.pagination.urls
+                else:
+                    urls = [self.config.start_url]
+                writer.write_rows(scraper.scrape_nested_items(scraper.unique_urls(urls)))
+            elif self.config.open_nested_pages:
+                urls: list[str] = []
                 with View.progressbar(iterable=scraper.scrape_nested_items_urls(),
                                       length=self.config.max_rows,
                                       label='Collecting nested urls') as bar:
                     for url in bar:
-                        urls.add(url)
+                        urls.append(url)
                         bar.update(1)
                 click.echo(f'Collected {len(urls)} urls to nested pages')
-                rows = []
                 with View.progressbar(iterable=scraper.scrape_nested_items(urls),
                                       length=self.config.max_rows,
                                       label='Scraping nested pages') as bar:
-                    for row in bar:
-                        rows.append(row)
+                    writer.write_rows(bar)
             else:
-                rows = []
                 with View.progressbar(iterable=scraper.scrape_catalog_items(),
                                       length=self.config.max_rows,
                                       label='Scraping catalog pages') as bar:
-                    for row in bar:
-                        rows.append(row)
-
-        self.rows = rows
+                    writer.write_rows(bar)
+        self.rows_count = writer.rows_written
+        if dedup.skipped_urls:
+            click.echo(f'Skipped {dedup.skipped_urls} duplicate urls')
 
     def export_results(self):
-        self.view.show_export_screen(status=ScreenStatus.loading, data_size=len(self.rows))
+        self.view.show_export_screen(status=ScreenStatus.loading, data_size=self.rows_count)
         # TODO: Add data postprocessing
 
-        self.view.show_export_screen(status=ScreenStatus.show)
+        self.view.show_export_screen(status=ScreenStatus.show, filename=self.results_path)
 
         is_first_iteration = True
         while True:
@@ -249,17 +263,15 @@ class Controller:
             if output_format is None:
                 break
             # Export logic
-            timestamp = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
-            filename = f'results_{timestamp}.{output_format}'
-            if output_format == 'json':
-                with open(filename, 'w+') as f:
-                    json.dump(self.rows, f, indent=4, ensure_ascii=False)
+            filename = os.path.splitext(self.results_path)[0] + f'.{output_format}'
+            if output_format == 'jsonl':
+                pass
             elif output_format == 'xlsx':
-                df = pd.DataFrame(self.rows)
+                df = pd.DataFrame(read_json_lines(self.results_path))
                 df.to_excel(filename)
-            elif output_format == 'csv':
-                df = pd.DataFrame(self.rows)
-                df.to_csv(filename)
+            else:
+                with create_writer(filename, output_format) as writer:
+                    writer.write_rows(read_json_lines(self.results_path))
 
             self.view.show_export_screen(status=ScreenStatus.show, filename=filename)
 
@@ -313,7 +325,9 @@ class Controller:
             self.config.max_pages = max_pages
 
         # Step 8: Scraping all pages accroding to the task
-        self.view.show_config_screen(self.config, self.parser.total_cost)
+        self.view.show_config_screen(self.config, self.parser.total_cost,
+                                     cache_hits=self.parser.cache_hits,
+                                     cache_misses=self.parser.cache_misses)
         should_save_config = self.view.show_config_save_screen()
         if should_save_config:
             timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -330,4 +344,5 @@ class Controller:
             click.echo(message)
         if isinstance(self.crawler, SeleniumCrawler):
             self.crawler.driver.quit()
+            self.timing_profile.save()
         exit(exit_code)
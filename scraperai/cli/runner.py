@@ -0,0 +1,66 @@
+import json
+from pathlib import Path
+
+import click
+
+from scraperai.runner import CRAWLERS, ConfigRunner, RunOptions
+from scraperai.scheduler import Scheduler, SchedulerOptions
+from scraperai.writers import WRITERS
+
+
+@click.command()
+@click.argument('configs', nargs=-1, required=True, type=click.Path(exists=True))
+@click.option('--crawler', type=click.Choice(CRAWLERS), default='requests', show_default=True,
+              help='Crawler backend. Use selenium for pages that require JavaScript')
+@click.option('--output-dir', '-o', type=click.Path(file_okay=False), default='.', show_default=True,
+              help='Directory for results, one file per config')
+@click.option('--format', 'output_format', type=click.Choice(list(WRITERS)), default='jsonl', show_default=True)
+@click.option('--workers', '-w', type=click.IntRange(min=1), default=1, show_default=True,
+              help='Number of configs scraped at the same time by every process')
+@click.option('--processes', '-p', type=click.IntRange(min=1), default=1, show_default=True,
+              help='Number of worker processes, e.g. the number of CPU cores')
+@click.option('--max-per-domain', type=click.IntRange(min=1), default=2, show_default=True,
+              help='Configs of the same domain scraped at the same time, with --processes > 1')
+@click.option('--min-request-interval', type=click.FloatRange(min=0), default=0.0, show_default=True,
+              help='Minimal interval between requests to the same domain in seconds, with --processes > 1')
+@click.option('--max-pages', type=click.IntRange(min=1), help='Override max pages of every config')
+@click.option('--max-rows', type=click.IntRange(min=1), help='Override max rows of every config')
+@click.option('--concurrency', type=click.IntRange(min=1), help='Override nested pages crawlers of every config')
+@click.option('--parse-processes', type=click.IntRange(min=0),
+              help='Override processes extracting nested pages of every config')
+@click.option('--time-limit', type=click.FloatRange(min=0, min_open=True),
+              help='Stop scraping a config after this number of seconds')
+@click.option('--rate-limit', type=click.FloatRange(min=0, min_open=True),
+              help='Requests to the same host per second. 429 and 503 responses are retried with backoff')
+@click.option('--http-cache', type=click.Path(dir_okay=False),
+              help='SQLite file of the HTTP cache of the requests crawler. Unchanged pages are not downloaded again')
+@click.option('--skip-unchanged', is_flag=True,
+              help='Skip pages that did not change since the previous run. Requires --http-cache')
+@click.option('--dedup/--no-dedup', default=True, show_default=True, help='Skip duplicate urls of nested pages')
+@click.option('--dedup-rows', is_flag=True,
+              help='Also skip rows with the same content. Distinct items with equal scraped fields are skipped too')
+@click.option('--headless/--no-headless', default=True, show_default=True, help='Hide the browser window')
+@click.option('--summary', 'summary_path', type=click.Path(dir_okay=False),
+              help='Also write the summary to this file')
+def run(configs: tuple[str, ...], summary_path: str | None, processes: int, max_per_domain: int,
+        min_request_interval: float, **kwargs):
+    """Scrape saved configs without interaction
+
+    CONFIGS are *.scraperai.json files saved by the interactive application or directories with them.
+    A JSON summary is printed when all configs are finished. Exit code is 1 if any config failed.
+    """
+    options = RunOptions(**kwargs)
+    if options.skip_unchanged and options.http_cache is None:
+        raise click.UsageError('--skip-unchanged requires --http-cache')
+    if processes > 1:
+        scheduler_options = SchedulerOptions(processes=processes, max_per_domain=max_per_domain,
+                                             min_request_interval=min_request_interval)
+        summary = Scheduler(options, scheduler_options).run(configs).to_dict()
+    else:
+        summary = ConfigRunner(options).run(configs).to_dict()
+    summary_json = json.dumps(summary, indent=2)
+    if summary_path:
+        Path(summary_path).write_text(summary_json)
+    click.echo(summary_json)
+    if summary['failed']:
+        raise SystemExit(1)
@@ -86,7 +86,9 @@ class View:
                     urls_to_print.append('...')
 
                 urls_text = '\n'.join(['  - ' + u for u in urls_to_print])
-                click.echo(f'Detected catalog item!\n'
+                method = f' by page structure (confidence {catalog_item.confidence:.2f})' \
+                    if catalog_item.confidence is not None else ''
+                click.echo(f'Detected catalog item{method}!\n'
                            f'- card xpath: {catalog_item.card_xpath}\n'
                            f'- href xpath: {catalog_item.url_xpath}\n'
                            f'- urls on page ({len(catalog_item.urls_on_page)}+):\n'
@@ -160,7 +162,9 @@ class View:
 
     def show_config_screen(self, config: ScraperConfig,
                            total_cost: float = None,
-                           show_limits: bool = True) -> None:
+                           show_limits: bool = True,
+                           cache_hits: int = 0,
+                           cache_misses: int = 0) -> None:
         if config.catalog_item:
             catalog_item = f'(card_xpath={config.catalog_item.card_xpath}, url_xpath={config.catalog_item.url_xpath})'
         else:
@@ -177,6 +181,8 @@ class View:
             text += f' - Max rows: {config.max_rows}\n'
         if total_cost:
             text += f' - Total OpenAI cost, $: {total_cost:.3f}\n'
+        if cache_hits or cache_misses:
+            text += f' - LLM cache: {cache_hits} hits, {cache_misses} misses\n'
         click.echo(text)
 
     def show_config_save_screen(self) -> bool:
@@ -186,7 +192,7 @@ class View:
                            status: ScreenStatus,
                            data_size: int = None,
                            force_yes: bool = True,
-                           filename: str = None) -> Literal['json', 'xlsx', 'csv'] | None:
+                           filename: str = None) -> Literal['json', 'jsonl', 'xlsx', 'csv', 'parquet'] | None:
         if status == ScreenStatus.loading:
             click.echo(f'Successfully collected {data_size} rows. Preparing data for export...')
         elif status == ScreenStatus.show:
@@ -198,7 +204,7 @@ class View:
             if not force_yes:
                 if not click.confirm(f'Do you want to export in other format?', default=False):
                     return None
-            types = ['json', 'xlsx', 'csv']
+            types = ['json', 'jsonl', 'xlsx', 'csv', 'parquet']
             return click.prompt('Choose output format',
                                 type=click.Choice(types, case_sensitive=False),
                                 default='json')
@@ -1,4 +1,7 @@
-from .base import BaseCrawler
+from .base import BaseCrawler, AsyncBaseCrawler
 from .selenium import SeleniumCrawler
 from .requests import RequestsCrawler
-from .webdriver import SelenoidSettings, WebdriversManager
+from .webdriver import SelenoidSettings, WebdriversManager, WebdriversPool
+from .async_http import AsyncHttpCrawler
+from .ratelimit import HostRateLimiter, MemoryBackend, SQLiteBackend
+from .cache import PageCache
@@ -0,0 +1,122 @@
+import asyncio
+import logging
+from urllib.parse import urlparse
+
+import httpx
+
+from scraperai.crawlers.base import AsyncBaseCrawler
+from scraperai.crawlers.cache import PageCache
+from scraperai.crawlers.ratelimit import HostRateLimiter, RETRY_STATUSES
+from scraperai.crawlers.webdriver.useragents import get_random_useragent
+from scraperai.models import Pagination
+
+logger = logging.getLogger('scraperai')
+
+
+class AsyncHttpCrawler(AsyncBaseCrawler):
+    """
+    Asyncio crawler for websites that do not require JavaScript rendering.
+
+    All requests share one pooled `httpx.AsyncClient`, so connections are kept alive and reused.
+    HTTP/2 requires `h2` package and brotli decoding requires `brotli` package (`pip install httpx[http2,brotli]`),
+    gzip and deflate are always supported.
+    Pass a `HostRateLimiter` to limit requests per host, 429 and 503 responses are retried `max_retries` times.
+    Pass a `PageCache` to send conditional requests and get unchanged pages from the cache.
+    """
+    current_url: str = None
+
+    def __init__(self,
+                 *,
+                 max_connections: int = 100,
+                 max_connections_per_host: int = 6,
+                 max_keepalive_connections: int = 20,
+                 keepalive_expiry: float = 5.0,
+                 http2: bool = False,
+                 timeout: float = 30.0,
+                 connect_timeout: float = 10.0,
+                 headers: dict[str, str] = None,
+                 client: httpx.AsyncClient = None,
+                 rate_limiter: HostRateLimiter = None,
+                 max_retries: int = 3,
+                 cache: PageCache = None):
+        if client is None:
+            client = httpx.AsyncClient(
+                http2=http2,
+                limits=httpx.Limits(max_connections=max_connections,
+                                    max_keepalive_connections=max_keepalive_connections,
+                                    keepalive_expiry=keepalive_expiry),
+                timeout=httpx.Timeout(timeout, connect=connect_timeout),
+                headers={'User-Agent': get_random_useragent(), **(headers or {})},
+                follow_redirects=True
+            )
+        self.client = client
+        self.max_connections_per_host = max_connections_per_host
+        self.rate_limiter = rate_limiter
+        self.max_retries = max_retries
+        self.cache = cache
+        self.__host_semaphores: dict[str, asyncio.Semaphore] = {}
+        self.__page_source = None
+        self.__pagination_url_index = 0
+
+    def _get_host_semaphore(self, url: str) -> asyncio.Semaphore:
+        host = urlparse(url).netloc
+        if host not in self.__host_semaphores:
+            self.__host_semaphores[host] = asyncio.Semaphore(self.max_connections_per_host)
+        return self.__host_semaphores[host]
+
+    async def _send(self, url: str, headers: dict[str, str]) -> httpx.Response:
+        async with self._get_host_semaphore(url):
+            if self.rate_limiter is None:
+                return await self.client.get(url, headers=headers)
+            for attempt in range(self.max_retries + 1):
+                await self.rate_limiter.aacquire(url)
+                response = await self.client.get(url, headers=headers)
+                await asyncio.to_thread(self.rate_limiter.report, url, response.status_code,
+                                        response.headers.get('Retry-After'))
+                if response.status_code not in RETRY_STATUSES:
+                    break
+            return response
+
+    async def fetch(self, url: str) -> str:
+        # The cache is SQLite, so it is accessed in a thread to keep the event loop responsive
+        cached = await asyncio.to_thread(self.cache.get, url) if self.cache is not None else None
+        headers = self.cache.get_conditional_headers(cached) if self.cache is not None else {}
+        response = await self._send(url, headers)
+        if response.is_error:
+            logger.warning(f'Got status code {response.status_code} for url={url}')
+        if self.cache is not None:
+            page_source = await asyncio.to_thread(self.cache.process_response, url, cached, response.status_code,
+                                                  response.headers, response.content, response.encoding)
+            if page_source is not None:
+                return page_source
+        return response.text
+
+    def is_changed(self, url: str) -> bool:
+        return self.cache is None or self.cache.is_changed(url)
+
+    async def get(self, url: str):
+        self.current_url = url
+        self.__page_source = await self.fetch(url)
+
+    @property
+    def page_source(self) -> str:
+        return self.__page_source
+
+    async def switch_page(self, pagination: Pagination) -> bool:
+        if pagination.type == 'urls':
+            if self.__pagination_url_index >= len(pagination.urls):
+                return False
+            await self.get(pagination.urls[self.__pagination_url_index])
+            self.__pagination_url_index += 1
+            return True
+        else:
+            return False
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
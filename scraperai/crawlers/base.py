@@ -19,3 +19,61 @@ class BaseCrawler(ABC):
     @abstractmethod
     def switch_page(self, pagination: Pagination) -> bool:
         raise NotImplementedError()
+
+    def set_content_xpath(self, xpath: str | None) -> None:
+        """
+        Sets xpath of the main content nodes (e.g. catalog cards). Crawlers may use it to wait
+        until new content appears after switching pages.
+        """
+        pass
+
+    @property
+    def page_changed(self) -> bool:
+        """
+        False if the current page is known to be the same as when it was loaded last time, e.g. by an HTTP cache.
+        `Scraper(skip_unchanged=True)` does not extract such pages
+        """
+        return True
+
+    def get_new_nodes_html(self, xpath: str) -> list[str] | None:
+        """
+        Returns outerHTML of nodes matching the xpath that were not returned before for the current page,
+        so that infinitely scrolled pages can be scraped without reparsing already seen nodes.
+        Returns None if the crawler does not support it.
+        """
+        return None
+
+    def close(self) -> None:
+        """Releases crawler resources (sessions, webdrivers)"""
+        pass
+
+
+class AsyncBaseCrawler(ABC):
+    @abstractmethod
+    async def get(self, url: str):
+        ...
+
+    @property
+    @abstractmethod
+    def page_source(self) -> str:
+        ...
+
+    @abstractmethod
+    async def fetch(self, url: str) -> str:
+        """
+        Returns page source of the url without changing current page of the crawler.
+        Unlike `get` it is safe to call concurrently.
+        """
+        ...
+
+    @abstractmethod
+    async def switch_page(self, pagination: Pagination) -> bool:
+        raise NotImplementedError()
+
+    def is_changed(self, url: str) -> bool:
+        """False if the last fetched page of the url is known to be the same as the previous time, see `page_changed`"""
+        return True
+
+    async def close(self) -> None:
+        """Releases crawler resources (sessions, connections)"""
+        pass
@@ -0,0 +1,176 @@
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Mapping
+
+logger = logging.getLogger('scraperai')
+
+COMPRESSIONS = ('zstd', 'zlib', None)
+
+
+@dataclass
+class CachedPage:
+    url: str
+    body: bytes
+    encoding: str | None
+    etag: str | None
+    last_modified: str | None
+    # sha256 of the body
+    hash: str
+    fetched_at: float
+
+
+def _import_zstandard():
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError('zstandard is required for zstd compression. Install it with `pip install zstandard`')
+    return zstandard
+
+
+def compress(data: bytes, compression: str | None, level: int | None = None) -> bytes:
+    if compression == 'zstd':
+        # Compressors are not thread-safe, so one is created per page
+        return _import_zstandard().ZstdCompressor(level=level or 3).compress(data)
+    if compression == 'zlib':
+        return zlib.compress(data, level or 6)
+    return data
+
+
+def decompress(data: bytes, compression: str | None) -> bytes:
+    if compression == 'zstd':
+        return _import_zstandard().ZstdDecompressor().decompress(data)
+    if compression == 'zlib':
+        return zlib.decompress(data)
+    return data
+
+
+class PageCache:
+    """
+    HTTP cache of page bodies stored in SQLite, for crawlers that re-scrape the same websites.
+
+    Bodies are stored compressed with their `ETag` and `Last-Modified` validators, so crawlers send conditional
+    requests and get bodies of 304 responses from the cache. The cache also remembers whether the last response
+    of a url has the same body as the previous one, so that `Scraper(skip_unchanged=True)` does not extract
+    unchanged pages. Compression is `zstd` (requires `zstandard`), `zlib` or None.
+    The cache is thread-safe and can be shared by crawlers.
+    """
+
+    def __init__(self, path: str | Path, compression: str | None = 'zlib', level: int = None):
+        if compression not in COMPRESSIONS:
+            raise ValueError(f'Unknown compression: {compression}. Should be one of {COMPRESSIONS}')
+        if compression == 'zstd':
+            _import_zstandard()
+        self.path = str(path)
+        self.compression = compression
+        self.level = level
+        self.hits = 0
+        self.misses = 0
+        self.bytes_received = 0
+        self._changed: dict[str, bool] = {}
+        self._lock = threading.Lock()
+        # Processes of the scheduler may share the cache, so writers wait for each other
+        self._connection = sqlite3.connect(self.path, timeout=60, check_same_thread=False)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute("""
+            CREATE TABLE IF NOT EXISTS pages (
+                url TEXT PRIMARY KEY,
+                body BLOB NOT NULL,
+                compression TEXT,
+                encoding TEXT,
+                etag TEXT,
+                last_modified TEXT,
+                hash TEXT NOT NULL,
+                fetched_at REAL NOT NULL
+            )
+        """)
+        self._connection.commit()
+
+    def get(self, url: str) -> CachedPage | None:
+        with self._lock:
+            row = self._connection.execute('SELECT body, compression, encoding, etag, last_modified, hash, fetched_at '
+                                           'FROM pages WHERE url = ?', (url,)).fetchone()
+        if row is None:
+            return None
+        body, compression, *fields = row
+        # Pages are decompressed with the compression they were stored with
+        return CachedPage(url, decompress(body, compression), *fields)
+
+    @staticmethod
+    def get_conditional_headers(page: CachedPage | None) -> dict[str, str]:
+        headers = {}
+        if page is not None and page.etag:
+            headers['If-None-Match'] = page.etag
+        if page is not None and page.last_modified:
+            headers['If-Modified-Since'] = page.last_modified
+        return headers
+
+    def set(self, url: str, body: bytes, encoding: str | None, headers: Mapping[str, str]) -> CachedPage:
+        page = CachedPage(url=url, body=body, encoding=encoding, etag=headers.get('ETag'),
+                          last_modified=headers.get('Last-Modified'), hash=hashlib.sha256(body).hexdigest(),
+                          fetched_at=time.time())
+        compressed = compress(body, self.compression, self.level)
+        with self._lock:
+            self._connection.execute('INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                                     (url, compressed, self.compression, encoding, page.etag, page.last_modified,
+                                      page.hash, page.fetched_at))
+            self._connection.commit()
+        return page
+
+    def process_response(self,
+                         url: str,
+                         cached: CachedPage | None,
+                         status_code: int,
+                         headers: Mapping[str, str],
+                         body: bytes,
+                         encoding: str | None) -> str | None:
+        """
+        Updates the cache with a response to a request with `get_conditional_headers(cached)`.
+        Returns the page source: from the cache for 304 responses, from the response for 200 responses.
+        Returns None for other responses, they are not cached.
+        """
+        with self._lock:
+            self.bytes_received += len(body)
+        if status_code == 304 and cached is not None:
+            with self._lock:
+                self.hits += 1
+                self._changed[url] = False
+                self._connection.execute('UPDATE pages SET fetched_at = ? WHERE url = ?', (time.time(), url))
+                self._connection.commit()
+            return self.decode(cached)
+        if status_code != 200:
+            with self._lock:
+                self.misses += 1
+                self._changed[url] = True
+            return None
+        page = self.set(url, body, encoding, headers)
+        with self._lock:
+            self.misses += 1
+            self._changed[url] = cached is None or cached.hash != page.hash
+        return self.decode(page)
+
+    def is_changed(self, url: str) -> bool:
+        """False if the last response of the url had the same body as the previous one"""
+        with self._lock:
+            return self._changed.get(url, True)
+
+    @staticmethod
+    def decode(page: CachedPage) -> str:
+        return page.body.decode(page.encoding or 'utf-8', errors='replace')
+
+    def clear(self) -> None:
+        with self._lock:
+            self._connection.execute('DELETE FROM pages')
+            self._connection.commit()
+            self._changed.clear()
+
+    def close(self) -> None:
+        self._connection.close()
+
+    def __str__(self) -> str:
+        return f'PageCache(path={self.path}, hits={self.hits}, misses={self.misses})'
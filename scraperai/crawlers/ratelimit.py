@@ -0,0 +1,258 @@
+"""
+Per-host rate limiting of crawlers.
+
+`HostRateLimiter` is a token bucket per host: `requests_per_second` tokens are refilled continuously
+and up to `burst` requests can be sent at once. The interval is increased to the crawl delay of robots.txt.
+429 and 503 responses block the host for the time of their `Retry-After` header or for an exponential backoff.
+
+Buckets are kept by a backend. `MemoryBackend` shares them by crawlers of a process and `SQLiteBackend`
+by all processes using the same database file.
+"""
+import asyncio
+import email.utils
+import logging
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, TypeVar
+from urllib.parse import urlparse
+from urllib.robotparser import RobotFileParser
+
+import requests
+
+logger = logging.getLogger('scraperai')
+
+# Statuses meaning that the site is overloaded or limits the client
+RETRY_STATUSES = {429, 503}
+
+_T = TypeVar('_T')
+
+
+@dataclass
+class HostState:
+    # Theoretical arrival time of the next request if requests were evenly spaced, see `HostRateLimiter.reserve`
+    next_time: float = 0.0
+    blocked_until: float = 0.0
+    # Consecutive 429 and 503 responses
+    failures: int = 0
+
+
+class MemoryBackend:
+    """Keeps hosts states in memory of the process"""
+
+    def __init__(self):
+        self._states: dict[str, HostState] = {}
+        self._lock = threading.Lock()
+
+    def update(self, host: str, func: Callable[[HostState], _T]) -> _T:
+        """Calls `func` with the state of the host atomically. `func` modifies the state in place"""
+        with self._lock:
+            state = self._states.setdefault(host, HostState())
+            return func(state)
+
+    def close(self) -> None:
+        pass
+
+
+class SQLiteBackend:
+    """Keeps hosts states in an SQLite database, so that processes on the same machine share limits"""
+
+    def __init__(self, path: str | Path):
+        self.path = str(path)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self.path, timeout=60, check_same_thread=False, isolation_level=None)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute("""
+            CREATE TABLE IF NOT EXISTS hosts (
+                host TEXT PRIMARY KEY,
+                next_time REAL NOT NULL,
+                blocked_until REAL NOT NULL,
+                failures INTEGER NOT NULL
+            )
+        """)
+
+    def update(self, host: str, func: Callable[[HostState], _T]) -> _T:
+        with self._lock:
+            # The write lock is taken right away, so that other processes do not read the state in between
+            self._connection.execute('BEGIN IMMEDIATE')
+            try:
+                row = self._connection.execute('SELECT next_time, blocked_until, failures FROM hosts WHERE host = ?',
+                                               (host,)).fetchone()
+                state = HostState(*row) if row else HostState()
+                result = func(state)
+                self._connection.execute('INSERT OR REPLACE INTO hosts VALUES (?, ?, ?, ?)',
+                                         (host, state.next_time, state.blocked_until, state.failures))
+            except BaseException:
+                self._connection.execute('ROLLBACK')
+                raise
+            self._connection.execute('COMMIT')
+            return result
+
+    def close(self) -> None:
+        self._connection.close()
+
+    def __getstate__(self):
+        # Connections can not be pickled, the backend is reopened in other processes
+        return {'path': self.path}
+
+    def __setstate__(self, state):
+        self.__init__(state['path'])
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Seconds to wait from a `Retry-After` header with either seconds or an HTTP date"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        date = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, date.timestamp() - time.time())
+
+
+class HostRateLimiter:
+    """
+    Thread-safe token bucket per host, see the module docstring. Share one limiter by all crawlers of a process,
+    e.g. `RequestsCrawler(rate_limiter=limiter)`, or use `SQLiteBackend` to share limits by processes.
+    """
+
+    def __init__(self,
+                 requests_per_second: float = 1.0,
+                 burst: int = 1,
+                 backend: MemoryBackend | SQLiteBackend = None,
+                 respect_robots: bool = True,
+                 user_agent: str = '*',
+                 backoff: float = 1.0,
+                 max_backoff: float = 300.0,
+                 max_crawl_delay: float = 60.0):
+        """
+        :param requests_per_second: requests to one host per second
+        :param burst: requests to one host that can be sent at once after a pause
+        :param backend: keeps hosts states. `MemoryBackend` by default
+        :param respect_robots: increase the interval to `Crawl-delay` of robots.txt of the host
+        :param user_agent: user agent to look up in robots.txt
+        :param backoff: the first backoff after a 429 or 503 response without `Retry-After`, s.
+            It is doubled with every next consecutive failure
+        :param max_backoff: limit of backoff and `Retry-After`, s
+        :param max_crawl_delay: limit of robots.txt crawl delay, s
+        """
+        self.requests_per_second = requests_per_second
+        self.burst = burst
+        self.backend = backend or MemoryBackend()
+        self.respect_robots = respect_robots
+        self.user_agent = user_agent
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.max_crawl_delay = max_crawl_delay
+        self._crawl_delays: dict[str, float | None] = {}
+        self._robots_locks: dict[str, threading.Lock] = defaultdict(threading.Lock)
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_robots_locks'], state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._robots_locks = defaultdict(threading.Lock)
+        self._lock = threading.Lock()
+
+    def fetch_robots(self, robots_url: str) -> str | None:
+        """Returns robots.txt content or None if it is not available"""
+        try:
+            response = requests.get(robots_url, timeout=10)
+        except requests.RequestException as e:
+            logger.debug(f'Failed to get {robots_url}: {e!r}')
+            return None
+        return response.text if response.ok else None
+
+    def get_crawl_delay(self, url: str) -> float | None:
+        """Crawl delay of robots.txt of the url host. robots.txt is requested once per host"""
+        parts = urlparse(url)
+        host = parts.netloc
+        with self._lock:
+            host_lock = self._robots_locks[host]
+        # Hosts are locked one by one, so that a slow robots.txt does not block requests to other hosts
+        with host_lock:
+            if host in self._crawl_delays:
+                return self._crawl_delays[host]
+            content = self.fetch_robots(f'{parts.scheme}://{host}/robots.txt')
+            crawl_delay = None
+            if content is not None:
+                parser = RobotFileParser()
+                parser.parse(content.splitlines())
+                crawl_delay = parser.crawl_delay(self.user_agent)
+                if crawl_delay is not None:
+                    crawl_delay = min(float(crawl_delay), self.max_crawl_delay)
+                    logger.info(f'Crawl delay of {host} is {crawl_delay}s')
+            self._crawl_delays[host] = crawl_delay
+            return crawl_delay
+
+    def get_interval(self, url: str) -> float:
+        interval = 1 / self.requests_per_second
+        if self.respect_robots:
+            interval = max(interval, self.get_crawl_delay(url) or 0.0)
+        return interval
+
+    def reserve(self, url: str) -> float:
+        """Reserves a request to the url without waiting. Returns the delay before the request can be sent"""
+        interval = self.get_interval(url)
+
+        def take(state: HostState) -> float:
+            # Equivalent to a token bucket of `burst` tokens: the request is allowed when
+            # the evenly spaced schedule is less than `burst` intervals ahead of now
+            now = time.time()
+            next_time = max(state.next_time, now)
+            allowed_at = max(next_time - (self.burst - 1) * interval, state.blocked_until)
+            state.next_time = max(next_time, allowed_at) + interval
+            return max(0.0, allowed_at - now)
+
+        return self.backend.update(urlparse(url).netloc, take)
+
+    def acquire(self, url: str) -> float:
+        """Blocks until a request to the url is allowed. Returns the time waited"""
+        delay = self.reserve(url)
+        if delay > 0:
+            logger.debug(f'Rate limit of {urlparse(url).netloc}, waiting {delay:.2f}s')
+            time.sleep(delay)
+        return delay
+
+    async def aacquire(self, url: str) -> float:
+        """Async version of `acquire`"""
+        delay = await asyncio.to_thread(self.reserve, url)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return delay
+
+    def report(self, url: str, status_code: int, retry_after: str | None = None) -> float:
+        """
+        Records the response status. After 429 and 503 the host is blocked, returns the blocking time.
+        Other statuses reset the backoff
+        """
+        host = urlparse(url).netloc
+        retry_delay = parse_retry_after(retry_after)
+
+        def update(state: HostState) -> float:
+            if status_code not in RETRY_STATUSES:
+                state.failures = 0
+                return 0.0
+            state.failures += 1
+            delay = retry_delay if retry_delay is not None else self.backoff * 2 ** (state.failures - 1)
+            delay = min(delay, self.max_backoff)
+            state.blocked_until = max(state.blocked_until, time.time() + delay)
+            return delay
+
+        delay = self.backend.update(host, update)
+        if delay:
+            logger.warning(f'Got status code {status_code} from {host}, backing off for {delay:.1f}s')
+        return delay
+
+    def __str__(self) -> str:
+        return f'HostRateLimiter(requests_per_second={self.requests_per_second}, burst={self.burst})'
@@ -1,19 +1,57 @@
 import requests
 
 from scraperai.crawlers.base import BaseCrawler
+from scraperai.crawlers.cache import PageCache
+from scraperai.crawlers.ratelimit import HostRateLimiter, RETRY_STATUSES
 from scraperai.models import Pagination
 
 
 class RequestsCrawler(BaseCrawler):
     current_url: str = None
 
-    def __init__(self):
+    def __init__(self,
+                 session: requests.Session = None,
+                 rate_limiter: HostRateLimiter = None,
+                 max_retries: int = 3,
+                 cache: PageCache = None):
+        """
+        :param session: session to send requests with
+        :param rate_limiter: limits requests per host. Share one limiter by all crawlers
+        :param max_retries: retries of 429 and 503 responses after the backoff of the rate limiter
+        :param cache: sends conditional requests and gets unchanged pages from the cache
+        """
+        self.session = session or requests.Session()
+        self.rate_limiter = rate_limiter
+        self.max_retries = max_retries
+        self.cache = cache
         self.__page_source = None
         self.__pagination_url_index = 0
 
+    def _send(self, url: str, headers: dict[str, str]) -> requests.Response:
+        if self.rate_limiter is None:
+            return self.session.get(url, headers=headers)
+        for attempt in range(self.max_retries + 1):
+            self.rate_limiter.acquire(url)
+            response = self.session.get(url, headers=headers)
+            self.rate_limiter.report(url, response.status_code, response.headers.get('Retry-After'))
+            if response.status_code not in RETRY_STATUSES:
+                break
+        return response
+
     def get(self, url: str):
         self.current_url = url
-        self.__page_source = requests.get(url).text
+        if self.cache is None:
+            self.__page_source = self._send(url, {}).text
+            return
+        cached = self.cache.get(url)
+        response = self._send(url, self.cache.get_conditional_headers(cached))
+        page_source = self.cache.process_response(url, cached, response.status_code, response.headers,
+                                                  response.content, response.encoding or response.apparent_encoding)
+        self.__page_source = page_source if page_source is not None else response.text
+
+    @property
+    def page_changed(self) -> bool:
+        return self.cache is None or self.current_url is None or self.cache.is_changed(self.current_url)
 
     @property
     def page_source(self) -> str:
@@ -25,6 +63,9 @@ class RequestsCrawler(BaseCrawler):
     def get_screenshot_as_base64(self) -> str:
         raise NotImplementedError()
 
+    def close(self) -> None:
+        self.session.close()
+
     def switch_page(self, pagination: Pagination) -> bool:
         if pagination.type == 'urls':
             if self.__pagination_url_index >= len(pagination.urls):
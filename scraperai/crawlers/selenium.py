@@ -1,48 +1,124 @@
 import logging
-import time
+from urllib.parse import urlparse
 
 import selenium
 from selenium.webdriver.common.by import By
 from selenium.webdriver.remote.webdriver import WebDriver as BaseSeleniumWebDriver
 
 from scraperai.crawlers.base import BaseCrawler
+from scraperai.crawlers.ratelimit import HostRateLimiter
 from scraperai.crawlers.webdriver import utils
 from scraperai.crawlers.webdriver.local import DefaultChromeWebdriver
+from scraperai.crawlers.webdriver.pool import WebdriversPool
+from scraperai.crawlers.webdriver.readiness import ReadinessWaiter
+from scraperai.crawlers.webdriver.resources import ResourcePolicy, set_blocked_urls
 from scraperai.models import Pagination
 
 logger = logging.getLogger('scraperai')
 
+SEEN_ATTRIBUTE = 'data-scraperai-seen'
+NEW_NODES_SCRIPT = """
+var result = document.evaluate(arguments[0], document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+var nodes = [];
+for (var i = 0; i < result.snapshotLength; i++) {
+    var node = result.snapshotItem(i);
+    if (node.nodeType !== Node.ELEMENT_NODE || node.hasAttribute(arguments[1])) continue;
+    nodes.push(node.outerHTML);
+    node.setAttribute(arguments[1], '');
+}
+return nodes;
+"""
+
 
 class SeleniumCrawler(BaseCrawler):
 
-    def __init__(self, driver: BaseSeleniumWebDriver = None):
-        if driver is None:
-            self.driver = DefaultChromeWebdriver()
-        else:
+    def __init__(self,
+                 driver: BaseSeleniumWebDriver = None,
+                 pool: WebdriversPool = None,
+                 waiter: ReadinessWaiter = None,
+                 resource_policy: ResourcePolicy = None,
+                 rate_limiter: HostRateLimiter = None):
+        """
+        :param driver: webdriver to use. A local Chrome is started when neither driver nor pool are set
+        :param pool: lease the driver from the pool. It is returned to the pool on `close`
+        :param waiter: waits for pages to become ready after navigation and clicks
+        :param resource_policy: resources (images, fonts, trackers) that should not be loaded
+        :param rate_limiter: limits page loads and pagination clicks per host. Webdrivers do not expose
+            response statuses, so there is no backoff on 429 and 503
+        """
+        self.pool = pool
+        self.rate_limiter = rate_limiter
+        self.waiter = waiter or ReadinessWaiter()
+        self.content_xpath: str | None = None
+        if driver is not None:
             self.driver = driver
+        elif pool is not None:
+            self.driver = pool.lease()
+        else:
+            self.driver = DefaultChromeWebdriver()
         self.__last_height = None
         self.__pagination_url_index = 0
+        self.resource_policy = None
+        if resource_policy is not None:
+            self.set_resource_policy(resource_policy)
+
+    def set_resource_policy(self, resource_policy: ResourcePolicy | None) -> None:
+        """Starts blocking resources of the policy. Pass None to load all resources"""
+        blocked_urls = resource_policy.get_blocked_urls() if resource_policy is not None else []
+        if set_blocked_urls(self.driver, blocked_urls) or resource_policy is None:
+            self.resource_policy = resource_policy
 
     def get(self, url: str):
         if self.driver.current_url == url:
             return
+        if self.pool is not None:
+            if self.pool.should_recycle(self.driver):
+                # The page is changed anyway, so the session can be replaced
+                self._release_driver()
+                self.driver = self.pool.lease()
+                if self.resource_policy is not None:
+                    set_blocked_urls(self.driver, self.resource_policy.get_blocked_urls())
+            self.pool.add_pages(self.driver)
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire(url)
         self.driver.get(url)
-        time.sleep(1)
+        self.waiter.wait(self.driver, urlparse(url).netloc, kind='get')
+
+    def set_content_xpath(self, xpath: str | None) -> None:
+        self.content_xpath = xpath
 
     @property
     def page_source(self) -> str:
         return self.driver.page_source
 
+    def get_new_nodes_html(self, xpath: str) -> list[str] | None:
+        # Returned nodes are marked with an attribute, so they are skipped until the page is reloaded
+        try:
+            return self.driver.execute_script(NEW_NODES_SCRIPT, xpath, SEEN_ATTRIBUTE)
+        except selenium.common.exceptions.WebDriverException as e:
+            logger.warning(f'Failed to get new nodes: {e!r}')
+            return None
+
     def click(self, xpath: str) -> None:
         elem = self.driver.find_element(By.XPATH, xpath)
         elem.click()
 
     def get_screenshot_as_base64(self, zoom_out: bool = True) -> str:
-        if zoom_out:
-            self.driver.execute_script("document.body.style.zoom='60%'")
-        screenshot = self.driver.get_screenshot_as_base64()
-        if zoom_out:
-            self.driver.execute_script("document.body.style.zoom='100%'")
+        resource_policy = self.resource_policy
+        if resource_policy is not None:
+            # Screenshots are used to detect page type, so the page is reloaded with all resources
+            self.set_resource_policy(None)
+            self.driver.refresh()
+            self.waiter.wait(self.driver, urlparse(self.driver.current_url).netloc, kind='get')
+        try:
+            if zoom_out:
+                self.driver.execute_script("document.body.style.zoom='60%'")
+            screenshot = self.driver.get_screenshot_as_base64()
+            if zoom_out:
+                self.driver.execute_script("document.body.style.zoom='100%'")
+        finally:
+            if resource_policy is not None:
+                self.set_resource_policy(resource_policy)
         return screenshot
 
     def highlight_by_xpath(self, xpath: str, color: str, border: int):
@@ -51,6 +127,17 @@ class SeleniumCrawler(BaseCrawler):
     def back(self):
         self.driver.back()
 
+    def _release_driver(self) -> None:
+        if self.resource_policy is not None:
+            set_blocked_urls(self.driver, [])
+        self.pool.release(self.driver)
+
+    def close(self) -> None:
+        if self.pool is not None:
+            self._release_driver()
+        else:
+            self.driver.quit()
+
     def _scroll(self) -> bool:
         prev_y = self.driver.execute_script('return window.pageYOffset;')
         self.driver.execute_script("window.scrollBy(0, 500);")
@@ -60,8 +147,14 @@ class SeleniumCrawler(BaseCrawler):
     def switch_page(self, pagination: Pagination) -> bool:
         if pagination.type == 'xpath':
             try:
+                signature = self.waiter.get_content_signature(self.driver, self.content_xpath) \
+                    if self.content_xpath else None
+                if self.rate_limiter is not None:
+                    # Clicks usually load the next page or its content from the same host
+                    self.rate_limiter.acquire(self.driver.current_url)
                 self.click(pagination.xpath)
-                time.sleep(3)
+                self.waiter.wait(self.driver, urlparse(self.driver.current_url).netloc, kind='click',
+                                 content_xpath=self.content_xpath, previous_signature=signature)
                 return True
             except selenium.common.exceptions.ElementClickInterceptedException as e:
                 logger.exception(e)
@@ -1,4 +1,7 @@
 from .manager import WebdriversManager
 from .manager import SelenoidSettings
 from .local import DefaultChromeWebdriver
+from .pool import WebdriversPool, PoolMetrics, PoolTimeout
 
+from .readiness import ReadinessWaiter, TimingProfile
+from .resources import ResourcePolicy
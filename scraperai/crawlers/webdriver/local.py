@@ -14,9 +14,10 @@ from .useragents import get_random_useragent
 
 class DefaultChromeWebdriver(webdriver.Chrome, BaseWebdriver):
     @staticmethod
-    def _setup_options() -> Options:
+    def _setup_options(headless: bool = False) -> Options:
         options = Options()
-        # options.add_argument("--headless")
+        if headless:
+            options.add_argument("--headless=new")
         options.add_argument("--window-size=1440, 900")
         options.add_argument("--no-sandbox")
         options.add_argument("--disable-dev-shm-usage")
@@ -36,8 +37,8 @@ class DefaultChromeWebdriver(webdriver.Chrome, BaseWebdriver):
         options.add_extension(cookies_extension_path.__str__())
         return options
 
-    def __init__(self, driver_version: str = None):
-        self.options = self._setup_options()
+    def __init__(self, driver_version: str = None, headless: bool = False):
+        self.options = self._setup_options(headless)
         super().__init__(service=Service(ChromeDriverManager(driver_version).install()), options=self.options)
         self.local_storage = LocalStorage(self)
 
@@ -27,12 +27,13 @@ class SelenoidSettings:
 class WebdriversManager:
     def __init__(self, selenoids: list[SelenoidSettings]):
         self.selenoids = selenoids
+        # Status of selenoids is requested before every driver creation, so keep connections alive
+        self.session = requests.Session()
 
-    @staticmethod
-    def _get_active_sessions(selenoid: SelenoidSettings) -> int:
+    def _get_active_sessions(self, selenoid: SelenoidSettings) -> int:
         params = urlparse(selenoid.url)
         url = params.scheme + '://' + params.netloc + '/status'
-        response = requests.get(url).json()
+        response = self.session.get(url, timeout=selenoid.timeout).json()
         return response['used']
 
     def from_session_id(self, url: str, session_id: str) -> RemoteWebdriver:
@@ -0,0 +1,236 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable
+
+from selenium.webdriver.remote.webdriver import WebDriver
+
+from .manager import WebdriversManager
+from .storage import LocalStorage
+
+logger = logging.getLogger('scraperai')
+
+
+class PoolTimeout(Exception):
+    """No webdriver was released in time"""
+
+
+@dataclass
+class PoolMetrics:
+    size: int
+    idle: int
+    in_use: int
+    created: int
+    recycled: int
+    failed_health_checks: int
+    leases: int
+    total_wait_time: float
+
+
+class WebdriversPool:
+    """
+    Keeps up to `size` browser sessions alive and leases them to crawlers, so that browser startup
+    is paid once per session instead of once per crawler.
+
+    Sessions are reset (cookies and localStorage are cleared) when they are returned to the pool and checked
+    before they are leased. A session is closed and replaced after it has opened `max_pages_per_session` pages.
+    """
+
+    def __init__(self,
+                 manager: WebdriversManager = None,
+                 driver_factory: Callable[[], WebDriver] = None,
+                 size: int = 4,
+                 max_pages_per_session: int | None = 100,
+                 prewarm: bool = True):
+        """
+        :param manager: creates remote drivers on configured Selenoids
+        :param driver_factory: creates drivers when `manager` is not set. Defaults to `DefaultChromeWebdriver`
+        :param size: maximum number of sessions
+        :param max_pages_per_session: pages after which a session is recycled, None to never recycle
+        :param prewarm: start all sessions in background on initialization
+        """
+        if driver_factory is None:
+            if manager is not None:
+                driver_factory = manager.create_driver
+            else:
+                from .local import DefaultChromeWebdriver
+                driver_factory = DefaultChromeWebdriver
+        self.driver_factory = driver_factory
+        self.size = size
+        self.max_pages_per_session = max_pages_per_session
+
+        self._idle: queue.Queue[WebDriver] = queue.Queue()
+        self._lock = threading.Lock()
+        self._sessions = 0
+        self._pages: dict[int, int] = {}
+        self._in_use: set[int] = set()
+        self._closed = False
+        self._executor = ThreadPoolExecutor(max_workers=size, thread_name_prefix='webdrivers-pool')
+
+        self.created = 0
+        self.recycled = 0
+        self.failed_health_checks = 0
+        self.leases = 0
+        self.total_wait_time = 0.0
+
+        if prewarm:
+            for _ in range(size):
+                self._reserve_session()
+                self._executor.submit(self._add_session)
+
+    @property
+    def metrics(self) -> PoolMetrics:
+        with self._lock:
+            return PoolMetrics(size=self._sessions,
+                               idle=self._idle.qsize(),
+                               in_use=len(self._in_use),
+                               created=self.created,
+                               recycled=self.recycled,
+                               failed_health_checks=self.failed_health_checks,
+                               leases=self.leases,
+                               total_wait_time=self.total_wait_time)
+
+    def _reserve_session(self) -> bool:
+        with self._lock:
+            if self._sessions >= self.size:
+                return False
+            self._sessions += 1
+            return True
+
+    def _create_driver(self) -> WebDriver:
+        try:
+            driver = self.driver_factory()
+        except Exception:
+            with self._lock:
+                self._sessions -= 1
+            raise
+        with self._lock:
+            self.created += 1
+            self._pages[id(driver)] = 0
+        return driver
+
+    def _add_session(self) -> None:
+        try:
+            driver = self._create_driver()
+        except Exception as e:
+            logger.exception(e)
+            return
+        self._idle.put(driver)
+
+    def _discard(self, driver: WebDriver) -> None:
+        with self._lock:
+            self._sessions -= 1
+            self._pages.pop(id(driver), None)
+            self._in_use.discard(id(driver))
+        try:
+            driver.quit()
+        except Exception as e:
+            logger.debug(f'Failed to quit webdriver: {e!r}')
+
+    @staticmethod
+    def _is_healthy(driver: WebDriver) -> bool:
+        try:
+            return driver.execute_script('return 1;') == 1
+        except Exception:
+            return False
+
+    @staticmethod
+    def _reset(driver: WebDriver) -> None:
+        # localStorage belongs to the origin of the current page, so it is cleared before leaving it
+        try:
+            LocalStorage(driver).clear()
+        except Exception as e:
+            logger.debug(f'Failed to clear localStorage: {e!r}')
+        driver.delete_all_cookies()
+        driver.get('about:blank')
+
+    def lease(self, timeout: float = None) -> WebDriver:
+        """Returns a healthy driver, starting a new session if the pool is not full"""
+        started_at = time.monotonic()
+        while True:
+            if self._closed:
+                raise RuntimeError('Pool is closed')
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                if self._reserve_session():
+                    driver = self._create_driver()
+                else:
+                    remaining = None if timeout is None else timeout - (time.monotonic() - started_at)
+                    if remaining is not None and remaining <= 0:
+                        raise PoolTimeout()
+                    # Wake up periodically, since a session that is being started may fail to start
+                    try:
+                        driver = self._idle.get(timeout=1.0 if remaining is None else min(remaining, 1.0))
+                    except queue.Empty:
+                        continue
+
+            if not self._is_healthy(driver):
+                logger.warning('Webdriver session is not healthy, starting a new one')
+                with self._lock:
+                    self.failed_health_checks += 1
+                self._discard(driver)
+                continue
+
+            with self._lock:
+                self._in_use.add(id(driver))
+                self.leases += 1
+                self.total_wait_time += time.monotonic() - started_at
+            return driver
+
+    def add_pages(self, driver: WebDriver, count: int = 1) -> None:
+        """Records pages opened by the driver. Used to recycle long-living sessions"""
+        with self._lock:
+            self._pages[id(driver)] = self._pages.get(id(driver), 0) + count
+
+    def should_recycle(self, driver: WebDriver) -> bool:
+        if self.max_pages_per_session is None:
+            return False
+        with self._lock:
+            return self._pages.get(id(driver), 0) >= self.max_pages_per_session
+
+    def release(self, driver: WebDriver) -> None:
+        """Returns the driver to the pool. Recycled sessions are replaced in background"""
+        with self._lock:
+            self._in_use.discard(id(driver))
+        if self._closed:
+            self._discard(driver)
+            return
+        if self.should_recycle(driver):
+            logger.debug('Recycling webdriver session')
+            with self._lock:
+                self.recycled += 1
+            self._discard(driver)
+            if self._reserve_session():
+                self._executor.submit(self._add_session)
+            return
+        try:
+            self._reset(driver)
+        except Exception as e:
+            logger.warning(f'Failed to reset webdriver session: {e!r}')
+            self._discard(driver)
+            return
+        self._idle.put(driver)
+
+    def close(self) -> None:
+        """Quits idle sessions. Leased sessions are quit when they are released"""
+        self._closed = True
+        self._executor.shutdown(wait=True)
+        while True:
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(driver)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __str__(self) -> str:
+        return f'WebdriversPool({self.metrics})'
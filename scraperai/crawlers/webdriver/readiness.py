@@ -0,0 +1,210 @@
+import json
+import logging
+import math
+import os
+import threading
+import time
+from pathlib import Path
+
+from selenium.common import WebDriverException
+from selenium.webdriver.remote.webdriver import WebDriver
+
+from scraperai.instrumentation import span
+
+logger = logging.getLogger('scraperai')
+
+READY_STATE_SCRIPT = 'return document.readyState;'
+# The resource timing buffer keeps 250 entries by default, it is enlarged so that the count keeps growing
+RESOURCES_COUNT_SCRIPT = 'performance.setResourceTimingBufferSize(100000); ' \
+                         'return performance.getEntriesByType("resource").length;'
+# Number of nodes matching the xpath with hashes of the first and the last of them. Pagination that replaces cards
+# changes the hashes and pagination that appends cards changes the number
+CONTENT_SIGNATURE_SCRIPT = """
+var nodes = document.evaluate(arguments[0], document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+var count = nodes.snapshotLength;
+function hash(node) {
+    var text = node.outerHTML || node.textContent || '', h = 0;
+    for (var i = 0; i < text.length; i++) h = (h * 31 + text.charCodeAt(i)) | 0;
+    return h;
+}
+if (count === 0) return '0';
+return count + ':' + hash(nodes.snapshotItem(0)) + ':' + hash(nodes.snapshotItem(count - 1));
+"""
+
+
+class TimingProfile:
+    """
+    Learns how long pages of each host take to become ready and shortens wait timeouts accordingly.
+
+    The timeout for a host is `margin` times the `quantile` of the last `window` waits that ended with a ready page.
+    Waits that reached the timeout are counted separately: after one the next timeout grows by `margin`,
+    because the page may have become slower. After `min_samples` timeouts in a row the page is assumed
+    to never become idle (e.g. because of polling or analytics beacons), and the timeout drops to the learned one
+    or to `min_timeout`, as waiting longer does not help. Profiles are stored as JSON when `path` is set.
+    """
+
+    def __init__(self,
+                 path: str | Path = None,
+                 margin: float = 2.0,
+                 min_timeout: float = 1.0,
+                 window: int = 20,
+                 min_samples: int = 3,
+                 quantile: float = 0.9):
+        self.path = str(path) if path is not None else None
+        self.margin = margin
+        self.min_timeout = min_timeout
+        self.window = window
+        self.min_samples = min_samples
+        self.quantile = quantile
+        # Durations of ready waits and the number of consecutive timed out waits by host and action
+        self._samples: dict[str, list[float]] = {}
+        self._timeouts: dict[str, int] = {}
+        self._lock = threading.Lock()
+        if self.path is not None and os.path.exists(self.path):
+            try:
+                with open(self.path, 'r') as f:
+                    data = json.load(f)
+                self._samples = data.get('samples', {})
+                self._timeouts = data.get('timeouts', {})
+            except (OSError, ValueError, AttributeError) as e:
+                logger.warning(f'Failed to load timing profile {self.path}: {e!r}')
+
+    @staticmethod
+    def _key(host: str, kind: str) -> str:
+        return f'{kind}:{host}'
+
+    def record(self, host: str, kind: str, seconds: float, timed_out: bool = False) -> None:
+        key = self._key(host, kind)
+        with self._lock:
+            if timed_out:
+                self._timeouts[key] = self._timeouts.get(key, 0) + 1
+                return
+            self._timeouts.pop(key, None)
+            samples = self._samples.setdefault(key, [])
+            samples.append(round(seconds, 3))
+            del samples[:-self.window]
+
+    def _get_learned_timeout(self, key: str) -> float | None:
+        samples = sorted(self._samples.get(key, []))
+        if len(samples) < self.min_samples:
+            return None
+        # Nearest-rank quantile, so that a single slow page does not set the timeout
+        value = samples[max(0, math.ceil(self.quantile * len(samples)) - 1)]
+        return max(self.min_timeout, self.margin * value)
+
+    def get_timeout(self, host: str, kind: str, default: float) -> float:
+        key = self._key(host, kind)
+        with self._lock:
+            learned = self._get_learned_timeout(key)
+            timeouts = self._timeouts.get(key, 0)
+        if timeouts >= self.min_samples:
+            return min(default, learned or self.min_timeout)
+        timeout = learned if learned is not None else default
+        return min(default, timeout * self.margin ** timeouts)
+
+    def save(self) -> None:
+        if self.path is None:
+            return
+        with self._lock:
+            with open(self.path, 'w') as f:
+                json.dump({'samples': self._samples, 'timeouts': self._timeouts}, f)
+
+
+class ReadinessWaiter:
+    """
+    Waits until a page is ready instead of sleeping for a fixed time.
+
+    A page is ready when `document.readyState` is complete, no new resources were loaded
+    for `idle_time` seconds and, if requested, the nodes matching an xpath have changed
+    (e.g. other or new catalog cards after clicking a pagination button).
+    Waiting for the network never exceeds `timeout`, which is shortened by the `profile` for pages that never
+    become idle. Waiting for changed nodes never exceeds `content_timeout` (`timeout` by default), which is not
+    learned: nodes replaced by slow requests are the next page and must not be skipped.
+    """
+
+    def __init__(self,
+                 timeout: float = 10.0,
+                 idle_time: float = 0.5,
+                 poll_interval: float = 0.1,
+                 profile: TimingProfile = None,
+                 content_timeout: float = None):
+        self.timeout = timeout
+        self.content_timeout = content_timeout if content_timeout is not None else timeout
+        self.idle_time = idle_time
+        self.poll_interval = poll_interval
+        self.profile = profile
+
+    @staticmethod
+    def _execute(driver: WebDriver, script: str, *args):
+        try:
+            return driver.execute_script(script, *args)
+        except WebDriverException as e:
+            # Scripts fail while the page is being replaced
+            logger.debug(f'Readiness script failed: {e!r}')
+            return None
+
+    def get_content_signature(self, driver: WebDriver, xpath: str) -> str | None:
+        """Changes when nodes matching the xpath are replaced or appended"""
+        return self._execute(driver, CONTENT_SIGNATURE_SCRIPT, xpath)
+
+    def wait(self,
+             driver: WebDriver,
+             host: str,
+             kind: str = 'get',
+             content_xpath: str = None,
+             previous_signature: str = None) -> bool:
+        """
+        Waits for the page to become ready. `kind` separates timing profiles of different actions.
+        Returns False if the timeout was reached.
+        """
+        with span('webdriver.wait', host=host, kind=kind) as current_span:
+            is_ready = self._wait(driver, host, kind, content_xpath, previous_signature)
+            current_span.set(ready=is_ready)
+            return is_ready
+
+    def _wait(self,
+              driver: WebDriver,
+              host: str,
+              kind: str,
+              content_xpath: str | None,
+              previous_signature: str | None) -> bool:
+        idle_timeout = self.timeout
+        if self.profile is not None:
+            idle_timeout = self.profile.get_timeout(host, kind, self.timeout)
+        wait_for_content = content_xpath is not None and previous_signature is not None
+        started_at = time.monotonic()
+        last_resources_count = None
+        last_change_at = started_at
+        # Time it took the network to become idle, None until it happens
+        idle_after = None
+        is_idle = is_changed = False
+        while True:
+            now = time.monotonic()
+            resources_count = self._execute(driver, RESOURCES_COUNT_SCRIPT)
+            if resources_count != last_resources_count:
+                last_resources_count = resources_count
+                last_change_at = now
+            is_idle = self._execute(driver, READY_STATE_SCRIPT) == 'complete' and \
+                now - last_change_at >= self.idle_time
+            if is_idle and idle_after is None:
+                idle_after = now - started_at
+            is_changed = not wait_for_content or \
+                self.get_content_signature(driver, content_xpath) not in (None, previous_signature)
+            # After the idle timeout the network is not waited for, but changed nodes still are
+            if is_changed and (is_idle or now - started_at >= idle_timeout):
+                break
+            if now - started_at >= (self.content_timeout if wait_for_content else idle_timeout):
+                break
+            time.sleep(self.poll_interval)
+
+        elapsed = time.monotonic() - started_at
+        is_ready = is_idle and is_changed
+        if not is_ready:
+            logger.debug(f'Page of {host} is not ready after {elapsed:.2f}s')
+        if self.profile is not None:
+            # Only the network wait is learned
+            if idle_after is not None:
+                self.profile.record(host, kind, idle_after)
+            else:
+                self.profile.record(host, kind, elapsed, timed_out=True)
+        return is_ready
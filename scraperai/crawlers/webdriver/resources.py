@@ -0,0 +1,67 @@
+import logging
+from dataclasses import dataclass, field
+
+from selenium.common import WebDriverException
+from selenium.webdriver.remote.webdriver import WebDriver
+
+logger = logging.getLogger('scraperai')
+
+IMAGE_EXTENSIONS = ['png', 'jpg', 'jpeg', 'gif', 'webp', 'avif', 'svg', 'ico', 'bmp']
+FONT_EXTENSIONS = ['woff', 'woff2', 'ttf', 'otf', 'eot']
+MEDIA_EXTENSIONS = ['mp4', 'webm', 'ogg', 'mp3', 'wav', 'm3u8', 'ts']
+STYLESHEET_EXTENSIONS = ['css']
+TRACKER_DOMAINS = [
+    'google-analytics.com',
+    'googletagmanager.com',
+    'doubleclick.net',
+    'googlesyndication.com',
+    'connect.facebook.net',
+    'mc.yandex.ru',
+    'hotjar.com',
+    'segment.io',
+    'mixpanel.com',
+    'amplitude.com',
+    'clarity.ms',
+]
+
+
+@dataclass
+class ResourcePolicy:
+    """
+    Resources that browser crawlers should not load while scraping, since only page source is used.
+
+    Resources are blocked by url patterns with CDP `Network.setBlockedURLs`, so it works only with Chromium browsers.
+    """
+    block_images: bool = True
+    block_fonts: bool = True
+    block_media: bool = True
+    block_stylesheets: bool = False
+    blocked_domains: list[str] = field(default_factory=lambda: list(TRACKER_DOMAINS))
+    blocked_patterns: list[str] = field(default_factory=list)
+
+    def get_blocked_urls(self) -> list[str]:
+        extensions = []
+        if self.block_images:
+            extensions += IMAGE_EXTENSIONS
+        if self.block_fonts:
+            extensions += FONT_EXTENSIONS
+        if self.block_media:
+            extensions += MEDIA_EXTENSIONS
+        if self.block_stylesheets:
+            extensions += STYLESHEET_EXTENSIONS
+        patterns = []
+        for extension in extensions:
+            patterns += [f'*.{extension}', f'*.{extension}?*']
+        patterns += [f'*{domain}*' for domain in self.blocked_domains]
+        return patterns + self.blocked_patterns
+
+
+def set_blocked_urls(driver: WebDriver, urls: list[str]) -> bool:
+    """Blocks loading of urls matching the patterns. Returns False if the browser does not support it"""
+    try:
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': urls})
+        return True
+    except (WebDriverException, AttributeError) as e:
+        logger.warning(f'Failed to set blocked urls, resources will not be blocked: {e!r}')
+        return False
@@ -0,0 +1,164 @@
+import hashlib
+import json
+import math
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from pathlib import Path
+
+from scraperai.utils.urls import normalize_url
+
+
+class DedupStore(ABC):
+    """Set of already seen keys"""
+
+    @abstractmethod
+    def add(self, key: str) -> bool:
+        """Adds the key. Returns False if the key was already added"""
+        ...
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class MemoryDedupStore(DedupStore):
+    """Keeps keys in a Python set. Suitable for jobs up to several hundred thousands rows"""
+
+    def __init__(self):
+        self._keys: set[str] = set()
+        self._lock = threading.Lock()
+
+    def add(self, key: str) -> bool:
+        with self._lock:
+            if key in self._keys:
+                return False
+            self._keys.add(key)
+            return True
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+
+class SqliteDedupStore(DedupStore):
+    """
+    Keeps hashes of keys in SQLite, so memory usage does not grow with the number of rows.
+    Keys survive restarts, so the store also deduplicates rows between resumed or repeated runs.
+    """
+
+    def __init__(self, path: str | Path, commit_every: int = 1000):
+        self.path = str(path)
+        self.commit_every = commit_every
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute('CREATE TABLE IF NOT EXISTS seen_keys (key BLOB PRIMARY KEY) WITHOUT ROWID')
+        self._connection.commit()
+
+    def add(self, key: str) -> bool:
+        digest = hashlib.sha1(key.encode()).digest()
+        with self._lock:
+            cursor = self._connection.execute('INSERT OR IGNORE INTO seen_keys (key) VALUES (?)', (digest,))
+            self._pending += 1
+            if self._pending >= self.commit_every:
+                self._connection.commit()
+                self._pending = 0
+            return cursor.rowcount == 1
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection.execute('SELECT COUNT(*) FROM seen_keys').fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.commit()
+            self._connection.close()
+
+
+class BloomDedupStore(DedupStore):
+    """
+    Bloom filter with a fixed memory size, e.g. about 18 MB for 10 million keys with 0.1% error rate.
+    A new key is reported as seen with probability `error_rate`, so a small share of unique rows is skipped.
+    """
+
+    def __init__(self, capacity: int = 10_000_000, error_rate: float = 0.001):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.hashes_count = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+        self._lock = threading.Lock()
+
+    def _indices(self, key: str) -> list[int]:
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes_count)]
+
+    def add(self, key: str) -> bool:
+        is_new = False
+        with self._lock:
+            for index in self._indices(key):
+                byte_index, mask = index >> 3, 1 << (index & 7)
+                if not self._bits[byte_index] & mask:
+                    self._bits[byte_index] |= mask
+                    is_new = True
+        return is_new
+
+
+def row_fingerprint(row: dict) -> str:
+    content = json.dumps(row, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(content.encode()).hexdigest()
+
+
+class Deduplicator:
+    """
+    Skips urls that were already seen (after normalization, see `normalize_url`) and rows with the same content.
+    Counts skipped duplicates.
+    """
+
+    def __init__(self, store: DedupStore = None, urls: bool = True, rows: bool = True):
+        """
+        :param store: seen keys store. Defaults to `MemoryDedupStore`
+        :param urls: deduplicate urls of nested pages
+        :param rows: deduplicate scraped rows by content hash
+        """
+        self.store = store or MemoryDedupStore()
+        self.urls = urls
+        self.rows = rows
+        self.skipped_urls = 0
+        self.skipped_rows = 0
+
+    @property
+    def skipped(self) -> int:
+        return self.skipped_urls + self.skipped_rows
+
+    def add_url(self, url: str) -> bool:
+        """Records the url. Returns False if the url is a duplicate"""
+        if not self.urls:
+            return True
+        if self.store.add('url:' + normalize_url(url)):
+            return True
+        self.skipped_urls += 1
+        return False
+
+    def add_row(self, row: dict) -> bool:
+        """Records the row. Returns False if the row is a duplicate"""
+        if not self.rows:
+            return True
+        if self.store.add('row:' + row_fingerprint(row)):
+            return True
+        self.skipped_rows += 1
+        return False
+
+    def close(self) -> None:
+        self.store.close()
+
+    def __str__(self) -> str:
+        return f'Deduplicator(skipped_urls={self.skipped_urls}, skipped_rows={self.skipped_rows})'
@@ -0,0 +1,239 @@
+import contextvars
+import itertools
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Generator
+
+logger = logging.getLogger('scraperai')
+
+# Attributes summed up by `StatsHook`
+COUNTED_ATTRIBUTES = ('prompt_tokens', 'completion_tokens', 'cost', 'retries')
+
+
+@dataclass
+class Span:
+    """
+    Timing of one stage: a crawler request, parsing, extraction, an LLM call, etc.
+    Attributes describe the stage, e.g. `host` for crawler stages and `prompt_tokens` for LLM calls.
+    """
+    name: str
+    attributes: dict[str, Any] = field(default_factory=dict)
+    parent: 'Span | None' = field(default=None, repr=False)
+    span_id: int = 0
+    start_time: float = 0.0
+    duration: float | None = None
+    error: str | None = None
+
+    def set(self, **attributes) -> None:
+        self.attributes.update(attributes)
+
+
+class _NoopSpan(Span):
+    def set(self, **attributes) -> None:
+        pass
+
+
+_NOOP_SPAN = _NoopSpan('noop')
+
+
+class InstrumentationHook:
+    """Receives spans of all stages. Override the methods of interest"""
+
+    def on_span_start(self, span: Span) -> None:
+        pass
+
+    def on_span_end(self, span: Span) -> None:
+        pass
+
+
+_hooks: tuple[InstrumentationHook, ...] = ()
+_hooks_lock = threading.Lock()
+_current_span: contextvars.ContextVar[Span | None] = contextvars.ContextVar('scraperai_span', default=None)
+_span_ids = itertools.count(1)
+
+
+def add_hook(hook: InstrumentationHook) -> None:
+    global _hooks
+    with _hooks_lock:
+        _hooks = _hooks + (hook,)
+
+
+def remove_hook(hook: InstrumentationHook) -> None:
+    global _hooks
+    with _hooks_lock:
+        _hooks = tuple(h for h in _hooks if h is not hook)
+
+
+def _notify(method: str, span: Span) -> None:
+    for hook in _hooks:
+        try:
+            getattr(hook, method)(span)
+        except Exception as e:
+            # Instrumentation should never break scraping
+            logger.warning(f'Instrumentation hook {type(hook).__name__} failed: {e!r}')
+
+
+@contextmanager
+def span(name: str, **attributes) -> Generator[Span, None, None]:
+    """
+    Measures the stage enclosed in the block and passes it to the hooks.
+    Does nothing when no hooks are added, so instrumented code does not slow down.
+    """
+    if not _hooks:
+        yield _NOOP_SPAN
+        return
+    current = Span(name, attributes, parent=_current_span.get(), span_id=next(_span_ids), start_time=time.time())
+    token = _current_span.set(current)
+    _notify('on_span_start', current)
+    started_at = time.perf_counter()
+    try:
+        yield current
+    except BaseException as e:
+        current.error = repr(e)
+        raise
+    finally:
+        current.duration = time.perf_counter() - started_at
+        _current_span.reset(token)
+        _notify('on_span_end', current)
+
+
+class LoggingHook(InstrumentationHook):
+    def __init__(self, level: int = logging.DEBUG):
+        self.level = level
+
+    def on_span_end(self, span: Span) -> None:
+        status = f' failed with {span.error}' if span.error else ''
+        logger.log(self.level, f'{span.name} took {span.duration:.3f}s{status} {span.attributes}')
+
+
+@dataclass
+class SpanStats:
+    count: int = 0
+    errors: int = 0
+    total_time: float = 0.0
+    max_time: float = 0.0
+    counters: dict[str, float] = field(default_factory=dict)
+
+    @property
+    def mean_time(self) -> float:
+        return self.total_time / self.count if self.count else 0.0
+
+
+class StatsHook(InstrumentationHook):
+    """
+    Aggregates spans by name and, optionally, by an attribute (e.g. `group_by='host'` to see where time goes per site).
+    Tokens, cost and retries of LLM calls are summed up.
+    """
+
+    def __init__(self, group_by: str = None):
+        self.group_by = group_by
+        self.stats: dict[tuple[str, Any], SpanStats] = {}
+        self._lock = threading.Lock()
+
+    def on_span_end(self, span: Span) -> None:
+        key = (span.name, span.attributes.get(self.group_by) if self.group_by else None)
+        with self._lock:
+            stats = self.stats.setdefault(key, SpanStats())
+            stats.count += 1
+            stats.errors += span.error is not None
+            stats.total_time += span.duration
+            stats.max_time = max(stats.max_time, span.duration)
+            for name in COUNTED_ATTRIBUTES:
+                value = span.attributes.get(name)
+                if isinstance(value, (int, float)):
+                    stats.counters[name] = stats.counters.get(name, 0) + value
+
+    def summary(self) -> str:
+        from tabulate import tabulate
+
+        rows = []
+        with self._lock:
+            for (name, group), stats in sorted(self.stats.items(), key=lambda item: -item[1].total_time):
+                counters = ', '.join(f'{k}={v:g}' for k, v in stats.counters.items())
+                rows.append([name, group, stats.count, stats.errors, f'{stats.total_time:.3f}',
+                             f'{stats.mean_time:.3f}', f'{stats.max_time:.3f}', counters])
+        headers = ['stage', self.group_by or '', 'count', 'errors', 'total, s', 'mean, s', 'max, s', '']
+        return tabulate(rows, headers=headers)
+
+
+def _to_otel_value(value: Any) -> Any:
+    if isinstance(value, (str, bool, int, float)):
+        return value
+    return str(value)
+
+
+class OpenTelemetryHook(InstrumentationHook):
+    """Exports spans to OpenTelemetry. Requires `opentelemetry-api` and a configured tracer provider"""
+
+    def __init__(self, tracer=None):
+        try:
+            from opentelemetry import trace
+        except ImportError:
+            raise ImportError('opentelemetry-api is required to export spans. '
+                              'Install it with `pip install opentelemetry-api`')
+        self._trace = trace
+        self.tracer = tracer or trace.get_tracer('scraperai')
+        self._spans: dict[int, Any] = {}
+        self._lock = threading.Lock()
+
+    def on_span_start(self, span: Span) -> None:
+        context = None
+        if span.parent is not None:
+            with self._lock:
+                parent = self._spans.get(span.parent.span_id)
+            if parent is not None:
+                context = self._trace.set_span_in_context(parent)
+        otel_span = self.tracer.start_span(span.name, context=context, start_time=int(span.start_time * 1e9))
+        with self._lock:
+            self._spans[span.span_id] = otel_span
+
+    def on_span_end(self, span: Span) -> None:
+        with self._lock:
+            otel_span = self._spans.pop(span.span_id, None)
+        if otel_span is None:
+            return
+        for name, value in span.attributes.items():
+            otel_span.set_attribute(f'scraperai.{name}', _to_otel_value(value))
+        if span.error is not None:
+            otel_span.set_status(self._trace.Status(self._trace.StatusCode.ERROR, span.error))
+        otel_span.end(end_time=int((span.start_time + span.duration) * 1e9))
+
+
+class PrometheusHook(InstrumentationHook):
+    """
+    Exports spans durations, LLM tokens and cost as Prometheus metrics. Requires `prometheus-client`.
+    `label_attributes` are added as labels of the durations histogram, e.g. `('host',)`.
+    """
+
+    def __init__(self, registry=None, namespace: str = 'scraperai', label_attributes: tuple[str, ...] = ()):
+        try:
+            import prometheus_client
+        except ImportError:
+            raise ImportError('prometheus-client is required to export metrics. '
+                              'Install it with `pip install prometheus-client`')
+        registry = registry or prometheus_client.REGISTRY
+        self.label_attributes = label_attributes
+        self.durations = prometheus_client.Histogram(
+            'stage_duration_seconds', 'Duration of scraping stages', ['stage', 'status', *label_attributes],
+            namespace=namespace, registry=registry
+        )
+        self.tokens = prometheus_client.Counter(
+            'llm_tokens', 'Tokens used by LLM calls', ['model', 'type'], namespace=namespace, registry=registry
+        )
+        self.cost = prometheus_client.Counter(
+            'llm_cost_usd', 'Cost of LLM calls', ['model'], namespace=namespace, registry=registry
+        )
+
+    def on_span_end(self, span: Span) -> None:
+        labels = [str(span.attributes.get(name, '')) for name in self.label_attributes]
+        self.durations.labels(span.name, 'error' if span.error else 'ok', *labels).observe(span.duration)
+        model = str(span.attributes.get('model', ''))
+        for token_type in ('prompt', 'completion'):
+            tokens = span.attributes.get(f'{token_type}_tokens')
+            if tokens:
+                self.tokens.labels(model, token_type).inc(tokens)
+        if span.attributes.get('cost'):
+            self.cost.labels(model).inc(span.attributes['cost'])
@@ -0,0 +1,179 @@
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Iterable
+
+from pydantic import BaseModel
+
+from scraperai.models import ScraperConfig
+
+logger = logging.getLogger('scraperai')
+
+
+class RunState(BaseModel):
+    """
+    Progress of a scraping run.
+
+    `page_number` is the catalog page to continue from: the current page when scraping catalog items
+    and the next page to collect urls from when collecting nested pages urls.
+    `page_offset` is the number of items already emitted from the current catalog page.
+    """
+    run_id: str
+    page_number: int = 0
+    page_offset: int = 0
+    rows_emitted: int = 0
+    urls_collected: bool = False
+    finished: bool = False
+
+
+class RunJournal:
+    """
+    Persists progress of scraping runs in SQLite, so that a crashed run can be resumed with `Scraper.resume`.
+
+    The journal stores catalog pagination position, collected nested pages urls and completed urls.
+    A row is recorded as emitted when the next row is requested from the generator,
+    so rows that were not processed by the consumer before a crash are emitted again.
+    Completed urls are committed every `commit_every` urls, so up to `commit_every` nested pages
+    completed before a crash are scraped again after resuming.
+    """
+
+    def __init__(self, path: str | Path, commit_every: int = 100):
+        self.path = str(path)
+        self.commit_every = commit_every
+        # Completed urls that are not committed yet
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.executescript("""
+            CREATE TABLE IF NOT EXISTS runs (
+                run_id TEXT PRIMARY KEY,
+                config TEXT NOT NULL,
+                page_number INTEGER NOT NULL DEFAULT 0,
+                page_offset INTEGER NOT NULL DEFAULT 0,
+                rows_emitted INTEGER NOT NULL DEFAULT 0,
+                urls_collected INTEGER NOT NULL DEFAULT 0,
+                finished INTEGER NOT NULL DEFAULT 0,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS nested_urls (
+                run_id TEXT NOT NULL,
+                position INTEGER NOT NULL,
+                url TEXT NOT NULL,
+                PRIMARY KEY (run_id, position)
+            );
+            CREATE TABLE IF NOT EXISTS completed_urls (
+                run_id TEXT NOT NULL,
+                url TEXT NOT NULL,
+                PRIMARY KEY (run_id, url)
+            );
+        """)
+        self._commit()
+
+    def start_run(self, config: ScraperConfig, run_id: str = None) -> str:
+        run_id = run_id or uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            self._connection.execute('INSERT INTO runs (run_id, config, created_at, updated_at) VALUES (?, ?, ?, ?)',
+                                     (run_id, config.model_dump_json(), now, now))
+            self._commit()
+        return run_id
+
+    def get_config(self, run_id: str) -> ScraperConfig:
+        row = self._fetchone('SELECT config FROM runs WHERE run_id = ?', run_id)
+        return ScraperConfig.model_validate_json(row[0])
+
+    def get_state(self, run_id: str) -> RunState:
+        row = self._fetchone('SELECT page_number, page_offset, rows_emitted, urls_collected, finished '
+                             'FROM runs WHERE run_id = ?', run_id)
+        return RunState(run_id=run_id,
+                        page_number=row[0],
+                        page_offset=row[1],
+                        rows_emitted=row[2],
+                        urls_collected=bool(row[3]),
+                        finished=bool(row[4]))
+
+    def list_runs(self, unfinished_only: bool = False) -> list[str]:
+        query = 'SELECT run_id FROM runs'
+        if unfinished_only:
+            query += ' WHERE finished = 0'
+        with self._lock:
+            rows = self._connection.execute(query + ' ORDER BY created_at').fetchall()
+        return [row[0] for row in rows]
+
+    def set_position(self, run_id: str, page_number: int, page_offset: int, rows_emitted: int) -> None:
+        self._update(run_id, page_number=page_number, page_offset=page_offset, rows_emitted=rows_emitted)
+
+    def add_nested_urls(self, run_id: str, urls: Iterable[str], next_page_number: int) -> None:
+        """Records urls collected from one catalog page and the page to continue from"""
+        with self._lock:
+            position = self._connection.execute('SELECT COUNT(*) FROM nested_urls WHERE run_id = ?',
+                                                (run_id,)).fetchone()[0]
+            self._connection.executemany('INSERT INTO nested_urls VALUES (?, ?, ?)',
+                                         [(run_id, position + i, url) for i, url in enumerate(urls)])
+            self._connection.execute('UPDATE runs SET page_number = ?, updated_at = ? WHERE run_id = ?',
+                                     (next_page_number, time.time(), run_id))
+            self._commit()
+
+    def get_nested_urls(self, run_id: str) -> list[str]:
+        with self._lock:
+            rows = self._connection.execute('SELECT url FROM nested_urls WHERE run_id = ? ORDER BY position',
+                                            (run_id,)).fetchall()
+        return [row[0] for row in rows]
+
+    def set_urls_collected(self, run_id: str) -> None:
+        self._update(run_id, urls_collected=1)
+
+    def add_completed_url(self, run_id: str, url: str, emitted: bool = True) -> None:
+        """Records a scraped nested page. `emitted` is False if its row was not emitted, e.g. as a duplicate"""
+        with self._lock:
+            self._connection.execute('INSERT OR IGNORE INTO completed_urls VALUES (?, ?)', (run_id, url))
+            self._connection.execute('UPDATE runs SET rows_emitted = rows_emitted + ?, updated_at = ? '
+                                     'WHERE run_id = ?', (int(emitted), time.time(), run_id))
+            self._pending += 1
+            if self._pending >= self.commit_every:
+                self._commit()
+
+    def get_completed_urls(self, run_id: str) -> set[str]:
+        with self._lock:
+            rows = self._connection.execute('SELECT url FROM completed_urls WHERE run_id = ?', (run_id,)).fetchall()
+        return {row[0] for row in rows}
+
+    def finish_run(self, run_id: str) -> None:
+        self._update(run_id, finished=1)
+
+    def delete_run(self, run_id: str) -> None:
+        with self._lock:
+            for table in ('runs', 'nested_urls', 'completed_urls'):
+                self._connection.execute(f'DELETE FROM {table} WHERE run_id = ?', (run_id,))
+            self._commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._commit()
+            self._connection.close()
+
+    def _commit(self) -> None:
+        self._connection.commit()
+        self._pending = 0
+
+    def _fetchone(self, query: str, run_id: str) -> tuple:
+        with self._lock:
+            row = self._connection.execute(query, (run_id,)).fetchone()
+        if row is None:
+            raise KeyError(f'Run {run_id} is not found in the journal')
+        return row
+
+    def _update(self, run_id: str, **values) -> None:
+        assignments = ', '.join(f'{name} = ?' for name in values)
+        with self._lock:
+            self._connection.execute(f'UPDATE runs SET {assignments}, updated_at = ? WHERE run_id = ?',
+                                     (*values.values(), time.time(), run_id))
+            self._commit()
+
+    def __str__(self) -> str:
+        return f'RunJournal(path={self.path})'
@@ -1,2 +1,4 @@
 from .base import BaseJsonLM, BaseVision
 from .openai import JsonOpenAI, VisionOpenAI
+from .cache import LLMCache
+from .ratelimit import RateLimiter
@@ -14,14 +14,29 @@ class BasePythonCodeLM(ABC):
     def invoke(self, messages: list[BaseMessage]) -> str:
         ...
 
+    @property
+    def identifying_params(self) -> _Dict:
+        """Parameters that affect model responses. They are used as a part of the cache key"""
+        return {'class': type(self).__name__}
+
 
 class BaseJsonLM(ABC):
     @abstractmethod
     def invoke(self, messages: list[BaseMessage]) -> _Dict:
         ...
 
+    @property
+    def identifying_params(self) -> _Dict:
+        """Parameters that affect model responses. They are used as a part of the cache key"""
+        return {'class': type(self).__name__}
+
 
 class BaseVision(ABC):
     @abstractmethod
     def invoke(self, messages: list[BaseMessage]) -> str:
         ...
+
+    @property
+    def identifying_params(self) -> _Dict:
+        """Parameters that affect model responses. They are used as a part of the cache key"""
+        return {'class': type(self).__name__}
@@ -0,0 +1,157 @@
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+from langchain_core.messages import BaseMessage
+
+from scraperai.llm.base import BaseJsonLM, BaseVision, BasePythonCodeLM, _Dict
+
+logger = logging.getLogger('scraperai')
+
+
+class LLMCache:
+    """
+    Persistent cache of LLM responses stored in SQLite.
+
+    Responses are keyed by a hash of model parameters and messages, so a cached response is reused
+    only for exactly the same request. Entries older than `ttl` seconds are ignored and
+    the least recently used entries are evicted when the total size exceeds `max_size` bytes.
+    """
+
+    def __init__(self,
+                 path: str | Path,
+                 ttl: float | None = 7 * 24 * 3600,
+                 max_size: int | None = 256 * 1024 * 1024):
+        self.path = str(path)
+        self.ttl = ttl
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        """)
+        self._connection.execute('CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses(accessed_at)')
+        self._connection.commit()
+        self._total_size = self._connection.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+
+    @staticmethod
+    def make_key(model_params: _Dict, messages: list[BaseMessage]) -> str:
+        payload = {
+            'model': model_params,
+            'messages': [(message.type, message.content) for message in messages]
+        }
+        dumped = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(dumped.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Any | None:
+        now = time.time()
+        with self._lock:
+            row = self._connection.execute('SELECT value, created_at FROM responses WHERE key = ?',
+                                           (key,)).fetchone()
+            if row is not None and self.ttl is not None and now - row[1] > self.ttl:
+                self._delete(key)
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self._connection.execute('UPDATE responses SET accessed_at = ? WHERE key = ?', (now, key))
+            self._connection.commit()
+            self.hits += 1
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Any) -> None:
+        dumped = json.dumps(value, ensure_ascii=False)
+        size = len(dumped.encode('utf-8'))
+        now = time.time()
+        with self._lock:
+            self._delete(key)
+            self._connection.execute('INSERT INTO responses VALUES (?, ?, ?, ?, ?)', (key, dumped, size, now, now))
+            self._total_size += size
+            if self.max_size is not None and self._total_size > self.max_size:
+                self._evict()
+            self._connection.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._connection.execute('DELETE FROM responses')
+            self._connection.commit()
+            self._total_size = 0
+
+    def close(self) -> None:
+        self._connection.close()
+
+    @property
+    def size(self) -> int:
+        return self._total_size
+
+    def _delete(self, key: str) -> None:
+        row = self._connection.execute('SELECT size FROM responses WHERE key = ?', (key,)).fetchone()
+        if row is not None:
+            self._connection.execute('DELETE FROM responses WHERE key = ?', (key,))
+            self._total_size -= row[0]
+
+    def _evict(self) -> None:
+        # Evict down to 90% of max_size, so that eviction does not run on every insertion
+        target_size = int(self.max_size * 0.9)
+        cursor = self._connection.execute('SELECT key, size FROM responses ORDER BY accessed_at')
+        keys_to_delete = []
+        for key, size in cursor:
+            if self._total_size <= target_size:
+                break
+            keys_to_delete.append((key,))
+            self._total_size -= size
+        self._connection.executemany('DELETE FROM responses WHERE key = ?', keys_to_delete)
+        logger.debug(f'Evicted {len(keys_to_delete)} responses from LLM cache')
+
+    def __str__(self) -> str:
+        return f'LLMCache(path={self.path}, hits={self.hits}, misses={self.misses}, size={self._total_size})'
+
+
+class _CachedModelMixin:
+    def __init__(self, model: BaseJsonLM | BaseVision | BasePythonCodeLM, cache: LLMCache):
+        self.model = model
+        self.cache = cache
+
+    @property
+    def total_cost(self) -> float:
+        return getattr(self.model, 'total_cost', 0.0)
+
+    @property
+    def identifying_params(self) -> _Dict:
+        return self.model.identifying_params
+
+    def invoke(self, messages: list[BaseMessage]) -> Any:
+        key = self.cache.make_key(self.model.identifying_params, messages)
+        response = self.cache.get(key)
+        if response is not None:
+            logger.debug(f'Got cached response for key={key}')
+            return response
+        response = self.model.invoke(messages)
+        self.cache.set(key, response)
+        return response
+
+
+class CachedJsonLM(_CachedModelMixin, BaseJsonLM):
+    pass
+
+
+class CachedVision(_CachedModelMixin, BaseVision):
+    pass
+
+
+class CachedPythonCodeLM(_CachedModelMixin, BasePythonCodeLM):
+    pass
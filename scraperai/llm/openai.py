@@ -1,5 +1,6 @@
 import json
 import logging
+import threading
 from typing import Optional
 
 from langchain_community.callbacks import get_openai_callback
@@ -7,12 +8,17 @@ from langchain_core.messages import BaseMessage
 from langchain_openai import ChatOpenAI
 from pydantic import BaseModel
 
+from scraperai.instrumentation import span
 from scraperai.llm.base import BaseJsonLM, _Dict, _DictOrPydanticClass, BaseVision, BasePythonCodeLM
 from scraperai.utils.code import extract_python_code
 
 logger = logging.getLogger('scraperai')
 
 
+def _set_usage(current_span, cb) -> None:
+    current_span.set(prompt_tokens=cb.prompt_tokens, completion_tokens=cb.completion_tokens, cost=cb.total_cost)
+
+
 class PythonCodeOpenAI(BasePythonCodeLM):
     latest = 'gpt-4o'
 
@@ -27,15 +33,23 @@ class PythonCodeOpenAI(BasePythonCodeLM):
                                max_retries=3,
                                **kwargs)
         self._total_cost = 0
+        # Requests may be sent from several threads, e.g. by `ParserAI(parallel=True)`
+        self._lock = threading.Lock()
 
     @property
     def total_cost(self) -> float:
         return self._total_cost
 
+    @property
+    def identifying_params(self) -> _Dict:
+        return {'class': type(self).__name__, **self.chat._identifying_params}
+
     def invoke(self, messages: list[BaseMessage]) -> str:
-        with get_openai_callback() as cb:
+        with span('llm.call', model=self.chat.model_name, kind='code') as current_span, get_openai_callback() as cb:
             text = self.chat.invoke(messages).content
-            self._total_cost += cb.total_cost
+            with self._lock:
+                self._total_cost += cb.total_cost
+            _set_usage(current_span, cb)
             logger.info(f"Total Tokens: {cb.total_tokens}, Total Cost (USD): ${cb.total_cost}")
         return extract_python_code(text)
 
@@ -56,23 +70,34 @@ class JsonOpenAI(BaseJsonLM):
                                openai_organization=openai_organization,
                                max_retries=3,
                                **kwargs)
+        self.schema = schema
         self.model_with_structure = None
         if schema:
             self.model_with_structure = self.chat.with_structured_output(schema, method='json_mode')
         self._total_cost = 0
+        self._lock = threading.Lock()
 
     @property
     def total_cost(self) -> float:
         return self._total_cost
 
+    @property
+    def identifying_params(self) -> _Dict:
+        schema = self.schema
+        if isinstance(schema, type) and issubclass(schema, BaseModel):
+            schema = schema.model_json_schema()
+        return {'class': type(self).__name__, 'schema': schema, **self.chat._identifying_params}
+
     def invoke(self, messages: list[BaseMessage]) -> _Dict:
-        with get_openai_callback() as cb:
+        with span('llm.call', model=self.chat.model_name, kind='json') as current_span, get_openai_callback() as cb:
             if self.model_with_structure:
                 response = self.model_with_structure.invoke(messages)
             else:
                 text = self.chat.invoke(messages).content
                 response = json.loads(text)
-            self._total_cost += cb.total_cost
+            with self._lock:
+                self._total_cost += cb.total_cost
+            _set_usage(current_span, cb)
             logger.info(f"Total Tokens: {cb.total_tokens}, Total Cost (USD): ${cb.total_cost:.3f}")
 
         if isinstance(response, BaseModel):
@@ -90,6 +115,7 @@ class VisionOpenAI(BaseVision):
                  model_name: str = latest,
                  **kwargs):
         self._total_cost = 0.0
+        self._lock = threading.Lock()
         self.chat = ChatOpenAI(model=model_name,
                                openai_api_key=openai_api_key,
                                openai_organization=openai_organization,
@@ -99,8 +125,15 @@ class VisionOpenAI(BaseVision):
     def total_cost(self) -> float:
         return self._total_cost
 
+    @property
+    def identifying_params(self) -> _Dict:
+        return {'class': type(self).__name__, **self.chat._identifying_params}
+
     def invoke(self, messages: list[BaseMessage]) -> str:
-        with get_openai_callback() as cb:
+        with span('llm.call', model=self.chat.model_name, kind='vision') as current_span, get_openai_callback() as cb:
             response = self.chat.invoke(messages).content
-            self._total_cost += cb.total_cost
+            with self._lock:
+                self._total_cost += cb.total_cost
+            _set_usage(current_span, cb)
+            logger.info(f"Total Tokens: {cb.total_tokens}, Total Cost (USD): ${cb.total_cost:.3f}")
         return response
@@ -0,0 +1,119 @@
+import logging
+import threading
+import time
+from typing import Any
+
+from langchain_core.messages import BaseMessage
+
+from scraperai.llm.base import BaseJsonLM, BaseVision, BasePythonCodeLM, _Dict
+
+logger = logging.getLogger('scraperai')
+
+# Rough estimate of tokens used by one image in vision requests
+IMAGE_TOKENS = 765
+
+
+def estimate_tokens(messages: list[BaseMessage]) -> int:
+    """Estimates the number of prompt tokens as 4 characters per token without loading tokenizers"""
+    chars = 0
+    images = 0
+    for message in messages:
+        if isinstance(message.content, str):
+            chars += len(message.content)
+            continue
+        for part in message.content:
+            if isinstance(part, str):
+                chars += len(part)
+            elif part.get('type') == 'image_url':
+                images += 1
+            else:
+                chars += len(part.get('text', ''))
+    return chars // 4 + images * IMAGE_TOKENS
+
+
+class RateLimiter:
+    """
+    Thread-safe token bucket limiting requests per minute and tokens per minute.
+
+    Both budgets are refilled continuously, so up to a minute's budget can be spent in a burst.
+    """
+
+    def __init__(self, requests_per_minute: float | None = None, tokens_per_minute: float | None = None):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._requests = requests_per_minute
+        self._tokens = tokens_per_minute
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        elapsed = now - self._updated_at
+        self._updated_at = now
+        if self.requests_per_minute is not None:
+            self._requests = min(self.requests_per_minute,
+                                 self._requests + elapsed * self.requests_per_minute / 60)
+        if self.tokens_per_minute is not None:
+            self._tokens = min(self.tokens_per_minute, self._tokens + elapsed * self.tokens_per_minute / 60)
+
+    def _get_delay(self, tokens: int) -> float:
+        delay = 0.0
+        if self.requests_per_minute is not None and self._requests < 1:
+            delay = max(delay, (1 - self._requests) * 60 / self.requests_per_minute)
+        if self.tokens_per_minute is not None and self._tokens < tokens:
+            delay = max(delay, (tokens - self._tokens) * 60 / self.tokens_per_minute)
+        return delay
+
+    def acquire(self, tokens: int = 0) -> float:
+        """Blocks until one request with `tokens` tokens fits into the budgets. Returns the time waited"""
+        if self.tokens_per_minute is not None:
+            # A request larger than the whole budget would never fit
+            tokens = min(tokens, self.tokens_per_minute)
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                delay = self._get_delay(tokens)
+                if delay <= 0:
+                    if self.requests_per_minute is not None:
+                        self._requests -= 1
+                    if self.tokens_per_minute is not None:
+                        self._tokens -= tokens
+                    return waited
+            logger.debug(f'Rate limit reached, waiting {delay:.2f}s')
+            time.sleep(delay)
+            waited += delay
+
+    def __str__(self) -> str:
+        return f'RateLimiter(requests_per_minute={self.requests_per_minute}, ' \
+               f'tokens_per_minute={self.tokens_per_minute})'
+
+
+class _RateLimitedModelMixin:
+    def __init__(self, model: BaseJsonLM | BaseVision | BasePythonCodeLM, limiter: RateLimiter):
+        self.model = model
+        self.limiter = limiter
+
+    @property
+    def total_cost(self) -> float:
+        return getattr(self.model, 'total_cost', 0.0)
+
+    @property
+    def identifying_params(self) -> _Dict:
+        return self.model.identifying_params
+
+    def invoke(self, messages: list[BaseMessage]) -> Any:
+        self.limiter.acquire(estimate_tokens(messages))
+        return self.model.invoke(messages)
+
+
+class RateLimitedJsonLM(_RateLimitedModelMixin, BaseJsonLM):
+    pass
+
+
+class RateLimitedVision(_RateLimitedModelMixin, BaseVision):
+    pass
+
+
+class RateLimitedPythonCodeLM(_RateLimitedModelMixin, BasePythonCodeLM):
+    pass
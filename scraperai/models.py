@@ -41,6 +41,8 @@ class CatalogItem(BaseModel):
     url_xpath: Optional[str]
     html_snippet: str = pydantic.Field(..., repr=False)
     urls_on_page: list[str]
+    # Confidence of the heuristic detection, None if detected by LLM or set manually
+    confidence: Optional[float] = None
 
 
 class Pagination(BaseModel):
@@ -80,3 +82,7 @@ class ScraperConfig(BaseModel):
     fields: WebpageFields
     max_pages: int
     max_rows: int
+    concurrency: int = 1
+    preserve_order: bool = False
+    # Processes extracting fields of nested pages while crawlers fetch the next ones. 0 extracts in crawler threads
+    parse_processes: int = 0
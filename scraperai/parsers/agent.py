@@ -2,8 +2,10 @@ import logging
 from typing import Callable, Any, Optional
 
 from langchain_core.messages import BaseMessage, HumanMessage, AIMessage
+from tiktoken import Encoding
 
 from scraperai.exceptions import NotFoundError
+from scraperai.instrumentation import span
 from scraperai.llm import BaseJsonLM, BaseVision
 from scraperai.llm.base import BasePythonCodeLM
 
@@ -13,27 +15,32 @@ logger = logging.getLogger('scraperai')
 class ChatModelAgent:
     def __init__(self, model: BaseJsonLM | BaseVision | BasePythonCodeLM):
         self.model = model
+        # Encoding used to fit prompts into the token budget, the default one if None
+        self.encoding: Encoding | None = None
 
     def query_with_validation(self,
                               messages: list[BaseMessage],
                               validator: Callable[[Any], Optional[str]],
                               max_retries: int = 3,
                               current_try: int = 0) -> Any:
-        response = self.model.invoke(messages)
-        logger.debug(f'Got response: {response}')
-        try:
-            new_error_message = validator(response)
-        except Exception:
-            new_error_message = None
-        if new_error_message is None:
-            return response
+        with span('llm.query', agent=type(self).__name__) as current_span:
+            while True:
+                response = self.model.invoke(messages)
+                logger.debug(f'Got response: {response}')
+                try:
+                    new_error_message = validator(response)
+                except Exception:
+                    new_error_message = None
+                if new_error_message is None:
+                    current_span.set(retries=current_try)
+                    return response
 
-        logger.warning(f'Validation failed with message: {new_error_message}')
-        if current_try < max_retries:
-            new_messages = messages + [
-                AIMessage(content=str(response)),
-                HumanMessage(content='Your previous response was wrong because ' + new_error_message)
-            ]
-            return self.query_with_validation(new_messages, validator, max_retries, current_try + 1)
-        else:
-            raise NotFoundError(new_error_message)
+                logger.warning(f'Validation failed with message: {new_error_message}')
+                if current_try >= max_retries:
+                    current_span.set(retries=current_try)
+                    raise NotFoundError(new_error_message)
+                messages = messages + [
+                    AIMessage(content=str(response)),
+                    HumanMessage(content='Your previous response was wrong because ' + new_error_message)
+                ]
+                current_try += 1
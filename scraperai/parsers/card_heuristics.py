@@ -0,0 +1,191 @@
+"""
+Detection of catalog cards without an LLM.
+
+Catalog cards are groups of sibling nodes with the same tag and class that contain links and have a similar structure.
+Groups are ranked by the number of nodes they cover, and the best one is returned with a confidence score.
+"""
+import logging
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+
+from lxml import html, etree
+
+from scraperai.models import CatalogItem
+from scraperai.utils.html import minify_html
+
+logger = logging.getLogger('scraperai')
+
+MIN_CARDS = 3
+# Cards inside these tags are menus and links lists, not catalogs
+EXCLUDED_ANCESTORS = {'nav', 'header', 'footer', 'aside'}
+
+
+@dataclass
+class CardCandidate:
+    card_xpath: str
+    cards: list = field(repr=False)
+    link_ratio: float
+    similarity: float
+    mean_size: float
+    text_ratio: float
+    # Absolute xpaths are fragile, since they depend on the layout of the whole page
+    is_absolute: bool = False
+
+    @property
+    def score(self) -> float:
+        """Number of nodes covered by the group, weighted by its quality"""
+        return len(self.cards) * self.mean_size * self.link_ratio * self.text_ratio * (0.5 + 0.5 * self.similarity)
+
+    @property
+    def url_xpath(self) -> str:
+        # The first link of every card, so that the numbers of cards and urls match
+        return f'{self.card_xpath}/descendant-or-self::a[@href][1]/@href'
+
+
+def _has_class(node, token: str) -> bool:
+    return token in node.get('class', '').split()
+
+
+def _group_siblings(parent) -> list[tuple[str, str | None, list]]:
+    """Groups children of the node by tag and the class shared by most of them"""
+    children_by_tag = defaultdict(list)
+    for child in parent:
+        if isinstance(child.tag, str):
+            children_by_tag[child.tag].append(child)
+    groups = []
+    for tag, children in children_by_tag.items():
+        if len(children) < MIN_CARDS:
+            continue
+        tokens = Counter(token for child in children for token in set(child.get('class', '').split()))
+        if tokens:
+            token, count = tokens.most_common(1)[0]
+            if count >= MIN_CARDS:
+                groups.append((tag, token, [child for child in children if _has_class(child, token)]))
+                continue
+        groups.append((tag, None, children))
+    return groups
+
+
+def _signatures(node) -> set[tuple[str, str]]:
+    return {(child.tag, child.get('class', '')) for child in node.iterdescendants() if isinstance(child.tag, str)}
+
+
+def _similarity(cards: list) -> float:
+    """Mean Jaccard similarity of the cards descendants to the template of descendants present in most cards"""
+    signatures = [_signatures(card) for card in cards]
+    counts = Counter(signature for card_signatures in signatures for signature in card_signatures)
+    template = {signature for signature, count in counts.items() if count * 2 >= len(cards)}
+    if not template:
+        return 1.0 if not any(signatures) else 0.0
+    return sum(len(s & template) / len(s | template) for s in signatures) / len(signatures)
+
+
+def _build_card_xpath(tree, tag: str, token: str | None, cards: list) -> tuple[str, bool] | None:
+    """Builds an xpath that selects exactly the cards. Returns the xpath and whether it is absolute"""
+    options = []
+    if token is not None:
+        classes = {card.get('class') for card in cards}
+        if len(classes) == 1:
+            options.append(f'//{tag}[@class="{classes.pop()}"]')
+        options.append(f'//{tag}[contains(concat(" ", normalize-space(@class), " "), " {token} ")]')
+    parent = cards[0].getparent()
+    if parent.get('class') and all(card.getparent().get('class') == parent.get('class') for card in cards):
+        condition = f'[contains(concat(" ", normalize-space(@class), " "), " {token} ")]' if token else ''
+        options.append(f'//{parent.tag}[@class="{parent.get("class")}"]/{tag}{condition}')
+
+    expected = set(cards)
+    for xpath in options:
+        if set(tree.xpath(xpath)) == expected:
+            return xpath, False
+    if all(card.getparent() is parent for card in cards) and token is None:
+        return f'{tree.getroottree().getpath(parent)}/{tag}', True
+    return None
+
+
+def find_card_candidates(tree) -> list[CardCandidate]:
+    """Returns groups of similar linked sibling nodes ordered by score, the best first"""
+    groups: dict[tuple[str, str | None, str | None], list] = defaultdict(list)
+    for parent in tree.iter():
+        if not isinstance(parent.tag, str) or len(parent) < MIN_CARDS:
+            continue
+        for tag, token, cards in _group_siblings(parent):
+            # Rows of a grid are merged into one group. Groups without class are kept per parent
+            key = (tag, token, None) if token is not None else (tag, None, parent)
+            groups[key].extend(cards)
+
+    candidates = []
+    for (tag, token, _), cards in groups.items():
+        if any(ancestor.tag in EXCLUDED_ANCESTORS for ancestor in cards[0].iterancestors()):
+            continue
+        link_ratio = sum(bool(card.xpath('descendant-or-self::a[@href]')) for card in cards) / len(cards)
+        if link_ratio < 0.5:
+            continue
+        built = _build_card_xpath(tree, tag, token, cards)
+        if built is None:
+            continue
+        card_xpath, is_absolute = built
+        sizes = [sum(1 for node in card.iter() if isinstance(node.tag, str)) for card in cards]
+        text_ratio = sum(bool(card.text_content().strip()) for card in cards) / len(cards)
+        candidates.append(CardCandidate(card_xpath=card_xpath, cards=cards, link_ratio=link_ratio,
+                                        similarity=_similarity(cards), mean_size=sum(sizes) / len(sizes),
+                                        text_ratio=text_ratio, is_absolute=is_absolute))
+
+    # A group whose members contain a larger repeated group (rows of a grid, sections of cards) is a container
+    containers = set()
+    for i, outer in enumerate(candidates):
+        outer_cards = set(outer.cards)
+        for inner in candidates:
+            if inner is outer or len(inner.cards) < 2 * len(outer.cards) or inner.link_ratio < 0.9 or \
+                    inner.mean_size < 3:
+                continue
+            inside = sum(any(ancestor in outer_cards for ancestor in card.iterancestors()) for card in inner.cards)
+            if inside >= 0.9 * len(inner.cards):
+                containers.add(i)
+                break
+    candidates = [candidate for i, candidate in enumerate(candidates) if i not in containers]
+    return sorted(candidates, key=lambda candidate: -candidate.score)
+
+
+def get_confidence(candidates: list[CardCandidate]) -> float:
+    """Confidence that the first candidate is the catalog: quality of the group and its margin over the second"""
+    if not candidates:
+        return 0.0
+    best = candidates[0]
+    size_factor = min(1.0, (best.mean_size - 1) / 4)
+    count_factor = min(1.0, len(best.cards) / 6)
+    # Groups inside the cards (links lists, images galleries) are parts of the cards, not competitors
+    best_cards = set(best.cards)
+    competitors = [candidate for candidate in candidates[1:]
+                   if not any(ancestor in best_cards for ancestor in candidate.cards[0].iterancestors())]
+    margin = 1 - competitors[0].score / best.score if competitors and best.score else 1.0
+    confidence = (best.link_ratio * best.text_ratio * best.similarity * size_factor * count_factor *
+                  min(1.0, 0.5 + margin))
+    if best.is_absolute:
+        confidence *= 0.8
+    return confidence
+
+
+def detect_catalog_item_heuristically(html_content: str = None, *, tree=None) -> CatalogItem | None:
+    """
+    Finds catalog cards by the repeated structure of the page. `confidence` of the returned item is from 0 to 1.
+    Returns None if nothing looks like a catalog. The page is minified unless it is passed as a parsed `tree`.
+    """
+    if html_content is not None:
+        compressed_html, _ = minify_html(html_content, good_attrs={'class', 'href', 'id'}, use_substituions=False)
+        tree = html.fromstring(compressed_html)
+    elif tree is None:
+        raise ValueError('One of `html_content` or `tree` should not be None')
+    candidates = find_card_candidates(tree)
+    if not candidates:
+        return None
+    confidence = get_confidence(candidates)
+    best = candidates[0]
+    logger.debug(f'Best catalog cards candidate: {best}, confidence: {confidence:.2f}')
+    catalog_item = CatalogItem(
+        card_xpath=best.card_xpath,
+        url_xpath=best.url_xpath,
+        html_snippet=etree.tostring(best.cards[0], pretty_print=True, method='html', encoding='unicode'),
+        urls_on_page=tree.xpath(best.url_xpath),
+        confidence=confidence
+    )
+    return catalog_item
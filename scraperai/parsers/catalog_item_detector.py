@@ -2,13 +2,14 @@ import logging
 from typing import Any, Optional
 
 from langchain_core.messages import SystemMessage, HumanMessage
-from langchain_text_splitters import TokenTextSplitter
 from lxml import html, etree
 from pydantic import BaseModel, ValidationError
 
 from scraperai.exceptions import NotFoundError
 from scraperai.llm.base import BaseJsonLM
 from scraperai.parsers.agent import ChatModelAgent
+from scraperai.parsers.card_heuristics import detect_catalog_item_heuristically
+from scraperai.parsers.compression import compress_html
 from scraperai.models import CatalogItem
 from scraperai.parsers.utils import build_validation_error_message
 from scraperai.utils.html import minify_html
@@ -22,14 +23,27 @@ class CatalogItemResponseModel(BaseModel):
 
 
 class CatalogItemDetector(ChatModelAgent):
-    def __init__(self, model: BaseJsonLM):
+    def __init__(self, model: BaseJsonLM, min_confidence: float = 0.7):
+        """
+        Cards are detected by the page structure first, the LLM is asked only if the confidence of
+        the structural detection is below `min_confidence`. Set it above 1 to always use the LLM.
+        """
         super().__init__(model)
         self.model = model
         self.max_chunk_size = 32000
+        self.min_confidence = min_confidence
 
     def detect_catalog_item(self, html_content: str, extra_prompt: str = None) -> CatalogItem:
+        """`extra_prompt` corrects a previous detection, so the LLM is always asked with it"""
         compressed_html, subs = minify_html(html_content, good_attrs={'class', 'href', 'id'})
         tree = html.fromstring(compressed_html)
+        if extra_prompt is None and self.min_confidence <= 1:
+            catalog_item = detect_catalog_item_heuristically(tree=tree)
+            if catalog_item is not None and catalog_item.confidence >= self.min_confidence:
+                return catalog_item
+            confidence = catalog_item.confidence if catalog_item is not None else 0
+            logger.info(f'Catalog cards were not detected by page structure (confidence {confidence:.2f}), '
+                        f'asking LLM')
 
         system_prompt = """
 You are an HTML parser. You will be given an HTML page with a catalog.
@@ -45,11 +59,13 @@ The output should be a JSON dictionary like this:
     "url": "xpath to select href urls",
 }
 ```"""
-        html_part = TokenTextSplitter(chunk_size=self.max_chunk_size).split_text(compressed_html)[0]
+        html_part = compress_html(compressed_html, self.max_chunk_size, encoding=self.encoding)
         messages = [
             SystemMessage(content=system_prompt),
-            HumanMessage(content=html_part),
+            HumanMessage(content=html_part.html_content),
         ]
+        if html_part.prompt_note:
+            messages.append(HumanMessage(content=html_part.prompt_note))
         if extra_prompt:
             messages.append(HumanMessage(content=extra_prompt))
 
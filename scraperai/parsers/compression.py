@@ -0,0 +1,164 @@
+import logging
+
+from lxml import html, etree
+from pydantic import BaseModel
+from tiktoken import Encoding
+
+from scraperai.instrumentation import span
+from scraperai.utils.html import get_encoding, _FULL_DOCUMENT_RE
+
+logger = logging.getLogger('scraperai')
+
+# Page boilerplate that rarely contains catalog cards or data fields.
+# Headers and footers of articles are kept, since they usually contain titles and dates
+BOILERPLATE_TAGS = {'header', 'nav', 'footer', 'aside', 'svg', 'iframe', 'noscript'}
+_LANDMARK_TAGS = {'header', 'footer'}
+MAX_CLASSES = 3
+MAX_TEXT_LENGTH = 100
+MAX_ATTRIBUTE_LENGTH = 100
+# Stages applied in this order before the HTML is truncated
+STAGES = ('drop', 'collapse', 'shorten')
+
+_NOTES = {
+    'collapse': 'Repeated similar elements are collapsed to a few examples followed by a comment '
+                'with the number of omitted elements.',
+    'shorten': f'Class lists are shortened to the first {MAX_CLASSES} classes, '
+               f'so use contains(@class, "...") to select elements by class.',
+    'truncate': 'The HTML is truncated.',
+}
+
+
+class CompressedHtml(BaseModel):
+    html_content: str
+    original_tokens: int
+    tokens: int
+    stages: list[str] = []
+
+    @property
+    def ratio(self) -> float:
+        return self.original_tokens / self.tokens if self.tokens else 1.0
+
+    @property
+    def prompt_note(self) -> str | None:
+        """Explains lossy compression stages to the model, None if the HTML is intact"""
+        notes = [_NOTES[stage] for stage in self.stages if stage in _NOTES]
+        return ' '.join(['The HTML was compressed.'] + notes) if notes else None
+
+
+def _signature(node) -> tuple[str, str | None]:
+    return node.tag, node.get('class')
+
+
+def _collapse_repeated_siblings(root, exemplars: int) -> None:
+    """Keeps `exemplars` first nodes of runs of sibling nodes with the same tag and class"""
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        children = [child for child in node if isinstance(child.tag, str)]
+        run: list = []
+        for child in children + [None]:
+            if child is not None and run and _signature(child) == _signature(run[0]):
+                run.append(child)
+                continue
+            if len(run) > exemplars + 1:
+                comment = etree.Comment(f' {len(run) - exemplars} more similar <{run[0].tag}> elements ')
+                run[exemplars - 1].addnext(comment)
+                for removed in run[exemplars:]:
+                    node.remove(removed)
+                # Text after the run is kept after the comment
+                comment.tail = run[-1].tail
+                run = run[:exemplars]
+            stack.extend(run)
+            run = [child] if child is not None else []
+
+
+def _shorten(root) -> None:
+    for node in root.iter():
+        if not isinstance(node.tag, str):
+            continue
+        classes = node.get('class', '').split()
+        if len(classes) > MAX_CLASSES:
+            node.set('class', ' '.join(classes[:MAX_CLASSES]))
+        for name, value in node.items():
+            if name != 'class' and len(value) > MAX_ATTRIBUTE_LENGTH:
+                node.set(name, value[:MAX_ATTRIBUTE_LENGTH] + '...')
+        if node.text and len(node.text) > MAX_TEXT_LENGTH:
+            node.text = node.text[:MAX_TEXT_LENGTH] + '...'
+        if node.tail and len(node.tail) > MAX_TEXT_LENGTH:
+            node.tail = node.tail[:MAX_TEXT_LENGTH] + '...'
+
+
+def _serialize(root, is_document: bool) -> str:
+    if is_document:
+        return etree.tostring(root, method='html', encoding='unicode')
+    return (root.text or '') + ''.join(etree.tostring(node, method='html', encoding='unicode') for node in root)
+
+
+def _truncate(tokens: list[int], max_tokens: int, keep_tail: bool, encoding: Encoding) -> str:
+    if not keep_tail:
+        return encoding.decode(tokens[:max_tokens])
+    head_size = max_tokens // 2
+    return encoding.decode(tokens[:head_size]) + encoding.decode(tokens[len(tokens) - (max_tokens - head_size):])
+
+
+def compress_html(html_content: str,
+                  max_tokens: int,
+                  *,
+                  drop_tags: set[str] = None,
+                  exemplars: int = 2,
+                  stages: tuple[str, ...] = STAGES,
+                  keep_tail: bool = False,
+                  encoding: Encoding = None) -> CompressedHtml:
+    """
+    Fits (minified) HTML into the token budget of a prompt. Stages are applied only while the HTML exceeds the budget:
+    boilerplate tags are dropped, runs of similar sibling nodes are collapsed to `exemplars` nodes,
+    class lists, long attributes and texts are shortened. The result is truncated as the last resort,
+    `keep_tail` keeps both the beginning and the end of the page, where pagination usually is.
+    `exemplars` should be at least 1. `stages` selects the stages before truncation, e.g. collapsing
+    is not suitable for pages of one item, where similar rows of a table are different fields.
+    """
+    if encoding is None:
+        encoding = get_encoding()
+    if drop_tags is None:
+        drop_tags = BOILERPLATE_TAGS
+
+    with span('prompt.compress') as current_span:
+        tokens = encoding.encode_ordinary(html_content)
+        original_tokens = len(tokens)
+        applied = []
+        if len(tokens) > max_tokens:
+            is_document = _FULL_DOCUMENT_RE.match(html_content) is not None
+            if is_document:
+                root = html.document_fromstring(html_content)
+            else:
+                root = html.fragment_fromstring(html_content, create_parent='div')
+
+            def drop():
+                for node in list(root.iterdescendants(*drop_tags)):
+                    if node.tag in _LANDMARK_TAGS and any(a.tag == 'article' for a in node.iterancestors()):
+                        continue
+                    node.drop_tree()
+
+            for stage, apply in [('drop', drop),
+                                 ('collapse', lambda: _collapse_repeated_siblings(root, exemplars)),
+                                 ('shorten', lambda: _shorten(root))]:
+                if stage not in stages:
+                    continue
+                apply()
+                applied.append(stage)
+                html_content = _serialize(root, is_document)
+                tokens = encoding.encode_ordinary(html_content)
+                if len(tokens) <= max_tokens:
+                    break
+            if len(tokens) > max_tokens:
+                applied.append('truncate')
+                html_content = _truncate(tokens, max_tokens, keep_tail, encoding)
+                tokens = tokens[:max_tokens]
+
+        result = CompressedHtml(html_content=html_content, original_tokens=original_tokens, tokens=len(tokens),
+                                stages=applied)
+        current_span.set(prompt_tokens_before=original_tokens, prompt_tokens_after=result.tokens, ratio=result.ratio)
+    if applied:
+        logger.debug(f'Compressed HTML from {original_tokens} to {result.tokens} tokens '
+                     f'({result.ratio:.1f}x) with stages: {", ".join(applied)}')
+    return result
@@ -1,19 +1,24 @@
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional
 
 from langchain_core.messages import SystemMessage, HumanMessage
-from langchain_text_splitters import TokenTextSplitter
 from lxml import html
 from pydantic import BaseModel, ValidationError
 
 from scraperai.llm.base import BaseJsonLM
 from scraperai.parsers.agent import ChatModelAgent
+from scraperai.parsers.compression import compress_html
 from scraperai.models import StaticField, WebpageFields, DynamicField
 from scraperai.parsers.utils import build_validation_error_message
 from scraperai.utils.html import minify_html, extract_field_by_xpath, extract_dynamic_fields_by_xpath
 
 logger = logging.getLogger('scraperai')
 
+# Similar sibling elements of an item page, e.g. rows of a specifications table, are different fields,
+# so they are not collapsed
+FIELDS_STAGES = ('drop', 'shorten')
+
 
 class StaticFieldResponseModel(BaseModel):
     fields: list[StaticField]
@@ -50,11 +55,13 @@ Extract static data fields and present results as JSON with the following struct
 ```
 If nothing found return empty array"""
 
-        html_part = TokenTextSplitter(chunk_size=self.max_chunk_size).split_text(html_snippet)[0]
+        html_part = compress_html(html_snippet, self.max_chunk_size, stages=FIELDS_STAGES, encoding=self.encoding)
         messages = [
             SystemMessage(content=system_prompt),
-            HumanMessage(content=html_part),
+            HumanMessage(content=html_part.html_content),
         ]
+        if html_part.prompt_note:
+            messages.append(HumanMessage(content=html_part.prompt_note))
         if context:
             messages.append(HumanMessage(content=context))
 
@@ -104,10 +111,13 @@ If nothing found return empty array.
 XPATHs should start with ".//".
 """
 
+        html_part = compress_html(html_snippet, self.max_chunk_size, stages=FIELDS_STAGES, encoding=self.encoding)
         messages = [
             SystemMessage(content=system_prompt),
-            HumanMessage(content=html_snippet),
+            HumanMessage(content=html_part.html_content),
         ]
+        if html_part.prompt_note:
+            messages.append(HumanMessage(content=html_part.prompt_note))
         if context:
             messages.append(HumanMessage(content=context))
 
@@ -135,15 +145,25 @@ XPATHs should start with ".//".
         data = self.query_with_validation(messages, _validate_response)
         return extract_fields_from_response(data)
 
-    def extract_fields(self, html_snippet: str) -> WebpageFields:
+    def extract_fields(self, html_snippet: str, parallel: bool = False) -> WebpageFields:
+        """
+        Extracts static and dynamic fields from the html snippet.
+
+        By default, the static fields are found first and passed to the dynamic pass, so that they are not
+        extracted twice. With `parallel=True` both passes are sent to the model concurrently without this context.
+        """
+        if parallel:
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                static_future = executor.submit(self.extract_static_fields, html_snippet)
+                dynamic_future = executor.submit(self.extract_dynamic_fields, html_snippet)
+                return WebpageFields(static_fields=static_future.result(), dynamic_fields=dynamic_future.result())
+
         static_fields = self.extract_static_fields(html_snippet)
         static_fields_str = ', '.join([f'({f.field_name}: {f.field_xpath})' for f in static_fields])
         dynamic_fields = self.extract_dynamic_fields(
             html_snippet,
             context=f'You have already found this static fields: {static_fields_str}. Do not add them.'
         )
-        # print(type(static_fields))
-        # print(type(static_fields[0]))
         return WebpageFields(static_fields=static_fields, dynamic_fields=dynamic_fields)
 
     def find_fields(self, html_snippet: str, user_description: str) -> WebpageFields:
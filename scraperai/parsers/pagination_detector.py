@@ -6,13 +6,16 @@ from langchain_core.messages import SystemMessage, HumanMessage
 
 from scraperai.llm.base import BaseJsonLM
 from scraperai.parsers.agent import ChatModelAgent
+from scraperai.parsers.compression import compress_html, BOILERPLATE_TAGS
 from scraperai.models import Pagination
 from scraperai.utils.html import minify_html
-from langchain_text_splitters import TokenTextSplitter
 
 
 logger = logging.getLogger('scraperai')
 
+# Pagination is often placed in <nav> or close to the footer
+PAGINATION_DROP_TAGS = BOILERPLATE_TAGS - {'nav', 'footer'}
+
 
 class PaginationDetector(ChatModelAgent):
     def __init__(self, model: BaseJsonLM):
@@ -43,6 +46,14 @@ class PaginationDetector(ChatModelAgent):
                 return xpath
         return None
 
+    def _build_html_messages(self, html_content: str) -> list[HumanMessage]:
+        html_part = compress_html(html_content, self.max_chunk_size, drop_tags=PAGINATION_DROP_TAGS, keep_tail=True,
+                                  encoding=self.encoding)
+        messages = [HumanMessage(content=html_part.html_content)]
+        if html_part.prompt_note:
+            messages.append(HumanMessage(content=html_part.prompt_note))
+        return messages
+
     def _find_xpath(self, html_content: str) -> str | None:
         html_content, subs = minify_html(html_content, good_attrs={'class'})
 
@@ -59,18 +70,10 @@ class PaginationDetector(ChatModelAgent):
     {"xpath": null}
     ```
     """
-    
-        html_parts = TokenTextSplitter(chunk_size=self.max_chunk_size).split_text(html_content)
-        if len(html_parts) > 2:
-            html_parts = [html_parts[0], html_parts[-1]]
-        for html_part in reversed(html_parts):
-            messages = [
-                SystemMessage(content=system_prompt),
-                HumanMessage(content=html_part)
-            ]
-            resp = self.model.invoke(messages)
-            xpath = resp['xpath']
-            return xpath
+
+        messages = [SystemMessage(content=system_prompt)] + self._build_html_messages(html_content)
+        resp = self.model.invoke(messages)
+        return resp['xpath']
 
     def _find_pagination_classname(self, html_content: str) -> str | None:
         """
@@ -95,19 +98,9 @@ If nothing found, return:
 ```
 """
 
-        html_parts = TokenTextSplitter(chunk_size=self.max_chunk_size).split_text(html_content)
-        if len(html_parts) > 2:
-            html_parts = [html_parts[0], html_parts[-1]]
-        classname = None
-        for html_part in reversed(html_parts):
-            messages = [
-                SystemMessage(content=system_prompt),
-                HumanMessage(content=html_part)
-            ]
-            resp = self.model.invoke(messages)
-            classname = resp['classname']
-            if classname:
-                break
+        messages = [SystemMessage(content=system_prompt)] + self._build_html_messages(html_content)
+        resp = self.model.invoke(messages)
+        classname = resp['classname']
         if len(initial_soup.find_all(class_=classname)) == 1:
             return f"//*[@class='{classname}']"
         return None
@@ -140,21 +133,9 @@ If nothing found, return:
 ```
 """
 
-        html_parts = TokenTextSplitter(chunk_size=self.max_chunk_size).split_text(html_content)
-        if len(html_parts) > 2:
-            html_parts = [html_parts[0], html_parts[-1]]
-        result = None
-        for html_part in html_parts:
-            messages = [
-                SystemMessage(content=system_prompt),
-                HumanMessage(content=html_part)
-            ]
-            resp = self.model.invoke(messages)
-            if resp['tag'] is not None:
-                result = resp
-                break
-
-        if result is None:
+        messages = [SystemMessage(content=system_prompt)] + self._build_html_messages(html_content)
+        result = self.model.invoke(messages)
+        if result['tag'] is None:
             return None
 
         tag, button_text = result['tag'], result['text']
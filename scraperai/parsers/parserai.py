@@ -1,6 +1,11 @@
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, TypeVar
 
+from scraperai.instrumentation import span
 from scraperai.llm.base import BaseVision, BasePythonCodeLM
+from scraperai.llm.cache import LLMCache, CachedJsonLM, CachedVision, CachedPythonCodeLM
+from scraperai.llm.ratelimit import RateLimiter, RateLimitedJsonLM, RateLimitedVision, RateLimitedPythonCodeLM
 from scraperai.llm.openai import JsonOpenAI, VisionOpenAI, PythonCodeOpenAI
 from scraperai.parsers import (
     PaginationDetector,
@@ -18,6 +23,8 @@ from scraperai.utils.image import compress_b64_image
 
 logger = logging.getLogger('scraperai')
 
+_T = TypeVar('_T')
+
 
 class ParserAI:
     def __init__(self,
@@ -25,7 +32,18 @@ class ParserAI:
                  vision_model: BaseVision = None,
                  code_model: BasePythonCodeLM = None,
                  openai_api_key: str = None,
-                 openai_organization: str = None):
+                 openai_organization: str = None,
+                 cache: LLMCache = None,
+                 parallel: bool = False,
+                 rate_limiter: RateLimiter = None,
+                 max_concurrency: int = 8,
+                 min_card_confidence: float = 0.7):
+        """
+        If `parallel` is True, independent LLM requests of one setup step are sent concurrently.
+        `rate_limiter` limits requests to the models (cached responses are not counted) and `max_concurrency`
+        limits the number of concurrent requests of batch methods.
+        Catalog cards detected by page structure with confidence below `min_card_confidence` are detected by LLM.
+        """
 
         if json_lm_model is None:
             self.json_lm_model = JsonOpenAI(openai_api_key, openai_organization, temperature=0)
@@ -42,37 +60,95 @@ class ParserAI:
         else:
             self.code_model = code_model
 
+        self.parallel = parallel
+        self.max_concurrency = max_concurrency
+        self.min_card_confidence = min_card_confidence
+        self.rate_limiter = rate_limiter
+        if rate_limiter is not None:
+            self.json_lm_model = RateLimitedJsonLM(self.json_lm_model, rate_limiter)
+            self.vision_model = RateLimitedVision(self.vision_model, rate_limiter)
+            self.code_model = RateLimitedPythonCodeLM(self.code_model, rate_limiter)
+
+        self.cache = cache
+        if cache is not None:
+            self.json_lm_model = CachedJsonLM(self.json_lm_model, cache)
+            self.vision_model = CachedVision(self.vision_model, cache)
+            self.code_model = CachedPythonCodeLM(self.code_model, cache)
+
     @property
     def total_cost(self) -> float:
         cost = 0.0
-        if isinstance(self.json_lm_model, JsonOpenAI):
-            cost += self.json_lm_model.total_cost
-        if isinstance(self.vision_model, VisionOpenAI):
-            cost += self.vision_model.total_cost
+        cost += getattr(self.json_lm_model, 'total_cost', 0.0)
+        cost += getattr(self.vision_model, 'total_cost', 0.0)
         return cost
 
+    @property
+    def cache_hits(self) -> int:
+        return self.cache.hits if self.cache else 0
+
+    @property
+    def cache_misses(self) -> int:
+        return self.cache.misses if self.cache else 0
+
     def detect_page_type(self, page_source: str | None = None, screenshot: str | None = None) -> WebpageType:
         if screenshot is not None:
-            screenshot = compress_b64_image(screenshot, aspect_ratio=0.5)
-            return WebpageVisionClassifier(model=self.vision_model).classify(screenshot)
+            with span('parser.detect_page_type', source='screenshot'):
+                screenshot = compress_b64_image(screenshot, aspect_ratio=0.5)
+                return WebpageVisionClassifier(model=self.vision_model).classify(screenshot)
         elif page_source is not None:
-            return WebpageTextClassifier(model=self.json_lm_model).classify(page_source)
+            with span('parser.detect_page_type', source='html'):
+                return WebpageTextClassifier(model=self.json_lm_model).classify(page_source)
         else:
             raise ValueError('One of page_source, screenshot must not be None')
 
+    def detect_page_types(self,
+                          page_sources: list[str | None] = None,
+                          screenshots: list[str | None] = None,
+                          max_concurrency: int = None) -> list[WebpageType | Exception]:
+        """Batch version of `detect_page_type`. Results are returned in input order"""
+        if page_sources is None and screenshots is None:
+            raise ValueError('One of page_sources, screenshots must not be None')
+        size = len(page_sources if page_sources is not None else screenshots)
+        page_sources = page_sources if page_sources is not None else [None] * size
+        screenshots = screenshots if screenshots is not None else [None] * size
+        if len(page_sources) != len(screenshots):
+            raise ValueError('page_sources and screenshots should have the same length')
+        return self._run_batch(lambda args: self.detect_page_type(*args), list(zip(page_sources, screenshots)),
+                               max_concurrency)
+
     def detect_pagination(self, page_source: str) -> Pagination:
         detector = PaginationDetector(model=self.json_lm_model)
-        try:
-            return detector.find_pagination(page_source)
-        except:
-            return Pagination(type='none')
+        with span('parser.detect_pagination'):
+            try:
+                return detector.find_pagination(page_source)
+            except:
+                return Pagination(type='none')
+
+    def detect_paginations(self,
+                           page_sources: list[str],
+                           max_concurrency: int = None) -> list[Pagination | Exception]:
+        """Batch version of `detect_pagination`. Results are returned in input order"""
+        return self._run_batch(self.detect_pagination, page_sources, max_concurrency)
 
     def detect_catalog_item(self, page_source: str, website_url: str, extra_prompt: str = None) -> CatalogItem | None:
-        detector = CatalogItemDetector(model=self.json_lm_model)
-        item = detector.detect_catalog_item(page_source, extra_prompt)
+        detector = CatalogItemDetector(model=self.json_lm_model, min_confidence=self.min_card_confidence)
+        with span('parser.detect_catalog_item') as current_span:
+            item = detector.detect_catalog_item(page_source, extra_prompt)
+            current_span.set(method='llm' if item.confidence is None else 'heuristic')
         item.urls_on_page = [fix_relative_url(website_url, u) for u in item.urls_on_page]
         return item
 
+    def detect_catalog_items(self,
+                             page_sources: list[str],
+                             website_urls: list[str],
+                             extra_prompt: str = None,
+                             max_concurrency: int = None) -> list[CatalogItem | None | Exception]:
+        """Batch version of `detect_catalog_item`. Results are returned in input order"""
+        if len(page_sources) != len(website_urls):
+            raise ValueError('page_sources and website_urls should have the same length')
+        return self._run_batch(lambda args: self.detect_catalog_item(*args, extra_prompt=extra_prompt),
+                               list(zip(page_sources, website_urls)), max_concurrency)
+
     def manually_change_catalog_item(self, page_source: str, card_xpath: str, url_xpath: str, website_url: str):
         detector = CatalogItemDetector(model=self.json_lm_model)
         item = detector.manually_change_catalog_item(page_source, card_xpath, url_xpath)
@@ -90,23 +166,56 @@ class ParserAI:
         return fields
 
     def extract_fields(self, html_snippet: str) -> WebpageFields:
-        fields = DataFieldsExtractor(model=self.json_lm_model).extract_fields(html_snippet)
+        with span('parser.extract_fields'):
+            fields = DataFieldsExtractor(model=self.json_lm_model).extract_fields(html_snippet, parallel=self.parallel)
         return self.set_fields_colors(fields)
 
     def find_fields(self, html_snippet: str, user_description: str) -> WebpageFields:
         context = f"IMPORTANT! Search for fields that are described in " \
                   f"the following very important instructions: {user_description}"
-        fields = DataFieldsExtractor(model=self.json_lm_model).find_fields(html_snippet, context)
+        with span('parser.find_fields'):
+            fields = DataFieldsExtractor(model=self.json_lm_model).find_fields(html_snippet, context)
         return self.set_fields_colors(fields)
 
     def summarize_details_page_as_valid_html(self, page_source: str, screenshot: str | None = None) -> str:
-        if screenshot is not None:
-            # Generate webpage description to give GPT some context
-            description = WebpageVisionDescriptor(model=self.vision_model).describe(screenshot)
-        else:
-            description = None
+        with span('parser.summarize_details_page'):
+            return self._summarize_details_page_as_valid_html(page_source, screenshot)
 
+    def _summarize_details_page_as_valid_html(self, page_source: str, screenshot: str | None) -> str:
         # Split html into pieces, describe each piece, mark pieces as relevant/irrelevant,
         # remove irrelevant pieces and return new html
         parts_descriptor = WebpagePartsDescriptor(model=self.json_lm_model)
-        return parts_descriptor.find_and_remove_irrelevant_html_parts(page_source, context=description)
+        if screenshot is None:
+            return parts_descriptor.find_and_remove_irrelevant_html_parts(page_source)
+
+        # Webpage description gives GPT some context to choose relevant pieces
+        vision_descriptor = WebpageVisionDescriptor(model=self.vision_model)
+        if self.parallel:
+            # Pieces are described without the description, so both requests are independent
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                description_future = executor.submit(vision_descriptor.describe, screenshot)
+                parts = parts_descriptor.split_and_describe(page_source)
+                description = description_future.result()
+        else:
+            description = vision_descriptor.describe(screenshot)
+            parts = parts_descriptor.split_and_describe(page_source)
+        return parts_descriptor.remove_irrelevant_html_parts(parts, context=description)
+
+    def _run_batch(self,
+                   func: Callable[..., _T],
+                   inputs: list,
+                   max_concurrency: int | None) -> list[_T | Exception]:
+        """
+        Calls `func` for every input in a thread pool. An exception raised for one input is returned
+        in place of its result, so that one failed page does not break the whole batch.
+        """
+        def call(item) -> _T | Exception:
+            try:
+                return func(item)
+            except Exception as exc:
+                logger.warning(f'Batch item failed: {exc!r}')
+                return exc
+
+        max_workers = max(1, min(max_concurrency or self.max_concurrency, len(inputs)))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(call, inputs))
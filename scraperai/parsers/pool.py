@@ -0,0 +1,49 @@
+"""
+Extraction of fields in worker processes.
+
+Parsing with lxml and evaluation of xpaths are CPU-bound and hold the GIL, so threads that fetch pages
+can not parse them in parallel. `ParsePool` extracts fields of page sources in separate processes,
+every process compiles the `ExtractionPlan` once when it starts.
+"""
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any
+
+from scraperai.models import WebpageFields
+from scraperai.parsers.utils import ExtractionPlan
+
+# Plan of the current worker process
+_plan: ExtractionPlan | None = None
+
+
+def _init_worker(fields_json: str) -> None:
+    global _plan
+    _plan = ExtractionPlan(WebpageFields.model_validate_json(fields_json))
+
+
+def _extract(page_source: str) -> dict[str, Any]:
+    return _plan.extract_from_html(page_source)
+
+
+class ParsePool:
+    """Pool of `processes` processes extracting `fields` from page sources"""
+
+    def __init__(self, fields: WebpageFields, processes: int):
+        self.processes = processes
+        # Processes are spawned, since forking a process with running crawler threads is not safe
+        self._executor = ProcessPoolExecutor(max_workers=processes,
+                                             mp_context=multiprocessing.get_context('spawn'),
+                                             initializer=_init_worker,
+                                             initargs=(fields.model_dump_json(),))
+
+    def submit(self, page_source: str) -> Future[dict[str, Any]]:
+        return self._executor.submit(_extract, page_source)
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -1,4 +1,4 @@
-from typing import Any
+from typing import Any, Generator
 
 from lxml import html, etree
 from pydantic import ValidationError
@@ -46,14 +46,64 @@ def extract_fields_from_html(html_content: str, fields: WebpageFields) -> dict[s
     return extract_fields_from_tree(tree, fields)
 
 
+class ExtractionPlan:
+    """
+    Precompiled xpaths of `WebpageFields`.
+
+    Build it once per scraping job and reuse it for every page or catalog card: xpaths are compiled
+    only once and cards are evaluated in place, without serializing and reparsing them.
+    """
+
+    def __init__(self, fields: WebpageFields, select_context_node: bool = False):
+        self.fields = fields
+        self.select_context_node = select_context_node
+        self.static_fields = [
+            (field.field_name, etree.XPath(_prepare_xpath(field.field_xpath, select_context_node)), field.multiple)
+            for field in fields.static_fields
+        ]
+        self.dynamic_fields = [
+            (etree.XPath(_prepare_xpath(field.name_xpath, select_context_node)),
+             etree.XPath(_prepare_xpath(field.value_xpath, select_context_node)))
+            for field in fields.dynamic_fields
+        ]
+
+    def extract(self, tree) -> dict[str, Any]:
+        data = {
+            name: extract_field_by_xpath(tree, xpath, multiple=multiple)
+            for name, xpath, multiple in self.static_fields
+        }
+        for name_xpath, value_xpath in self.dynamic_fields:
+            data.update(extract_dynamic_fields_by_xpath(name_xpath, value_xpath, tree=tree))
+        return data
+
+    def extract_from_html(self, html_content: str) -> dict[str, Any]:
+        return self.extract(html.fromstring(html_content))
+
+    def extract_card(self, node) -> dict[str, Any]:
+        """
+        Extracts fields from a catalog card of a parsed page.
+
+        Fields xpaths are detected on a card snippet, i.e. the card is the only child of a fragment root.
+        To keep the same xpaths semantics, the card is temporarily moved under a detached wrapper
+        and returned back to its place afterward.
+        """
+        parent = node.getparent()
+        if parent is None:
+            return self.extract(node)
+        index = parent.index(node)
+        wrapper = html.Element('div')
+        wrapper.append(node)
+        try:
+            return self.extract(wrapper)
+        finally:
+            parent.insert(index, node)
+
+    def extract_items(self, tree, root_xpath: str) -> Generator[dict[str, Any], None, None]:
+        for node in tree.xpath(root_xpath):
+            yield self.extract_card(node)
+
+
 def extract_items(html_content: str, fields: WebpageFields, root_xpath: str) -> list[dict[str, Any]]:
-    items = []
     tree = html.fromstring(html_content)
-    for node in tree.xpath(root_xpath):
-        n = html.fragment_fromstring(
-            etree.tostring(node, pretty_print=False, method="html", encoding='unicode'),
-            create_parent=True
-        )
-        data = extract_fields_from_tree(n, fields, select_context_node=True)
-        items.append(data)
-    return items
+    plan = ExtractionPlan(fields, select_context_node=True)
+    return list(plan.extract_items(tree, root_xpath))
@@ -1,9 +1,9 @@
 from typing import Optional
 
 from langchain_core.messages import SystemMessage, HumanMessage
-from langchain_text_splitters import TokenTextSplitter
 
 from scraperai.parsers.agent import ChatModelAgent
+from scraperai.parsers.compression import compress_html
 from scraperai.models import WebpageType
 from scraperai.utils.html import minify_html
 from scraperai.utils.image import encode_image_to_b64
@@ -57,7 +57,7 @@ class WebpageTextClassifier(ChatModelAgent):
 
     def classify(self, html_content: str) -> WebpageType:
         compressed_html, subs = minify_html(html_content, good_attrs={'class', 'href'})
-        html_part = TokenTextSplitter(chunk_size=self.max_chunk_size).split_text(compressed_html)[0]
+        html_part = compress_html(compressed_html, self.max_chunk_size, encoding=self.encoding).html_content
 
         system_prompt = f"""
 Your goal is to classify website by HTML into 4 categories - {WebpageType.values_repr()}.
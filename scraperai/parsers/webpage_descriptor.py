@@ -101,7 +101,7 @@ Array of texts:
             ))
         return new_parts
 
-    def find_relevant_parts(self, parts: list[DescribedHtmlPart]) -> list[DescribedHtmlPart]:
+    def find_relevant_parts(self, parts: list[DescribedHtmlPart], context: str = None) -> list[DescribedHtmlPart]:
         formtted_parts = json.dumps({part.xpath: part.description for part in parts}, indent=4, ensure_ascii=False)
 
         system_prompt = "You are an HTML web scraper."
@@ -127,6 +127,8 @@ Descriptions data:
             SystemMessage(content=system_prompt),
             HumanMessage(content=user_prompt)
         ]
+        if context:
+            messages.append(HumanMessage(content=f'Description of the webpage: {context}'))
         response = self.model.invoke(messages)
         relevant_xpaths = set(response['relevant_xpaths'])
         for part in parts:
@@ -135,9 +137,13 @@ Descriptions data:
         return parts
 
     def find_and_remove_irrelevant_html_parts(self, html: str, context: str = None) -> str:
-        parts = self.split_and_describe(html, context)
+        parts = self.split_and_describe(html)
+        return self.remove_irrelevant_html_parts(parts, context)
+
+    def remove_irrelevant_html_parts(self, parts: list[DescribedHtmlPart], context: str = None) -> str:
+        """Removes parts that are not relevant to scraping from html of the last `split_and_describe` call"""
         logging.info(f'Split HTML into {len(parts)} parts')
-        parts = self.find_relevant_parts(parts)
+        parts = self.find_relevant_parts(parts, context)
         rel_count = len([p for p in parts if p.is_relevant])
         logging.info(f'Found {rel_count}/{len(parts)} relevant HTML parts')
         xpaths_to_remove = [part.xpath for part in parts if not part.is_relevant]
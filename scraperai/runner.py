@@ -0,0 +1,254 @@
+"""Scraping of saved configs without interaction, see `scraperai run`"""
+import hashlib
+import itertools
+import json
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, asdict
+from pathlib import Path
+from typing import Callable, Generator, Iterable
+from urllib.parse import urlparse
+
+from scraperai.crawlers import BaseCrawler, RequestsCrawler, SeleniumCrawler, WebdriversPool, HostRateLimiter, \
+    SQLiteBackend, PageCache
+from scraperai.crawlers.webdriver import ResourcePolicy
+from scraperai.dedup import Deduplicator
+from scraperai.models import ScraperConfig
+from scraperai.scraper import Scraper
+from scraperai.writers import create_writer
+
+logger = logging.getLogger('scraperai')
+
+CRAWLERS = ('requests', 'selenium')
+CONFIG_SUFFIX = '.scraperai.json'
+# Progress is reported every this number of rows
+PROGRESS_EVERY = 100
+
+
+@dataclass
+class RunOptions:
+    crawler: str = 'requests'
+    output_dir: str = '.'
+    output_format: str = 'jsonl'
+    # Configs scraped at the same time
+    workers: int = 1
+    # Limits overriding the limits of every config
+    max_pages: int | None = None
+    max_rows: int | None = None
+    concurrency: int | None = None
+    parse_processes: int | None = None
+    time_limit: float | None = None
+    # Urls of nested pages are deduplicated by default. Rows only on request, as distinct items may have equal fields
+    dedup: bool = True
+    dedup_rows: bool = False
+    headless: bool = True
+    # Requests to the same host per second, shared by all configs. Processes share it through the database
+    rate_limit: float | None = None
+    rate_limit_db: str | None = None
+    # HTTP cache of the requests crawler and whether to skip pages that did not change since the previous run
+    http_cache: str | None = None
+    skip_unchanged: bool = False
+
+
+@dataclass
+class ConfigResult:
+    config: str
+    domain: str | None = None
+    output: str | None = None
+    status: str = 'ok'
+    rows: int = 0
+    skipped_urls: int = 0
+    skipped_rows: int = 0
+    unchanged_pages: int = 0
+    elapsed: float = 0.0
+    error: str | None = None
+
+
+@dataclass
+class RunSummary:
+    results: list[ConfigResult] = field(default_factory=list)
+    elapsed: float = 0.0
+
+    @property
+    def failed(self) -> int:
+        return sum(result.status == 'failed' for result in self.results)
+
+    def get_domains(self) -> dict[str, dict]:
+        """Configs, failures, rows and scraping time aggregated by domain"""
+        domains = {}
+        for result in self.results:
+            stats = domains.setdefault(result.domain, {'configs': 0, 'failed': 0, 'rows': 0, 'elapsed': 0.0})
+            stats['configs'] += 1
+            stats['failed'] += result.status == 'failed'
+            stats['rows'] += result.rows
+            stats['elapsed'] = round(stats['elapsed'] + result.elapsed, 3)
+        return domains
+
+    def to_dict(self) -> dict:
+        rows = sum(result.rows for result in self.results)
+        return {
+            'configs': len(self.results),
+            'succeeded': len(self.results) - self.failed,
+            'failed': self.failed,
+            'rows': rows,
+            'elapsed': round(self.elapsed, 3),
+            'rows_per_second': round(rows / self.elapsed, 1) if self.elapsed else 0.0,
+            'domains': self.get_domains(),
+            'results': [asdict(result) for result in self.results],
+        }
+
+
+def find_configs(paths: Iterable[str | Path]) -> list[Path]:
+    """Expands directories to the saved configs they contain"""
+    configs = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            configs.extend(sorted(path.glob(f'*{CONFIG_SUFFIX}')))
+        else:
+            configs.append(path)
+    return configs
+
+
+def load_config(path: str | Path) -> ScraperConfig:
+    with open(path, 'r') as f:
+        return ScraperConfig(**json.load(f))
+
+
+def get_domain(url: str) -> str:
+    return urlparse(url).netloc.lower()
+
+
+class ConfigRunner:
+    """
+    Scrapes saved configs without interaction. Configs are scraped by `options.workers` threads,
+    rows of every config are streamed to its own output file.
+    Browsers of the selenium backend are shared by all configs through a `WebdriversPool`.
+    """
+
+    def __init__(self,
+                 options: RunOptions,
+                 crawler_factory: Callable[[], BaseCrawler] = None,
+                 on_progress: Callable[[str, int], None] = None):
+        """`on_progress` receives the config path and the number of written rows every `PROGRESS_EVERY` rows"""
+        self.options = options
+        self._pool: WebdriversPool | None = None
+        self._rate_limiter: HostRateLimiter | None = None
+        self._page_cache: PageCache | None = None
+        self._lock = threading.Lock()
+        self.crawler_factory = crawler_factory or self.create_crawler
+        self.on_progress = on_progress
+
+    def get_rate_limiter(self) -> HostRateLimiter | None:
+        if self.options.rate_limit is None:
+            return None
+        with self._lock:
+            if self._rate_limiter is None:
+                backend = SQLiteBackend(self.options.rate_limit_db) if self.options.rate_limit_db else None
+                self._rate_limiter = HostRateLimiter(self.options.rate_limit, backend=backend)
+        return self._rate_limiter
+
+    def get_page_cache(self) -> PageCache | None:
+        if self.options.http_cache is None:
+            return None
+        with self._lock:
+            if self._page_cache is None:
+                self._page_cache = PageCache(self.options.http_cache)
+        return self._page_cache
+
+    def create_crawler(self) -> BaseCrawler:
+        rate_limiter = self.get_rate_limiter()
+        if self.options.crawler == 'requests':
+            return RequestsCrawler(rate_limiter=rate_limiter, cache=self.get_page_cache())
+        if self.options.crawler == 'selenium':
+            with self._lock:
+                if self._pool is None:
+                    from scraperai.crawlers.webdriver import DefaultChromeWebdriver
+
+                    size = self.options.workers * (self.options.concurrency or 1)
+                    self._pool = WebdriversPool(driver_factory=lambda: DefaultChromeWebdriver(
+                        headless=self.options.headless), size=size, prewarm=False)
+            return SeleniumCrawler(pool=self._pool, resource_policy=ResourcePolicy(), rate_limiter=rate_limiter)
+        raise ValueError(f'Unknown crawler: {self.options.crawler}. Should be one of {CRAWLERS}')
+
+    def get_output_path(self, config_path: Path) -> Path:
+        """
+        Configs with the same name may be in different directories, so the name of the output file
+        also has a short hash of the config directory. It does not change between runs
+        """
+        name = config_path.name.removesuffix(CONFIG_SUFFIX).removesuffix('.json')
+        directory_hash = hashlib.sha1(str(config_path.resolve().parent).encode()).hexdigest()[:8]
+        return Path(self.options.output_dir) / f'{name}-{directory_hash}.{self.options.output_format}'
+
+    def apply_limits(self, config: ScraperConfig) -> ScraperConfig:
+        limits = {'max_pages': self.options.max_pages, 'max_rows': self.options.max_rows,
+                  'concurrency': self.options.concurrency, 'parse_processes': self.options.parse_processes}
+        return config.model_copy(update={name: value for name, value in limits.items() if value is not None})
+
+    def _limit(self, rows: Iterable[dict], max_rows: int, result: ConfigResult) -> Generator[dict, None, None]:
+        # Catalog pages are scraped whole, so the rows limit is applied to the rows as well
+        for count, row in enumerate(itertools.islice(rows, max_rows), start=1):
+            yield row
+            if self.on_progress is not None and count % PROGRESS_EVERY == 0:
+                self.on_progress(result.config, count)
+
+    def run_config(self, path: Path) -> ConfigResult:
+        result = ConfigResult(config=str(path))
+        start = time.monotonic()
+        crawler = None
+        try:
+            config = self.apply_limits(load_config(path))
+            result.domain = get_domain(config.start_url)
+            output_path = self.get_output_path(path)
+            result.output = str(output_path)
+            dedup = None
+            if self.options.dedup or self.options.dedup_rows:
+                dedup = Deduplicator(urls=self.options.dedup, rows=self.options.dedup_rows)
+            crawler = self.crawler_factory()
+            factory = self.crawler_factory if config.concurrency > 1 else None
+            # The time limit is checked by the scraper between pages, also when pages produce no rows
+            scraper = Scraper(config, crawler, crawler_factory=factory, dedup=dedup,
+                              skip_unchanged=self.options.skip_unchanged, time_limit=self.options.time_limit)
+            with create_writer(output_path, self.options.output_format) as writer:
+                try:
+                    writer.write_rows(self._limit(scraper.scrape(), config.max_rows, result))
+                finally:
+                    result.rows = writer.rows_written
+                    result.unchanged_pages = scraper.unchanged_pages
+                    if scraper.time_limit_reached:
+                        result.status = 'time_limit'
+            if dedup is not None:
+                result.skipped_urls, result.skipped_rows = dedup.skipped_urls, dedup.skipped_rows
+        except Exception as e:
+            logger.exception(f'{path}: scraping failed')
+            result.status = 'failed'
+            result.error = f'{type(e).__name__}: {e}'
+        finally:
+            if crawler is not None:
+                crawler.close()
+            result.elapsed = round(time.monotonic() - start, 3)
+        logger.info(f'{path}: {result.status}, {result.rows} rows in {result.elapsed:.1f}s')
+        return result
+
+    def run(self, paths: Iterable[str | Path]) -> RunSummary:
+        configs = find_configs(paths)
+        Path(self.options.output_dir).mkdir(parents=True, exist_ok=True)
+        start = time.monotonic()
+        try:
+            with ThreadPoolExecutor(max_workers=self.options.workers, thread_name_prefix='scraperai-run') as executor:
+                results = list(executor.map(self.run_config, configs))
+        finally:
+            self.close()
+        return RunSummary(results=results, elapsed=time.monotonic() - start)
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.close()
+            self._pool = None
+        if self._rate_limiter is not None:
+            self._rate_limiter.backend.close()
+            self._rate_limiter = None
+        if self._page_cache is not None:
+            self._page_cache.close()
+            self._page_cache = None
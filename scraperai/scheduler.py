@@ -0,0 +1,285 @@
+"""
+Scraping of many saved configs across CPU cores.
+
+Parsing and extraction of pages is pure Python and limited by the GIL, so `Scheduler` runs configs in a pool
+of worker processes. Each process has its own `ConfigRunner` with `RunOptions.workers` threads and its own crawlers.
+The parent process keeps the queue of configs and hands them out one by one, so idle workers take the next config
+while slow sites keep the others busy. Politeness limits are global for all processes:
+at most `max_per_domain` configs of a domain are scraped at the same time and requests to a domain
+are at least `min_request_interval` seconds apart. `RunOptions.rate_limit` is shared by processes through SQLite.
+"""
+import logging
+import multiprocessing
+import os
+import queue
+import tempfile
+import threading
+import time
+from collections import defaultdict, deque
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from typing import Iterable
+
+from scraperai.crawlers import BaseCrawler
+from scraperai.models import Pagination
+from scraperai.runner import ConfigResult, ConfigRunner, RunOptions, RunSummary, find_configs, get_domain, \
+    load_config
+
+logger = logging.getLogger('scraperai')
+
+
+@dataclass
+class SchedulerOptions:
+    processes: int = field(default_factory=lambda: os.cpu_count() or 1)
+    # Configs of the same domain scraped at the same time by all processes
+    max_per_domain: int = 2
+    # Minimal interval between requests to the same domain, s
+    min_request_interval: float = 0.0
+    # Interval between progress log messages, s
+    progress_interval: float = 10.0
+
+
+class DomainThrottle:
+    """Spaces requests to the same domain by `min_interval` seconds. The state is shared by processes"""
+
+    def __init__(self, domains: Iterable[str], min_interval: float, ctx=None):
+        ctx = ctx or multiprocessing.get_context('spawn')
+        self.min_interval = min_interval
+        self._indexes = {domain: i for i, domain in enumerate(domains)}
+        # Time when the next request to the domain is allowed
+        self._next_times = ctx.Array('d', max(len(self._indexes), 1))
+
+    def wait(self, url: str) -> float:
+        """Sleeps until a request to the url is allowed. Returns the delay"""
+        index = self._indexes.get(get_domain(url))
+        if self.min_interval <= 0 or index is None:
+            return 0.0
+        with self._next_times.get_lock():
+            now = time.time()
+            slot = max(now, self._next_times[index])
+            self._next_times[index] = slot + self.min_interval
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+
+class ThrottledCrawler(BaseCrawler):
+    """Waits for the `DomainThrottle` before every request of the wrapped crawler"""
+
+    def __init__(self, crawler: BaseCrawler, throttle: DomainThrottle):
+        self.crawler = crawler
+        self.throttle = throttle
+        self._url: str | None = None
+
+    def get(self, url: str):
+        self.throttle.wait(url)
+        self._url = url
+        return self.crawler.get(url)
+
+    @property
+    def page_source(self) -> str:
+        return self.crawler.page_source
+
+    @property
+    def page_changed(self) -> bool:
+        return self.crawler.page_changed
+
+    def switch_page(self, pagination: Pagination) -> bool:
+        # The next url is not known in advance, pages are assumed to be on the domain of the current page
+        url = pagination.urls[0] if pagination.type == 'urls' and pagination.urls else self._url
+        if url is not None:
+            self.throttle.wait(url)
+        return self.crawler.switch_page(pagination)
+
+    def set_content_xpath(self, xpath: str | None) -> None:
+        self.crawler.set_content_xpath(xpath)
+
+    def get_new_nodes_html(self, xpath: str) -> list[str] | None:
+        return self.crawler.get_new_nodes_html(xpath)
+
+    def close(self) -> None:
+        self.crawler.close()
+
+    def __getattr__(self, name):
+        return getattr(self.crawler, name)
+
+
+def _work(runner: ConfigRunner, tasks: multiprocessing.Queue, messages: multiprocessing.Queue) -> None:
+    while (task := tasks.get()) is not None:
+        index, path = task
+        # The parent fails started configs if the process crashes and hands out the others again
+        messages.put(('started', index, os.getpid()))
+        messages.put(('result', index, runner.run_config(Path(path))))
+
+
+def _worker(options: RunOptions, throttle: DomainThrottle, tasks: multiprocessing.Queue,
+            messages: multiprocessing.Queue) -> None:
+    """Entry point of worker processes. Runs `options.workers` threads taking configs until a None task"""
+    runner = ConfigRunner(options, on_progress=lambda config, rows: messages.put(('progress', config, rows)))
+    runner.crawler_factory = lambda: ThrottledCrawler(runner.create_crawler(), throttle)
+    threads = [threading.Thread(target=_work, args=(runner, tasks, messages), name=f'scraperai-run-{i}')
+               for i in range(options.workers)]
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        runner.close()
+
+
+@dataclass
+class _WorkerProcess:
+    process: multiprocessing.Process
+    # Every process has its own queue of tasks, so that the configs of a crashed process are known
+    tasks: multiprocessing.Queue
+    assigned: set[int] = field(default_factory=set)
+
+
+class Scheduler:
+    """
+    Scrapes saved configs in `scheduler_options.processes` worker processes, see the module docstring.
+    Results are the same as of `ConfigRunner.run`.
+    """
+
+    def __init__(self, options: RunOptions, scheduler_options: SchedulerOptions = None):
+        self.options = options
+        self.scheduler_options = scheduler_options or SchedulerOptions()
+        self._ctx = multiprocessing.get_context('spawn')
+
+    def _start_worker(self, options: RunOptions, throttle: DomainThrottle, messages, target=_worker) -> _WorkerProcess:
+        tasks = self._ctx.Queue()
+        # Workers are not daemons, so that they can start processes of `ParsePool`.
+        # They are stopped with None tasks and joined when the run finishes
+        process = self._ctx.Process(target=target, args=(options, throttle, tasks, messages))
+        process.start()
+        return _WorkerProcess(process, tasks)
+
+    def run(self, paths: Iterable[str | Path]) -> RunSummary:
+        if self.options.rate_limit is None or self.options.rate_limit_db is not None:
+            return self._run(paths, self.options)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            return self._run(paths, replace(self.options, rate_limit_db=str(Path(tmp_dir) / 'rate_limit.sqlite3')))
+
+    def _run(self, paths: Iterable[str | Path], options: RunOptions) -> RunSummary:
+        configs = find_configs(paths)
+        Path(self.options.output_dir).mkdir(parents=True, exist_ok=True)
+        start = time.monotonic()
+        results: list[ConfigResult | None] = [None] * len(configs)
+
+        # Configs are grouped by domain to enforce politeness. Configs that can not be loaded fail right away
+        pending: dict[str, deque[int]] = defaultdict(deque)
+        domains: dict[int, str] = {}
+        for i, path in enumerate(configs):
+            try:
+                domains[i] = get_domain(load_config(path).start_url)
+            except Exception as e:
+                logger.error(f'{path}: failed to load config: {e}')
+                results[i] = ConfigResult(config=str(path), status='failed', error=f'{type(e).__name__}: {e}')
+            else:
+                pending[domains[i]].append(i)
+
+        running: dict[str, int] = defaultdict(int)
+        started: set[int] = set()
+        # Configs handed out again after a crash of their process, they are failed if it happens twice
+        requeued: set[int] = set()
+        rows: dict[str, int] = {}
+        throttle = DomainThrottle(list(pending), self.scheduler_options.min_request_interval, self._ctx)
+        messages = self._ctx.Queue()
+        workers: list[_WorkerProcess] = []
+        restarts = 0
+
+        def dispatch():
+            # Configs of the domain with the most pending configs go first, unless it is at its limit.
+            # They are handed out to the least busy process
+            while workers:
+                worker = min(workers, key=lambda w: len(w.assigned))
+                if len(worker.assigned) >= self.options.workers:
+                    return
+                allowed = [domain for domain, indexes in pending.items()
+                           if indexes and running[domain] < self.scheduler_options.max_per_domain]
+                if not allowed:
+                    return
+                domain = max(allowed, key=lambda d: len(pending[d]))
+                index = pending[domain].popleft()
+                running[domain] += 1
+                worker.assigned.add(index)
+                worker.tasks.put((index, str(configs[index])))
+
+        def finish(index: int, result: ConfigResult):
+            results[index] = result
+            running[domains[index]] -= 1
+            started.discard(index)
+            rows.pop(result.config, None)
+            for worker in workers:
+                worker.assigned.discard(index)
+
+        def handle(message: tuple):
+            kind, key, value = message
+            if kind == 'started':
+                started.add(key)
+            elif kind == 'progress':
+                rows[key] = value
+            elif kind == 'result':
+                finish(key, value)
+                dispatch()
+
+        def replace_crashed(i: int):
+            nonlocal restarts
+            worker = workers[i]
+            exitcode = worker.process.exitcode
+            for index in sorted(worker.assigned):
+                if index in started or index in requeued:
+                    logger.error(f'{configs[index]}: worker process exited with code {exitcode}')
+                    finish(index, ConfigResult(config=str(configs[index]), domain=domains[index], status='failed',
+                                               error=f'Worker process exited with code {exitcode}'))
+                else:
+                    # The crashed process had not started the config yet
+                    requeued.add(index)
+                    running[domains[index]] -= 1
+                    pending[domains[index]].appendleft(index)
+            restarts += 1
+            if restarts > len(configs) + self.scheduler_options.processes:
+                raise RuntimeError(f'Worker processes keep exiting, the last exit code: {exitcode}')
+            workers[i] = self._start_worker(options, throttle, messages)
+
+        try:
+            total = sum(len(indexes) for indexes in pending.values())
+            for _ in range(min(self.scheduler_options.processes, total)):
+                workers.append(self._start_worker(options, throttle, messages))
+            dispatch()
+            last_progress = time.monotonic()
+            while sum(running.values()):
+                try:
+                    handle(messages.get(timeout=0.5))
+                except queue.Empty:
+                    pass
+
+                crashed = [i for i, worker in enumerate(workers) if not worker.process.is_alive()]
+                if crashed:
+                    # Messages of exited processes are already in the queue before the marker, so their
+                    # started and finished configs are known. Draining until the queue is empty could
+                    # take forever while other processes send progress
+                    messages.put(('drained', None, None))
+                    while (message := messages.get())[0] != 'drained':
+                        handle(message)
+                for i in crashed:
+                    replace_crashed(i)
+                dispatch()
+
+                if time.monotonic() - last_progress >= self.scheduler_options.progress_interval:
+                    last_progress = time.monotonic()
+                    done = sum(result is not None for result in results)
+                    total_rows = sum(result.rows for result in results if result is not None) + sum(rows.values())
+                    logger.info(f'Progress: {done}/{len(configs)} configs, {sum(running.values())} running, '
+                                f'{total_rows} rows, {total_rows / (last_progress - start):.1f} rows/s')
+        finally:
+            for worker in workers:
+                for _ in range(self.options.workers):
+                    worker.tasks.put(None)
+            for worker in workers:
+                worker.process.join(timeout=10)
+                if worker.process.is_alive():
+                    worker.process.terminate()
+        return RunSummary(results=results, elapsed=time.monotonic() - start)
@@ -1,28 +1,110 @@
+import asyncio
+import collections
+import itertools
 import logging
-from typing import Generator, Iterable
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
+from typing import Generator, AsyncGenerator, Iterable, Callable, Any
+from urllib.parse import urlparse
 
-from lxml import html, etree
+from lxml import html
 
-from scraperai import BaseCrawler
+from scraperai import BaseCrawler, AsyncBaseCrawler
+from scraperai.dedup import Deduplicator
+from scraperai.instrumentation import span
+from scraperai.journal import RunJournal, RunState
 from scraperai.models import ScraperConfig, WebpageType
-from scraperai.parsers.utils import extract_fields_from_html, extract_fields_from_tree
+from scraperai.parsers.pool import ParsePool
+from scraperai.parsers.utils import ExtractionPlan
 from scraperai.utils.urls import fix_relative_url
 
 logger = logging.getLogger('scraperai')
 
 
 class Scraper:
-    def __init__(self, config: ScraperConfig, crawler: BaseCrawler):
+    def __init__(self,
+                 config: ScraperConfig,
+                 crawler: BaseCrawler | AsyncBaseCrawler,
+                 crawler_factory: Callable[[], BaseCrawler] = None,
+                 journal: RunJournal = None,
+                 dedup: Deduplicator = None,
+                 skip_unchanged: bool = False,
+                 time_limit: float = None):
+        """
+        :param config: scraper config
+        :param crawler: main crawler. Async crawlers are supported only by `ascrape`
+        :param crawler_factory: creates additional crawlers to open nested pages concurrently
+            when `config.concurrency` is greater than 1. Crawlers are created on demand and closed afterward.
+        :param journal: records progress of `scrape`, so that the run can be continued with `resume`
+        :param dedup: skips duplicate nested pages urls and rows
+        :param skip_unchanged: do not extract pages that did not change since the previous run,
+            e.g. `RequestsCrawler` with a `PageCache`. Rows of such pages are not yielded
+        :param time_limit: stops opening new pages after this number of seconds since scraping started.
+            Pages already being scraped are finished and `time_limit_reached` is set
+        """
         self.config = config
         self.crawler = crawler
+        self.crawler_factory = crawler_factory
+        self.journal = journal
+        self.dedup = dedup
+        self.skip_unchanged = skip_unchanged
+        self.time_limit = time_limit
+        self.time_limit_reached = False
+        self.unchanged_pages = 0
+        self.run_id: str | None = None
+        self._deadline: float | None = None
+        self._state: RunState | None = None
+        self._host = urlparse(config.start_url).netloc
 
     def scrape(self) -> Generator[dict, None, None]:
+        if self.journal is not None:
+            self.run_id = self.journal.start_run(self.config)
+            self._state = self.journal.get_state(self.run_id)
+            logger.info(f'Started run {self.run_id}')
+        yield from self._scrape()
+
+    def resume(self, run_id: str) -> Generator[dict, None, None]:
+        """Continues a journaled run, skipping already scraped pages and emitted rows"""
+        if self.journal is None:
+            raise ValueError('journal is required to resume a run')
+        self.run_id = run_id
+        self._state = self.journal.get_state(run_id)
+        if self._state.finished:
+            logger.info(f'Run {run_id} is already finished')
+            return
+        logger.info(f'Resuming run {run_id} from page {self._state.page_number}, '
+                    f'{self._state.rows_emitted} rows already emitted')
+        yield from self._scrape()
+
+    def _start_timer(self) -> None:
+        self.time_limit_reached = False
+        self._deadline = time.monotonic() + self.time_limit if self.time_limit is not None else None
+
+    def _is_time_over(self) -> bool:
+        if self._deadline is None or time.monotonic() < self._deadline:
+            return False
+        if not self.time_limit_reached:
+            logger.warning(f'Time limit of {self.time_limit}s is reached, stopping scraping')
+            self.time_limit_reached = True
+        return True
+
+    def _until_time_over(self, urls: Iterable[str]) -> Generator[str, None, None]:
+        """Stops yielding urls when the time limit is reached, so that new pages are not opened"""
+        for url in urls:
+            if self._is_time_over():
+                return
+            yield url
+
+    def _scrape(self) -> Generator[dict, None, None]:
+        self._start_timer()
         if self.config.page_type == WebpageType.DETAILS:
             if self.config.pagination.type == 'urls':
                 urls = self.config.pagination.urls
             else:
                 urls = [self.config.start_url]
-            for row in self.scrape_nested_items(urls):
+            for row in self.scrape_nested_items(self.unique_urls(urls)):
                 yield row
         elif self.config.page_type == WebpageType.CATALOG:
             if self.config.open_nested_pages:
@@ -34,27 +116,415 @@ class Scraper:
                     yield row
         else:
             logger.error(f'Unsupported page type: {self.config.page_type}')
+            return
+        if self.dedup is not None:
+            logger.info(f'Skipped {self.dedup.skipped_urls} duplicate urls and '
+                        f'{self.dedup.skipped_rows} duplicate rows')
+        if self.skip_unchanged:
+            logger.info(f'Skipped {self.unchanged_pages} unchanged pages')
+        # A run stopped by the time limit can be resumed
+        if self.journal is not None and not self.time_limit_reached:
+            self.journal.finish_run(self.run_id)
+
+    def unique_urls(self, urls: Iterable[str]) -> Generator[str, None, None]:
+        """Skips duplicate urls if deduplication is enabled"""
+        for url in urls:
+            if self.dedup is None or self.dedup.add_url(url):
+                yield url
+
+    def _get(self, crawler: BaseCrawler, url: str) -> None:
+        with span('scraper.fetch', host=self._host):
+            crawler.get(url)
+
+    def _get_page_source(self, crawler: BaseCrawler | AsyncBaseCrawler) -> str:
+        with span('scraper.page_source', host=self._host) as current_span:
+            page_source = crawler.page_source
+            current_span.set(size=len(page_source))
+        return page_source
+
+    def _parse(self, page_source: str):
+        with span('scraper.parse', host=self._host):
+            return html.fromstring(page_source)
+
+    def _extract_page(self, plan: ExtractionPlan, page_source: str) -> dict[str, Any]:
+        tree = self._parse(page_source)
+        with span('scraper.extract', host=self._host):
+            return plan.extract(tree)
+
+    def _extract_current_page(self, plan: ExtractionPlan, crawler: BaseCrawler) -> dict[str, Any] | None:
+        """Returns None if the page did not change and unchanged pages are skipped"""
+        if self.skip_unchanged and not crawler.page_changed:
+            return None
+        return self._extract_page(plan, self._get_page_source(crawler))
+
+    def _switch_page(self) -> bool:
+        pagination_type = self.config.pagination.type
+        with span('scraper.switch_page', host=self._host, type=pagination_type) as current_span:
+            success = self.crawler.switch_page(self.config.pagination)
+            current_span.set(success=success)
+        return success
+
+    def _skip_pages(self, count: int) -> bool:
+        """Switches pages without scraping them. Pages can not be opened directly with all pagination types"""
+        for _ in range(count):
+            if not self._switch_page():
+                return False
+        return True
 
     def scrape_catalog_items(self) -> Generator[dict, None, None]:
+        plan = ExtractionPlan(self.config.fields, select_context_node=True)
+        state = self._state or RunState(run_id='')
+        total_count = state.rows_emitted
+        page_number = state.page_number
+        self.crawler.set_content_xpath(self.config.catalog_item.card_xpath)
+        self._get(self.crawler, self.config.start_url)
+        if not self._skip_pages(page_number):
+            return
+        card_xpath = self.config.catalog_item.card_xpath
+        incremental = self.config.pagination.type == 'scroll'
+        # Position of the first card of the page. Positions of scrolled pages are counted from the first card
+        # of the feed, since after skipping pages on resume the first batch contains cards of all skipped pages
+        position = 0
+        while True:
+            count = 0
+            offset = state.page_offset if page_number == state.page_number else 0
+            if incremental:
+                with span('scraper.page_source', host=self._host, incremental=True):
+                    cards = self.crawler.get_new_nodes_html(card_xpath)
+            else:
+                cards = None
+            if cards is not None:
+                # Only cards appended by the last scroll are returned
+                with span('scraper.extract', host=self._host):
+                    rows = [self._extract_card_html(plan, card_html) for card_html in cards[offset:]]
+            else:
+                if incremental and page_number > state.page_number:
+                    logger.warning('Failed to get new cards, stopping scrolling to avoid duplicates')
+                    break
+                incremental = False
+                if self.skip_unchanged and not self.crawler.page_changed:
+                    self.unchanged_pages += 1
+                    rows = []
+                else:
+                    tree = self._parse(self._get_page_source(self.crawler))
+                    with span('scraper.extract', host=self._host):
+                        rows = list(itertools.islice(plan.extract_items(tree, card_xpath), offset, None))
+            for index, data in enumerate(rows, start=offset):
+                if self.dedup is None or self.dedup.add_row(data):
+                    count += 1
+                    yield data
+                if self.journal is not None:
+                    self.journal.set_position(self.run_id, page_number, position + index + 1, total_count + count)
+
+            if incremental:
+                position += len(cards)
+            total_count += count
+            logger.debug(f'Page: {page_number}: Found {count} new items')
+
+            if self._is_time_over():
+                break
+            success = self._switch_page()
+            if not success:
+                break
+
+            page_number += 1
+            if self.journal is not None:
+                self.journal.set_position(self.run_id, page_number, position, total_count)
+            if page_number >= self.config.max_pages or total_count >= self.config.max_rows:
+                break
+
+    @staticmethod
+    def _extract_card_html(plan: ExtractionPlan, card_html: str) -> dict[str, Any]:
+        # Cards are wrapped the same way as in `ExtractionPlan.extract_card`
+        wrapper = html.fragment_fromstring(card_html, create_parent='div')
+        return plan.extract(wrapper)
+
+    def scrape_nested_items_urls(self) -> Generator[str, None, None]:
+        page_number = 0
+        if self._state is not None:
+            # Urls of the first pages were collected before the run was interrupted
+            for url in self.journal.get_nested_urls(self.run_id):
+                if self.dedup is not None:
+                    self.dedup.add_url(url)
+                yield url
+            if self._state.urls_collected:
+                return
+            page_number = self._state.page_number
+
+        if page_number < self.config.max_pages:
+            self.crawler.set_content_xpath(self.config.catalog_item.card_xpath)
+            self._get(self.crawler, self.config.start_url)
+            if self._skip_pages(page_number):
+                yield from self._collect_nested_items_urls(page_number)
+        if self.journal is not None and not self.time_limit_reached:
+            self.journal.set_urls_collected(self.run_id)
+
+    def _collect_nested_items_urls(self, page_number: int) -> Generator[str, None, None]:
+        while True:
+            tree = self._parse(self._get_page_source(self.crawler))
+            urls = list(self.unique_urls(fix_relative_url(self.config.start_url, url)
+                                         for url in tree.xpath(self.config.catalog_item.url_xpath)))
+            if self.journal is not None:
+                self.journal.add_nested_urls(self.run_id, urls, page_number + 1)
+            yield from urls
+
+            if self._is_time_over():
+                break
+            success = self._switch_page()
+            if not success:
+                break
+            page_number += 1
+            if page_number >= self.config.max_pages:
+                break
+
+    def scrape_nested_items(self, urls: Iterable[str]) -> Generator[dict, None, None]:
+        plan = ExtractionPlan(self.config.fields)
+        if self._state is not None:
+            completed_urls = self.journal.get_completed_urls(self.run_id)
+            urls = (url for url in itertools.islice(urls, self.config.max_rows) if url not in completed_urls)
+        urls = self._until_time_over(urls)
+
+        if self.config.concurrency > 1 and self.crawler_factory is None:
+            logger.warning('crawler_factory is not set, nested pages will be scraped sequentially')
+        if self.config.parse_processes > 0:
+            results = self._scrape_nested_items_pipelined(urls)
+        elif self.config.concurrency > 1 and self.crawler_factory is not None:
+            results = self._scrape_nested_items_concurrently(urls, plan)
+        else:
+            results = self._scrape_nested_items_sequentially(urls, plan)
+
+        for url, row in results:
+            if row is None:
+                self.unchanged_pages += 1
+                emitted = False
+            else:
+                emitted = self.dedup is None or self.dedup.add_row(row)
+            if emitted:
+                yield row
+            if self.journal is not None:
+                self.journal.add_completed_url(self.run_id, url, emitted)
+
+    def _scrape_nested_items_sequentially(self,
+                                          urls: Iterable[str],
+                                          plan: ExtractionPlan) -> Generator[tuple[str, dict], None, None]:
+        for index, url in enumerate(urls):
+            if index >= self.config.max_rows:
+                break
+            self._get(self.crawler, url)
+            yield url, self._extract_current_page(plan, self.crawler)
+
+    def _scrape_nested_items_concurrently(self,
+                                          urls: Iterable[str],
+                                          plan: ExtractionPlan) -> Generator[tuple[str, dict], None, None]:
+        workers = self.config.concurrency
+        idle_crawlers: queue.Queue[BaseCrawler] = queue.Queue()
+        idle_crawlers.put(self.crawler)
+        created_crawlers: list[BaseCrawler] = []
+        lock = threading.Lock()
+
+        def acquire_crawler() -> BaseCrawler:
+            try:
+                return idle_crawlers.get_nowait()
+            except queue.Empty:
+                pass
+            with lock:
+                if len(created_crawlers) < workers - 1:
+                    crawler = self.crawler_factory()
+                    created_crawlers.append(crawler)
+                    return crawler
+            # There are never more running tasks than crawlers, so one is about to be released
+            return idle_crawlers.get()
+
+        def scrape_url(url: str) -> tuple[str, dict[str, Any]]:
+            crawler = acquire_crawler()
+            try:
+                self._get(crawler, url)
+                return url, self._extract_current_page(plan, crawler)
+            finally:
+                idle_crawlers.put(crawler)
+
+        urls_iter = iter(urls)
+        submitted = 0
+        # In ordered mode a slow page blocks the output, so keep more pages in flight
+        max_in_flight = 2 * workers if self.config.preserve_order else workers
+        executor = ThreadPoolExecutor(max_workers=workers)
+        pending: collections.deque[Future] = collections.deque()
+        try:
+            while True:
+                while len(pending) < max_in_flight and submitted < self.config.max_rows:
+                    url = next(urls_iter, None)
+                    if url is None:
+                        break
+                    pending.append(executor.submit(scrape_url, url))
+                    submitted += 1
+                if not pending:
+                    break
+                if self.config.preserve_order:
+                    yield pending.popleft().result()
+                else:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        pending.remove(future)
+                        yield future.result()
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+            for crawler in created_crawlers:
+                try:
+                    crawler.close()
+                except Exception as e:
+                    logger.exception(e)
+
+    def _scrape_nested_items_pipelined(self, urls: Iterable[str]) -> Generator[tuple[str, dict], None, None]:
+        """
+        Fetches pages in crawler threads and extracts fields in `config.parse_processes` processes at the same time.
+        Page sources go through a bounded queue: when parsers fall behind, crawlers wait,
+        so only a few pages per parser are kept in memory.
+        """
+        fetchers = self.config.concurrency if self.crawler_factory is not None else 1
+        max_in_flight = 2 * self.config.parse_processes
+        pages: queue.Queue = queue.Queue(maxsize=max_in_flight)
+        stop = threading.Event()
+        urls_iter = enumerate(itertools.islice(urls, self.config.max_rows))
+        lock = threading.Lock()
+        created_crawlers: list[BaseCrawler] = []
+
+        def put(item) -> bool:
+            while not stop.is_set():
+                try:
+                    pages.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+
+        def fetch(number: int):
+            try:
+                if number == 0:
+                    crawler = self.crawler
+                else:
+                    crawler = self.crawler_factory()
+                    with lock:
+                        created_crawlers.append(crawler)
+                while not stop.is_set():
+                    with lock:
+                        index, url = next(urls_iter, (None, None))
+                    if url is None:
+                        break
+                    self._get(crawler, url)
+                    # Unchanged pages are passed without the source, so that they are not parsed
+                    page_source = None if self.skip_unchanged and not crawler.page_changed else \
+                        self._get_page_source(crawler)
+                    if not put((index, url, page_source)):
+                        break
+            except Exception as e:
+                put(e)
+            finally:
+                put(None)
+
+        threads = [threading.Thread(target=fetch, args=(i,), name=f'scraperai-fetch-{i}', daemon=True)
+                   for i in range(fetchers)]
+        pool = ParsePool(self.config.fields, self.config.parse_processes)
+        pending: dict[Future, tuple[int, str]] = {}
+        # Extracted rows waiting for the previous pages, if order is preserved
+        ready: dict[int, tuple[str, dict]] = {}
+        next_index = 0
+        finished = 0
+        try:
+            for thread in threads:
+                thread.start()
+            while finished < fetchers or pending:
+                # Pages are taken only while parsers have capacity, otherwise the queue fills up and crawlers wait
+                while finished < fetchers and len(pending) < max_in_flight:
+                    try:
+                        item = pages.get(timeout=0.01 if pending else None)
+                    except queue.Empty:
+                        break
+                    if item is None:
+                        finished += 1
+                    elif isinstance(item, Exception):
+                        raise item
+                    elif item[2] is None:
+                        index, url, _ = item
+                        if self.config.preserve_order:
+                            ready[index] = (url, None)
+                        else:
+                            yield url, None
+                    else:
+                        index, url, page_source = item
+                        pending[pool.submit(page_source)] = (index, url)
+                while next_index in ready:
+                    yield ready.pop(next_index)
+                    next_index += 1
+                if not pending:
+                    continue
+                # Without new pages to take, wait for the parsers only
+                can_take = finished < fetchers and len(pending) < max_in_flight
+                done, _ = wait(pending, timeout=0.01 if can_take else None, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index, url = pending.pop(future)
+                    if self.config.preserve_order:
+                        ready[index] = (url, future.result())
+                    else:
+                        yield url, future.result()
+                while next_index in ready:
+                    yield ready.pop(next_index)
+                    next_index += 1
+        finally:
+            stop.set()
+            for thread in threads:
+                thread.join()
+            pool.close()
+            for crawler in created_crawlers:
+                try:
+                    crawler.close()
+                except Exception as e:
+                    logger.exception(e)
+
+    async def ascrape(self) -> AsyncGenerator[dict, None]:
+        """
+        Async version of `scrape` that requires an `AsyncBaseCrawler`.
+        Nested pages are fetched concurrently, up to `config.concurrency` at a time.
+        """
+        if not isinstance(self.crawler, AsyncBaseCrawler):
+            raise TypeError(f'ascrape requires AsyncBaseCrawler, got {type(self.crawler).__name__}')
+        self._start_timer()
+
+        if self.config.page_type == WebpageType.DETAILS:
+            if self.config.pagination.type == 'urls':
+                urls = self.config.pagination.urls
+            else:
+                urls = [self.config.start_url]
+            async for row in self.ascrape_nested_items(urls):
+                yield row
+        elif self.config.page_type == WebpageType.CATALOG:
+            if self.config.open_nested_pages:
+                urls = [url async for url in self.ascrape_nested_items_urls()]
+                async for row in self.ascrape_nested_items(urls):
+                    yield row
+            else:
+                async for row in self.ascrape_catalog_items():
+                    yield row
+        else:
+            logger.error(f'Unsupported page type: {self.config.page_type}')
+
+    async def ascrape_catalog_items(self) -> AsyncGenerator[dict, None]:
+        plan = ExtractionPlan(self.config.fields, select_context_node=True)
         total_count = 0
         page_number = 0
-        self.crawler.get(self.config.start_url)
+        await self.crawler.get(self.config.start_url)
         while True:
             count = 0
             tree = html.fromstring(self.crawler.page_source)
-            for node in tree.xpath(self.config.catalog_item.card_xpath):
-                n = html.fragment_fromstring(
-                    etree.tostring(node, pretty_print=False, method="html", encoding='unicode'),
-                    create_parent=True
-                )
-                data = extract_fields_from_tree(n, self.config.fields, select_context_node=True)
+            for data in plan.extract_items(tree, self.config.catalog_item.card_xpath):
                 count += 1
                 yield data
 
             total_count += count
             logger.debug(f'Page: {page_number}: Found {count} new items')
 
-            success = self.crawler.switch_page(self.config.pagination)
+            if self._is_time_over():
+                break
+            success = await self.crawler.switch_page(self.config.pagination)
             if not success:
                 break
 
@@ -62,24 +532,64 @@ class Scraper:
             if page_number >= self.config.max_pages or total_count >= self.config.max_rows:
                 break
 
-    def scrape_nested_items_urls(self) -> Generator[str, None, None]:
+    async def ascrape_nested_items_urls(self) -> AsyncGenerator[str, None]:
         page_number = 0
-        self.crawler.get(self.config.start_url)
+        await self.crawler.get(self.config.start_url)
         while True:
             tree = html.fromstring(self.crawler.page_source)
             for url in tree.xpath(self.config.catalog_item.url_xpath):
                 yield fix_relative_url(self.config.start_url, url)
 
-            success = self.crawler.switch_page(self.config.pagination)
+            if self._is_time_over():
+                break
+            success = await self.crawler.switch_page(self.config.pagination)
             if not success:
                 break
             page_number += 1
             if page_number >= self.config.max_pages:
                 break
 
-    def scrape_nested_items(self, urls: Iterable[str]) -> Generator[dict, None, None]:
-        for index, url in enumerate(urls):
-            if index >= self.config.max_rows:
-                break
-            self.crawler.get(url)
-            yield extract_fields_from_html(self.crawler.page_source, self.config.fields)
+    async def ascrape_nested_items(self, urls: Iterable[str]) -> AsyncGenerator[dict, None]:
+        plan = ExtractionPlan(self.config.fields)
+        workers = max(self.config.concurrency, 1)
+        semaphore = asyncio.Semaphore(workers)
+
+        async def scrape_url(url: str) -> dict[str, Any] | None:
+            async with semaphore:
+                with span('scraper.fetch', host=self._host):
+                    page_source = await self.crawler.fetch(url)
+            if self.skip_unchanged and not self.crawler.is_changed(url):
+                return None
+            return self._extract_page(plan, page_source)
+
+        urls_iter = iter(self._until_time_over(urls))
+        submitted = 0
+        max_in_flight = 2 * workers if self.config.preserve_order else workers
+        pending: collections.deque[asyncio.Task] = collections.deque()
+        try:
+            while True:
+                while len(pending) < max_in_flight and submitted < self.config.max_rows:
+                    url = next(urls_iter, None)
+                    if url is None:
+                        break
+                    pending.append(asyncio.ensure_future(scrape_url(url)))
+                    submitted += 1
+                if not pending:
+                    break
+                if self.config.preserve_order:
+                    rows = [await pending.popleft()]
+                else:
+                    done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        pending.remove(task)
+                    rows = [task.result() for task in done]
+                for row in rows:
+                    if row is None:
+                        self.unchanged_pages += 1
+                    else:
+                        yield row
+        finally:
+            for task in pending:
+                task.cancel()
+            # Cancelled fetches are awaited, so that they are cleaned up before the generator is closed
+            await asyncio.gather(*pending, return_exceptions=True)
@@ -1,9 +1,11 @@
 import json
 import logging
 import re
+from functools import lru_cache
+from html import escape
 from typing import Any
+from urllib.parse import quote
 
-import htmlmin
 import tiktoken
 from bs4 import BeautifulSoup
 from lxml import html, etree
@@ -19,6 +21,112 @@ BAD_TAGS = {
 GOOD_ATTRS = {
     'class', 'id', 'name', 'href', 'text', 'src'
 }
+DEFAULT_ENCODING_MODEL = 'gpt-4-turbo-2024-04-09'
+
+
+_PRE_TAGS = {'pre', 'textarea', 'script', 'style'}
+_RAW_TEXT_TAGS = {'script', 'style'}
+_URI_SAFE_CHARS = "-_.!~*'()@/:=?;#%&,+"
+_URI_ATTRS = ('href', 'src', 'action')
+_SPACES_RE = re.compile('[\x20\x09\x0a\x0c\x0d]+')
+_ALL_SPACES_RE = re.compile('^[\x20\x09\x0a\x0c\x0d]+$')
+_COMMENT_PATTERN = r'<!--[^-]*(?:-(?!->)[^-]*)*-->'
+_FULL_DOCUMENT_RE = re.compile(rf'^\s*(?:{_COMMENT_PATTERN}\s*)*(?:<!doctype[^>]*>\s*)?'
+                               rf'(?:{_COMMENT_PATTERN}\s*)*<html[\s>]', re.IGNORECASE)
+_DOCTYPE_RE = re.compile(rf'^\s*(?:{_COMMENT_PATTERN}\s*)*<!doctype', re.IGNORECASE)
+_XML_DECLARATION_RE = re.compile(r'^\s*<\?xml[^>]*>', re.IGNORECASE)
+_URI_PLACEHOLDER_RE = re.compile('__scraperai_uri_([0-9]+)__')
+
+
+def _minify_spaces(text: str | None, in_head: bool) -> str | None:
+    if text is None:
+        return None
+    if _ALL_SPACES_RE.match(text) and (in_head or '\n' in text or '\r' in text):
+        return None
+    return _SPACES_RE.sub(' ', text) or None
+
+
+def _remove_spaces(root) -> None:
+    """Collapses spaces the same way as `htmlmin.minify(remove_empty_space=True)` does"""
+    stack = [(root, False, False)]
+    while stack:
+        node, in_pre, in_head = stack.pop()
+        if isinstance(node.tag, str):
+            node_in_pre = in_pre or node.tag in _PRE_TAGS
+            node_in_head = in_head or node.tag == 'head'
+            if not node_in_pre:
+                node.text = _minify_spaces(node.text, node_in_head)
+                if node.tag == 'title' and node.text:
+                    node.text = node.text.strip() or None
+            for child in node:
+                stack.append((child, node_in_pre, node_in_head))
+        if not in_pre:
+            node.tail = _minify_spaces(node.tail, in_head)
+
+
+def _get_node_string(node) -> str | None:
+    """The same as BeautifulSoup `Tag.string`: text of the node if it has a single text descendant"""
+    while True:
+        if len(node) == 0:
+            return node.text
+        if len(node) > 1 or node.text:
+            return None
+        child = node[0]
+        if child.tail:
+            return None
+        if not isinstance(child.tag, str):
+            return child.text if child.tag is etree.Comment else None
+        node = child
+
+
+def _remove_empty_nodes(root) -> None:
+    # Nodes are checked bottom-up once instead of computing text of every subtree
+    has_text = {}
+    nodes = [node for node in root.iter() if isinstance(node.tag, str)]
+    for node in reversed(nodes):
+        value = bool(node.text and node.text.strip())
+        if not value:
+            for child in node:
+                if has_text.get(child, False) or (child.tail and child.tail.strip()):
+                    value = True
+                    break
+        has_text[node] = value
+    stack = list(root)
+    while stack:
+        node = stack.pop()
+        if not isinstance(node.tag, str):
+            continue
+        if has_text[node]:
+            stack.extend(node)
+        else:
+            node.drop_tree()
+
+
+def _serialize_minified(root, is_document: bool, doctype: str | None) -> str:
+    # libxml2 percent-encodes non-ascii characters and spaces in href/src/action attributes.
+    # Replace such values with placeholders to keep them as is
+    uri_values = []
+    for node in root.iter():
+        if not isinstance(node.tag, str):
+            continue
+        for attr in _URI_ATTRS:
+            value = node.get(attr)
+            if value is not None and (not value.isascii() or ' ' in value):
+                node.set(attr, f'__scraperai_uri_{len(uri_values)}__')
+                uri_values.append(value)
+
+    if is_document:
+        # lxml always adds doctype, so it is taken from the source. Comments before <html> are kept
+        result = doctype or ''
+        result += ''.join(etree.tostring(node, method='html', encoding='unicode')
+                          for node in reversed(list(root.itersiblings(preceding=True))))
+        result += etree.tostring(root, method='html', encoding='unicode')
+    else:
+        result = (root.text or '') + ''.join(etree.tostring(node, method='html', encoding='unicode') for node in root)
+
+    if uri_values:
+        result = _URI_PLACEHOLDER_RE.sub(lambda m: escape(uri_values[int(m.group(1))], quote=True), result)
+    return result
 
 
 def minify_html(html_content: str,
@@ -26,51 +134,78 @@ def minify_html(html_content: str,
                 bad_tags: set[str] = None,
                 use_substituions: bool = True,
                 remove_empty_tags: bool = False) -> tuple[str, dict[str, str]]:
+    """
+    Minifies HTML in a single lxml pass: collapses spaces, removes bad tags and attributes,
+    substitutes long texts of <p> and <cite> and optionally removes nodes without text.
+
+    Args:
+        html_content (str): HTML document or fragment.
+        good_attrs (set[str]): attributes to keep.
+        bad_tags (set[str]): tags to remove with their content.
+        use_substituions (bool): replace texts longer than 100 chars with ids.
+        remove_empty_tags (bool): remove nodes without text.
+
+    Returns:
+        tuple[str, dict[str, str]]: minified HTML and substitutions (id -> original text).
+    """
     if good_attrs is None:
         good_attrs = GOOD_ATTRS
     if bad_tags is None:
         bad_tags = BAD_TAGS
 
-    # Remove spaces and new lines
-    html_content = htmlmin.minify(str(BeautifulSoup(html_content, "html.parser")), remove_empty_space=True)
     logger.debug(f'Initial HTML length: {len(html_content)}')
+    # lxml does not accept unicode strings with encoding declaration
+    html_content = _XML_DECLARATION_RE.sub('', html_content, count=1)
+    is_document = _FULL_DOCUMENT_RE.match(html_content) is not None
+    if is_document:
+        root = html.document_fromstring(html_content)
+        doctype = root.getroottree().docinfo.doctype if _DOCTYPE_RE.match(html_content) else None
+    else:
+        root = html.fragment_fromstring(html_content, create_parent='div')
+        doctype = None
+
+    # Remove spaces and new lines
+    _remove_spaces(root)
     # Remove bad tags
-    soup = BeautifulSoup(html_content, "html.parser")
-    for tag in bad_tags:
-        [x.extract() for x in soup.find_all(tag)]
+    for node in list(root.iter(*bad_tags)):
+        node.drop_tree()
     # Remove bad attributes
-    all_attrs = set()
-    for tag in soup():
-        for attr in tag.attrs:
-            all_attrs.add(attr)
-    bad_attrs = all_attrs.difference(good_attrs)
-    for tag in soup():
-        for attribute in bad_attrs:
-            del tag[attribute]
+    for node in root.iter():
+        if isinstance(node.tag, str):
+            for attr in node.attrib.keys():
+                if attr not in good_attrs:
+                    del node.attrib[attr]
     # Substitute texts
     index = 0
     substituions = {}
     if use_substituions:
-        for p in soup.find_all('p') + soup.find_all('cite'):
-            if len(str(p.string)) > 100:
+        for node in list(root.iter('p')) + list(root.iter('cite')):
+            text = str(_get_node_string(node))
+            if len(text) > 100:
                 _id = f'my_text_{index}'
-                substituions[_id] = str(p.string)
-                p.string = _id
+                substituions[_id] = text
+                for child in list(node):
+                    node.remove(child)
+                node.text = _id
                 index += 1
     # Remove empty tags
     if remove_empty_tags:
-        for tag in soup.find_all():
-            if tag.text.strip() == '':
-                tag.extract()
-    logger.debug(f'Final html length: {len(str(soup))}')
-    return str(soup), substituions
+        _remove_empty_nodes(root)
+
+    html_content = _serialize_minified(root, is_document, doctype)
+    logger.debug(f'Final html length: {len(html_content)}')
+    return html_content, substituions
+
+
+def _get_pretty_text(text: str) -> str:
+    text = text.strip()
+    while '\n\n' in text:
+        text = text.replace("\n\n", "\n")
+    return text
 
 
 def get_pretty_html_text(node: BeautifulSoup) -> str:
-    t = node.text.strip()
-    while '\n\n' in t:
-        t = t.replace("\n\n", "\n")
-    return t
+    return _get_pretty_text(node.text)
 
 
 class HtmlPart(BaseModel):
@@ -87,46 +222,115 @@ class HtmlPart(BaseModel):
         return self.__str__()
 
 
+@lru_cache(maxsize=None)
+def get_encoding(model_name: str = DEFAULT_ENCODING_MODEL) -> Encoding:
+    """Returns tiktoken encoding for the model. Encodings are loaded once per process"""
+    return tiktoken.encoding_for_model(model_name)
+
+
+def _get_attribute(node, name: str, value: str) -> str:
+    if name in _URI_ATTRS or (name == 'name' and node.tag == 'a'):
+        # libxml2 escapes URI attributes when serializing html
+        value = quote(value.lstrip(), safe=_URI_SAFE_CHARS)
+    return f' {name}="{escape(value)}"'
+
+
+def _get_start_tag(node) -> str:
+    attrs = ''.join(_get_attribute(node, name, value) for name, value in node.items())
+    return f'<{node.tag}{attrs}>'
+
+
+def _count_tokens(tree, encoding: Encoding) -> dict[Any, tuple[int, int]]:
+    """
+    Computes html and text token counts of every node (including its tail) bottom-up.
+
+    Each piece of markup and text is encoded only once and the sizes of the children are summed into
+    their parents, so the result approximates encoding every serialized node separately.
+    """
+    nodes = list(tree.iter())
+    html_fragments, html_owners = [], []
+    text_fragments, text_owners = [], []
+
+    def add_html(i: int, fragment: str | None) -> None:
+        if fragment:
+            html_fragments.append(fragment)
+            html_owners.append(i)
+
+    def add_text(i: int, fragment: str | None) -> None:
+        if fragment and not fragment.isspace():
+            text_fragments.append(fragment.strip())
+            text_owners.append(i)
+
+    for i, node in enumerate(nodes):
+        if isinstance(node.tag, str):
+            add_html(i, _get_start_tag(node))
+            if node.text:
+                add_html(i, node.text if node.tag in _RAW_TEXT_TAGS else escape(node.text, quote=False))
+                add_text(i, node.text)
+            if node.tag not in html.defs.empty_tags or len(node) or node.text:
+                add_html(i, f'</{node.tag}>')
+        else:
+            # Comments and processing instructions do not contribute to the text
+            add_html(i, etree.tostring(node, method='html', encoding='unicode', with_tail=False))
+        if node.tail:
+            add_html(i, escape(node.tail, quote=False))
+            add_text(i, node.tail)
+
+    html_sizes = [0] * len(nodes)
+    text_sizes = [0] * len(nodes)
+    for i, fragment in zip(html_owners, html_fragments):
+        html_sizes[i] += len(encoding.encode_ordinary(fragment))
+    for i, fragment in zip(text_owners, text_fragments):
+        text_sizes[i] += len(encoding.encode_ordinary(fragment))
+
+    index = {node: i for i, node in enumerate(nodes)}
+    for i in range(len(nodes) - 1, 0, -1):
+        j = index[nodes[i].getparent()]
+        html_sizes[j] += html_sizes[i]
+        text_sizes[j] += text_sizes[i]
+    return {node: (html_sizes[i], text_sizes[i]) for i, node in enumerate(nodes)}
+
+
 def split_html(html_content: str, *,
                max_html_size: int = None,
                max_text_size: int = None,
                encoding: Encoding = None) -> list[HtmlPart]:
+    """
+    Splits html into the largest parts whose html or text size in tokens is below the limit.
+
+    Token counts are computed once for the whole document, see `_count_tokens`.
+    """
     if encoding is None:
-        encoding = tiktoken.encoding_for_model('gpt-4-turbo-2024-04-09')
+        encoding = get_encoding()
     if max_html_size is not None and max_text_size is not None:
         raise ValueError('One of max_html_size, max_text_size should be None')
-    elif max_text_size is None and max_text_size is None:
+    elif max_html_size is None and max_text_size is None:
         raise ValueError('One of max_html_size, max_text_size should not be None')
     max_target_size = max_html_size or max_text_size or 0
 
-    def get_text_size(text: str) -> int:
-        return len(encoding.encode(text))
-
     tree = html.fromstring(html_content)
-    pieces = []
+    sizes = _count_tokens(tree, encoding)
+    root_tree = tree.getroottree()
 
-    def traverse(node):
-        content = etree.tostring(node, pretty_print=False, method="html", encoding='unicode')
-        soup = BeautifulSoup(content, 'html.parser')
-        text = get_pretty_html_text(soup)
-        html_size = get_text_size(content)
-        text_size = get_text_size(text)
+    pieces = []
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        html_size, text_size = sizes[node]
         current_piece_size = html_size if max_html_size else text_size
         if current_piece_size <= 3:
             pass
         elif current_piece_size <= max_target_size:
+            text = etree.tostring(node, method='text', encoding='unicode') if isinstance(node.tag, str) else node.tail
             pieces.append(HtmlPart(
-                xpath=node.getroottree().getpath(node),
+                xpath=root_tree.getpath(node),
                 html_size=html_size,
                 text_size=text_size,
-                html_content=content,
-                text_content=text
+                html_content=etree.tostring(node, pretty_print=False, method="html", encoding='unicode'),
+                text_content=_get_pretty_text(text or '')
             ))
         else:
-            for child in node.getchildren():
-                traverse(child)
-
-    traverse(tree)
+            stack.extend(reversed(node.getchildren()))
     return pieces
 
 
@@ -165,8 +369,14 @@ def get_node_text(node) -> str:
     return text
 
 
-def extract_field_by_xpath(tree, xpath: str, multiple: bool | None = None) -> Any:
-    nodes = tree.xpath(xpath)
+def _evaluate_xpath(tree, xpath: str | etree.XPath) -> list:
+    if isinstance(xpath, etree.XPath):
+        return xpath(tree)
+    return tree.xpath(xpath)
+
+
+def extract_field_by_xpath(tree, xpath: str | etree.XPath, multiple: bool | None = None) -> Any:
+    nodes = _evaluate_xpath(tree, xpath)
     nodes = [get_node_text(node) for node in nodes]
     if len(nodes) == 0:
         return None
@@ -181,8 +391,8 @@ def extract_field_by_xpath(tree, xpath: str, multiple: bool | None = None) -> An
         return nodes[0]
 
 
-def extract_dynamic_fields_by_xpath(name_xpath: str,
-                                    value_xpath: str,
+def extract_dynamic_fields_by_xpath(name_xpath: str | etree.XPath,
+                                    value_xpath: str | etree.XPath,
                                     *,
                                     html_content: str = None,
                                     tree=None) -> dict[str, str]:
@@ -190,9 +400,11 @@ def extract_dynamic_fields_by_xpath(name_xpath: str,
         tree = html.fromstring(html_content)
     elif tree is None:
         raise ValueError('One of `html_content` or `tree` should not be None')
-    labels = list(tree.xpath(name_xpath))
-    values = list(tree.xpath(value_xpath))
+    labels = list(_evaluate_xpath(tree, name_xpath))
+    values = list(_evaluate_xpath(tree, value_xpath))
     if len(labels) != len(values):
+        name_xpath = getattr(name_xpath, 'path', name_xpath)
+        value_xpath = getattr(value_xpath, 'path', value_xpath)
         raise ValueError(f'Labels and values are of different size ({len(labels)} != {len(values)}) '
                          f'for name_xpath={name_xpath} value_xpath={value_xpath}')
     return {get_node_text(key).strip(): get_node_text(value).strip() for key, value in zip(labels, values)}
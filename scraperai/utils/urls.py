@@ -1,4 +1,10 @@
-from urllib.parse import urlparse, urlencode, parse_qs, urlunparse
+from urllib.parse import urlparse, urlencode, parse_qs, urlunparse, parse_qsl
+
+TRACKING_PARAMS = {
+    'gclid', 'gclsrc', 'dclid', 'fbclid', 'yclid', 'msclkid', 'mc_cid', 'mc_eid', '_openstat', '_ga', '_gl',
+}
+TRACKING_PARAMS_PREFIXES = ('utm_',)
+DEFAULT_PORTS = {'http': 80, 'https': 443}
 
 
 def fix_relative_url(base_url: str, url: str) -> str:
@@ -33,3 +39,24 @@ def add_or_replace_url_param(url: str, param_name: str, param_value: str | int)
     url_parts = list(url_parts)
     url_parts[4] = urlencode(query, doseq=True)
     return urlunparse(url_parts)
+
+
+def is_tracking_param(param_name: str) -> bool:
+    param_name = param_name.lower()
+    return param_name in TRACKING_PARAMS or param_name.startswith(TRACKING_PARAMS_PREFIXES)
+
+
+def normalize_url(url: str) -> str:
+    """
+    Normalizes the URL to compare URLs of the same page: lowercases scheme and host, removes default port,
+    fragment and tracking query parameters (utm_*, gclid, etc.) and sorts the remaining query parameters.
+    """
+    url_parts = urlparse(url.strip())
+    scheme = url_parts.scheme.lower()
+    netloc = url_parts.netloc.lower()
+    if url_parts.port is not None and DEFAULT_PORTS.get(scheme) == url_parts.port:
+        netloc = netloc.rsplit(':', 1)[0]
+    path = url_parts.path or '/'
+    query = sorted((name, value) for name, value in parse_qsl(url_parts.query, keep_blank_values=True)
+                   if not is_tracking_param(name))
+    return urlunparse((scheme, netloc, path, url_parts.params, urlencode(query), ''))
@@ -0,0 +1,240 @@
+import csv
+import json
+import logging
+import os
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, Iterable, Generator
+
+logger = logging.getLogger('scraperai')
+
+
+def _to_string(value: Any) -> str | None:
+    if value is None or isinstance(value, str):
+        return value
+    return json.dumps(value, ensure_ascii=False, default=str)
+
+
+class BaseWriter(ABC):
+    """
+    Writes scraped rows to a file incrementally, so that rows are not kept in memory.
+
+    Data is flushed to disk every `flush_every` rows and when the writer is closed.
+    """
+
+    def __init__(self, path: str | Path, flush_every: int = 100):
+        self.path = str(path)
+        self.flush_every = flush_every
+        self.rows_written = 0
+
+    @abstractmethod
+    def _write(self, row: dict) -> None:
+        ...
+
+    @abstractmethod
+    def flush(self) -> None:
+        ...
+
+    @abstractmethod
+    def close(self) -> None:
+        ...
+
+    def write(self, row: dict) -> None:
+        self._write(row)
+        self.rows_written += 1
+        if self.rows_written % self.flush_every == 0:
+            self.flush()
+
+    def write_rows(self, rows: Iterable[dict]) -> int:
+        """Writes all rows, e.g. from `Scraper.scrape()`. Returns the number of written rows"""
+        count = 0
+        for row in rows:
+            self.write(row)
+            count += 1
+        return count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __str__(self) -> str:
+        return f'{type(self).__name__}(path={self.path}, rows_written={self.rows_written})'
+
+
+class JsonLinesWriter(BaseWriter):
+    """Writes one JSON object per line. Rows written before a crash can be read with `read_json_lines`"""
+
+    def __init__(self, path: str | Path, flush_every: int = 100):
+        super().__init__(path, flush_every)
+        self._file = open(self.path, 'w', encoding='utf-8')
+
+    def _write(self, row: dict) -> None:
+        self._file.write(json.dumps(row, ensure_ascii=False, default=str) + '\n')
+
+    def flush(self) -> None:
+        self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class JsonWriter(BaseWriter):
+    """Writes rows as a JSON array. The file is a valid JSON only after the writer is closed"""
+
+    def __init__(self, path: str | Path, flush_every: int = 100, indent: int | None = 4):
+        super().__init__(path, flush_every)
+        self.indent = indent
+        self._file = open(self.path, 'w', encoding='utf-8')
+        self._file.write('[')
+
+    def _write(self, row: dict) -> None:
+        if self.rows_written > 0:
+            self._file.write(',')
+        dumped = json.dumps(row, ensure_ascii=False, indent=self.indent, default=str)
+        if self.indent is not None:
+            dumped = '\n' + '\n'.join(' ' * self.indent + line for line in dumped.split('\n'))
+        self._file.write(dumped)
+
+    def flush(self) -> None:
+        self._file.flush()
+
+    def close(self) -> None:
+        if self._file.closed:
+            return
+        self._file.write('\n]' if self.indent is not None and self.rows_written else ']')
+        self._file.close()
+
+
+class CsvWriter(BaseWriter):
+    """
+    Writes rows to CSV. Columns are discovered from rows: when a row has new columns,
+    the file is rewritten once with the extended header. Lists and dicts are written as JSON.
+    """
+
+    def __init__(self, path: str | Path, flush_every: int = 100, **fmtparams):
+        super().__init__(path, flush_every)
+        self.fmtparams = fmtparams
+        self.columns: list[str] = []
+        self._file = None
+        self._writer = None
+
+    def _open(self, mode: str) -> None:
+        self._file = open(self.path, mode, encoding='utf-8', newline='')
+        self._writer = csv.DictWriter(self._file, fieldnames=self.columns, restval='', **self.fmtparams)
+
+    def _add_columns(self, new_columns: list[str]) -> None:
+        self.columns = self.columns + new_columns
+        if self._file is None:
+            self._open('w')
+            self._writer.writeheader()
+            return
+
+        logger.debug(f'Rewriting {self.path} with new columns: {new_columns}')
+        self._file.close()
+        tmp_path = self.path + '.tmp'
+        with open(self.path, 'r', encoding='utf-8', newline='') as src, \
+                open(tmp_path, 'w', encoding='utf-8', newline='') as dst:
+            reader = csv.DictReader(src, **self.fmtparams)
+            writer = csv.DictWriter(dst, fieldnames=self.columns, restval='', **self.fmtparams)
+            writer.writeheader()
+            writer.writerows(reader)
+        os.replace(tmp_path, self.path)
+        self._open('a')
+
+    def _write(self, row: dict) -> None:
+        new_columns = [column for column in row if column not in self.columns]
+        if new_columns or self._file is None:
+            self._add_columns(new_columns)
+        self._writer.writerow({key: _to_string(value) for key, value in row.items()})
+
+    def flush(self) -> None:
+        if self._file is not None:
+            self._file.flush()
+
+    def close(self) -> None:
+        if self._file is None:
+            # Create an empty file, as other writers do
+            open(self.path, 'w').close()
+        else:
+            self._file.close()
+
+
+class ParquetWriter(BaseWriter):
+    """
+    Writes rows to Parquet in row groups of `row_group_size` rows. Requires `pyarrow`.
+
+    Parquet schema can not be changed, so columns are taken from the first row group and columns
+    that appear later are dropped with a warning. All values are written as strings.
+    """
+
+    def __init__(self, path: str | Path, row_group_size: int = 10_000):
+        super().__init__(path, flush_every=row_group_size)
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise ImportError('pyarrow is required to write Parquet files. Install it with `pip install pyarrow`')
+        self._pa = pyarrow
+        self._pq = pyarrow.parquet
+        self.columns: list[str] = []
+        self._rows: list[dict] = []
+        self._writer = None
+        self._dropped_columns: set[str] = set()
+
+    def _write(self, row: dict) -> None:
+        self._rows.append(row)
+
+    def flush(self) -> None:
+        if not self._rows:
+            return
+        if self._writer is None:
+            for row in self._rows:
+                self.columns += [column for column in row if column not in self.columns]
+            schema = self._pa.schema([(column, self._pa.string()) for column in self.columns])
+            self._writer = self._pq.ParquetWriter(self.path, schema)
+
+        dropped_columns = {column for row in self._rows for column in row} - set(self.columns)
+        if dropped_columns - self._dropped_columns:
+            logger.warning(f'Columns {dropped_columns - self._dropped_columns} are not in Parquet schema '
+                           f'and will be dropped')
+            self._dropped_columns |= dropped_columns
+        table = self._pa.table({
+            column: [_to_string(row.get(column)) for row in self._rows] for column in self.columns
+        }, schema=self._writer.schema)
+        self._writer.write_table(table)
+        self._rows = []
+
+    def close(self) -> None:
+        self.flush()
+        if self._writer is not None:
+            self._writer.close()
+        else:
+            self._pq.write_table(self._pa.table({}), self.path)
+
+
+WRITERS = {
+    'jsonl': JsonLinesWriter,
+    'json': JsonWriter,
+    'csv': CsvWriter,
+    'parquet': ParquetWriter,
+}
+
+
+def create_writer(path: str | Path, output_format: str = None) -> BaseWriter:
+    """Creates a writer by the output format or by the file extension"""
+    output_format = output_format or Path(path).suffix.lstrip('.')
+    if output_format not in WRITERS:
+        raise ValueError(f'Unsupported output format: {output_format}. Should be one of {list(WRITERS)}')
+    return WRITERS[output_format](path)
+
+
+def read_json_lines(path: str | Path) -> Generator[dict, None, None]:
+    """Reads rows written by `JsonLinesWriter`. A partially written last line is skipped"""
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                logger.warning(f'Skipping malformed line in {path}')
@@ -24,6 +24,12 @@ setup(
     package_dir={'scraperai': 'scraperai'},
     include_package_data=True,
     install_requires=requirements,
+    extras_require={
+        'parquet': ['pyarrow'],
+        'opentelemetry': ['opentelemetry-api'],
+        'prometheus': ['prometheus-client'],
+        'zstd': ['zstandard'],
+    },
     entry_points={
         'console_scripts': [
             'scraperai = scraperai.cli.app:main',
@@ -0,0 +1,42 @@
+import threading
+from typing import Callable
+
+from langchain_core.messages import BaseMessage
+
+from scraperai.llm.base import BaseJsonLM, BaseVision, BasePythonCodeLM, _Dict
+
+
+class FakeJsonLM(BaseJsonLM):
+    """Returns responses built by `respond` from the messages and counts calls"""
+
+    def __init__(self, respond: Callable[[list[BaseMessage]], _Dict], cost_per_call: float = 0.01):
+        self.respond = respond
+        self.cost_per_call = cost_per_call
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    @property
+    def total_cost(self) -> float:
+        return self.calls * self.cost_per_call
+
+    def invoke(self, messages: list[BaseMessage]) -> _Dict:
+        with self._lock:
+            self.calls += 1
+        return self.respond(messages)
+
+
+class FakeVision(BaseVision):
+    def __init__(self, response: str = 'catalog'):
+        self.response = response
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def invoke(self, messages: list[BaseMessage]) -> str:
+        with self._lock:
+            self.calls += 1
+        return self.response
+
+
+class FakePythonCodeLM(BasePythonCodeLM):
+    def invoke(self, messages: list[BaseMessage]) -> str:
+        return 'print("Hello")'
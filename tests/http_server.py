@@ -0,0 +1,43 @@
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Callable
+
+
+class LocalServer:
+    """
+    Serves GET requests with `handle(request)` on a free local port in a background thread.
+    Connections are kept alive with `protocol_version='HTTP/1.1'`
+    """
+
+    def __init__(self, handle: Callable[[BaseHTTPRequestHandler], None], protocol_version: str = 'HTTP/1.0'):
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                handle(self)
+
+            def log_message(self, format, *args):
+                pass
+
+        Handler.protocol_version = protocol_version
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def close(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def send(request: BaseHTTPRequestHandler, status: int, body: bytes = b'', headers: dict[str, str] = None) -> None:
+    request.send_response(status)
+    for name, value in (headers or {}).items():
+        request.send_header(name, value)
+    # Responses without a length would end only when a keep-alive connection is closed
+    if status not in (204, 304):
+        request.send_header('Content-Length', str(len(body)))
+    request.end_headers()
+    request.wfile.write(body)
@@ -0,0 +1,101 @@
+import asyncio
+import gzip
+import unittest
+from http.server import BaseHTTPRequestHandler
+
+from scraperai import AsyncHttpCrawler, Scraper
+from scraperai.models import ScraperConfig, Pagination, WebpageFields, StaticField, WebpageType, CatalogItem
+
+from .http_server import LocalServer, send
+
+
+class FixtureServer(LocalServer):
+    """Serves a catalog and its items over keep-alive connections and records addresses of clients"""
+
+    def __init__(self):
+        self.connections = set()
+        super().__init__(self.handle, protocol_version='HTTP/1.1')
+
+    def handle(self, request: BaseHTTPRequestHandler) -> None:
+        self.connections.add(request.client_address)
+        if request.path == '/catalog':
+            links = ''.join(f'<div class="card"><a href="/items/{i}">Item {i}</a></div>' for i in range(20))
+            body = f'<html><body>{links}</body></html>'.encode()
+        elif request.path.startswith('/items/'):
+            item_id = request.path.split('/')[-1]
+            body = f'<html><body><h1>Item {item_id}</h1></body></html>'.encode()
+        else:
+            send(request, 404, b'Not found')
+            return
+        headers = {'Content-Type': 'text/html; charset=utf-8'}
+        if 'gzip' in request.headers.get('Accept-Encoding', ''):
+            body = gzip.compress(body)
+            headers['Content-Encoding'] = 'gzip'
+        send(request, 200, body, headers)
+
+
+class TestAsyncHttpCrawler(unittest.IsolatedAsyncioTestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = FixtureServer()
+        cls.base_url = cls.server.url
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.close()
+
+    async def test_fetch_reuses_connections(self):
+        self.server.connections.clear()
+        async with AsyncHttpCrawler(max_connections_per_host=2) as crawler:
+            for i in range(10):
+                page_source = await crawler.fetch(f'{self.base_url}/items/{i}')
+                self.assertIn(f'Item {i}', page_source)
+        self.assertEqual(len(self.server.connections), 1)
+
+    async def test_pagination_urls(self):
+        pagination = Pagination(type='urls', urls=[f'{self.base_url}/items/1', f'{self.base_url}/items/2'])
+        async with AsyncHttpCrawler() as crawler:
+            await crawler.get(f'{self.base_url}/catalog')
+            self.assertIn('Item 19', crawler.page_source)
+            self.assertTrue(await crawler.switch_page(pagination))
+            self.assertIn('Item 1', crawler.page_source)
+            self.assertTrue(await crawler.switch_page(pagination))
+            self.assertFalse(await crawler.switch_page(pagination))
+
+    def make_config(self) -> ScraperConfig:
+        return ScraperConfig(
+            start_url=f'{self.base_url}/catalog',
+            page_type=WebpageType.CATALOG,
+            pagination=Pagination(type='none'),
+            catalog_item=CatalogItem(card_xpath='//div[@class="card"]',
+                                     url_xpath='//div[@class="card"]/a/@href',
+                                     html_snippet='',
+                                     urls_on_page=[]),
+            open_nested_pages=True,
+            fields=WebpageFields(
+                static_fields=[StaticField(field_name='title', field_xpath='//h1/text()')],
+                dynamic_fields=[]
+            ),
+            max_pages=1,
+            max_rows=15,
+            concurrency=4,
+            preserve_order=True
+        )
+
+    async def test_ascrape_nested_pages(self):
+        async with AsyncHttpCrawler() as crawler:
+            rows = [row async for row in Scraper(self.make_config(), crawler).ascrape()]
+        self.assertEqual(rows, [{'title': f'Item {i}'} for i in range(15)])
+
+    async def test_close_ascrape_nested_items(self):
+        async with AsyncHttpCrawler() as crawler:
+            rows = Scraper(self.make_config(), crawler).ascrape_nested_items(
+                [f'{self.base_url}/items/{i}' for i in range(15)])
+            self.assertEqual(await anext(rows), {'title': 'Item 0'})
+            await rows.aclose()
+            # Fetches in flight are cancelled and finished when the generator is closed
+            self.assertEqual(asyncio.all_tasks() - {asyncio.current_task()}, set())
+
+
+if __name__ == '__main__':
+    unittest.main()
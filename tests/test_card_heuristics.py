@@ -0,0 +1,70 @@
+import unittest
+from pathlib import Path
+
+from lxml import html
+
+from scraperai.parsers import CatalogItemDetector
+from scraperai.parsers.card_heuristics import detect_catalog_item_heuristically
+
+from .fakes import FakeJsonLM
+from .test_prompt_compression import ENCODING
+
+DATA_DIR = Path(__file__).parent / 'data'
+
+
+def make_grid_page(rows: int, cards_per_row: int) -> str:
+    menu = ''.join(f'<li class="menu-item"><a href="/section/{i}">Section {i}</a></li>' for i in range(8))
+    grid = ''.join(
+        '<div class="row">' + ''.join(
+            f'<div class="product product--{"sale" if i % 3 == 0 else "regular"}">'
+            f'<a href="/items/{row * cards_per_row + i}"><img src="/images/{i}.jpg"></a>'
+            f'<a class="title" href="/items/{row * cards_per_row + i}">Item {row * cards_per_row + i}</a>'
+            f'<span class="price">{i * 10} USD</span><button>Buy</button></div>'
+            for i in range(cards_per_row)
+        ) + '</div>'
+        for row in range(rows)
+    )
+    return (f'<html><body><nav><ul>{menu}</ul></nav><div class="grid">{grid}</div>'
+            f'<ul class="footer-links">{menu}</ul></body></html>')
+
+
+class TestCardHeuristics(unittest.TestCase):
+    def test_grid_of_cards(self):
+        item = detect_catalog_item_heuristically(make_grid_page(rows=5, cards_per_row=4))
+        self.assertEqual(item.card_xpath,
+                         '//div[contains(concat(" ", normalize-space(@class), " "), " product ")]')
+        self.assertEqual(item.urls_on_page, [f'/items/{i}' for i in range(20)])
+        self.assertGreater(item.confidence, 0.7)
+        self.assertIn('Item 0', item.html_snippet)
+
+    def test_ozon_catalog_page(self):
+        item = detect_catalog_item_heuristically((DATA_DIR / 'ozon_catalog_page.html').read_text())
+        self.assertEqual(item.card_xpath, '//div[@class="vi6 v6i"]')
+        self.assertEqual(len(item.urls_on_page), 36)
+        self.assertGreater(item.confidence, 0.7)
+
+    def test_details_page(self):
+        item = detect_catalog_item_heuristically((DATA_DIR / 'ozon_detail_page_relevant.html').read_text())
+        self.assertLess(item.confidence, 0.7)
+        self.assertIsNone(detect_catalog_item_heuristically(tree=html.fromstring('<p><a href="/">Home</a></p>')))
+
+
+class TestCatalogItemDetectorFallback(unittest.TestCase):
+    def test_llm_is_not_called_when_confident(self):
+        model = FakeJsonLM(lambda messages: {})
+        item = CatalogItemDetector(model).detect_catalog_item(make_grid_page(rows=3, cards_per_row=4))
+        self.assertEqual(model.calls, 0)
+        self.assertEqual(len(item.urls_on_page), 12)
+
+    def test_llm_fallback(self):
+        model = FakeJsonLM(lambda messages: {'card': '//div[@class="b2"]', 'url': None})
+        detector = CatalogItemDetector(model)
+        detector.encoding = ENCODING
+        item = detector.detect_catalog_item((DATA_DIR / 'ozon_detail_page_relevant.html').read_text())
+        self.assertEqual(model.calls, 1)
+        self.assertEqual(item.card_xpath, '//div[@class="b2"]')
+        self.assertIsNone(item.confidence)
+
+
+if __name__ == '__main__':
+    unittest.main()
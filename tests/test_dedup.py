@@ -0,0 +1,65 @@
+import tempfile
+import unittest
+
+from scraperai.dedup import MemoryDedupStore, SqliteDedupStore, BloomDedupStore, Deduplicator
+from scraperai.utils.urls import normalize_url
+
+
+class TestNormalizeUrl(unittest.TestCase):
+    def test_normalize_url(self):
+        self.assertEqual(normalize_url('HTTPS://Example.com:443/items?b=2&a=1&utm_source=x&gclid=1#reviews'),
+                         'https://example.com/items?a=1&b=2')
+        self.assertEqual(normalize_url('http://example.com'), 'http://example.com/')
+        self.assertEqual(normalize_url('http://example.com:8080/items?page=1'), 'http://example.com:8080/items?page=1')
+        self.assertNotEqual(normalize_url('https://example.com/items?page=1'),
+                            normalize_url('https://example.com/items?page=2'))
+
+
+class TestDedupStores(unittest.TestCase):
+    def check_store(self, store):
+        self.assertTrue(store.add('a'))
+        self.assertTrue(store.add('b'))
+        self.assertFalse(store.add('a'))
+
+    def test_memory_store(self):
+        store = MemoryDedupStore()
+        self.check_store(store)
+        self.assertEqual(len(store), 2)
+
+    def test_sqlite_store(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = f'{tmp_dir}/dedup.sqlite3'
+            with SqliteDedupStore(path, commit_every=1) as store:
+                self.check_store(store)
+            # Keys are kept between runs
+            with SqliteDedupStore(path) as store:
+                self.assertFalse(store.add('b'))
+                self.assertEqual(len(store), 2)
+
+    def test_bloom_store(self):
+        store = BloomDedupStore(capacity=10_000, error_rate=0.01)
+        self.check_store(store)
+        false_positives = sum(not store.add(f'key-{i}') for i in range(10_000))
+        self.assertLess(false_positives, 200)
+        self.assertTrue(all(not store.add(f'key-{i}') for i in range(10_000)))
+
+
+class TestDeduplicator(unittest.TestCase):
+    def test_skipped_counts(self):
+        dedup = Deduplicator()
+        self.assertTrue(dedup.add_url('https://example.com/items/1?utm_medium=email'))
+        self.assertFalse(dedup.add_url('https://example.com/items/1#description'))
+        self.assertTrue(dedup.add_row({'title': 'Item 1', 'price': 10}))
+        self.assertFalse(dedup.add_row({'price': 10, 'title': 'Item 1'}))
+        self.assertTrue(dedup.add_row({'title': 'Item 1', 'price': 20}))
+        self.assertEqual((dedup.skipped_urls, dedup.skipped_rows, dedup.skipped), (1, 1, 2))
+
+    def test_disabled_rows(self):
+        dedup = Deduplicator(rows=False)
+        self.assertTrue(dedup.add_row({'title': 'Item 1'}))
+        self.assertTrue(dedup.add_row({'title': 'Item 1'}))
+        self.assertEqual(dedup.skipped, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import email.utils
+import tempfile
+import time
+import unittest
+
+from scraperai.crawlers import RequestsCrawler
+from scraperai.crawlers.ratelimit import HostRateLimiter, SQLiteBackend, parse_retry_after
+
+from .http_server import LocalServer, send
+
+
+class TestHostRateLimiter(unittest.TestCase):
+    def test_token_bucket(self):
+        limiter = HostRateLimiter(requests_per_second=10, burst=3, respect_robots=False)
+        delays = [limiter.reserve('https://example.com/') for _ in range(5)]
+        self.assertEqual(delays[:3], [0.0, 0.0, 0.0])
+        self.assertAlmostEqual(delays[3], 0.1, delta=0.01)
+        self.assertAlmostEqual(delays[4], 0.2, delta=0.01)
+        # Hosts have separate buckets
+        self.assertEqual(limiter.reserve('https://other.com/'), 0.0)
+
+    def test_backoff(self):
+        limiter = HostRateLimiter(requests_per_second=100, respect_robots=False, backoff=1, max_backoff=3)
+        url = 'https://example.com/'
+        self.assertEqual(limiter.report(url, 429, retry_after='2'), 2)
+        self.assertAlmostEqual(limiter.reserve(url), 2, delta=0.05)
+        self.assertEqual([limiter.report(url, 503) for _ in range(3)], [2, 3, 3])
+        self.assertEqual(limiter.report(url, 200), 0)
+        self.assertEqual(limiter.report(url, 503), 1)
+
+    def test_parse_retry_after(self):
+        self.assertEqual(parse_retry_after('120'), 120)
+        date = email.utils.formatdate(time.time() + 60, usegmt=True)
+        self.assertAlmostEqual(parse_retry_after(date), 60, delta=2)
+        self.assertIsNone(parse_retry_after('soon'))
+        self.assertIsNone(parse_retry_after(None))
+
+    def test_robots_crawl_delay(self):
+        limiter = HostRateLimiter(requests_per_second=100)
+        requested = []
+
+        def fetch_robots(url: str) -> str:
+            requested.append(url)
+            return 'User-agent: *\nCrawl-delay: 2\nDisallow: /private\n'
+
+        limiter.fetch_robots = fetch_robots
+        self.assertEqual(limiter.get_interval('https://example.com/items/1'), 2)
+        self.assertEqual(limiter.reserve('https://example.com/items/2'), 0.0)
+        self.assertAlmostEqual(limiter.reserve('https://example.com/items/3'), 2, delta=0.01)
+        self.assertEqual(requested, ['https://example.com/robots.txt'])
+
+    def test_sqlite_backend(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            # Limiters of different processes open the same database
+            limiters = [HostRateLimiter(requests_per_second=10, respect_robots=False,
+                                        backend=SQLiteBackend(f'{tmp_dir}/limits.sqlite3')) for _ in range(2)]
+            self.assertEqual(limiters[0].reserve('https://example.com/'), 0.0)
+            self.assertAlmostEqual(limiters[1].reserve('https://example.com/'), 0.1, delta=0.01)
+            limiters[1].report('https://example.com/', 429, retry_after='5')
+            self.assertAlmostEqual(limiters[0].reserve('https://example.com/'), 5, delta=0.05)
+            for limiter in limiters:
+                limiter.backend.close()
+
+
+class TestRequestsCrawlerRetries(unittest.TestCase):
+    def setUp(self):
+        self.statuses = [429, 503, 200]
+
+        def handle(request):
+            status = self.statuses.pop(0)
+            send(request, status, f'<html><body>{status}</body></html>'.encode(), {'Retry-After': '0'})
+
+        self.server = LocalServer(handle)
+        self.addCleanup(self.server.close)
+
+    def test_retry(self):
+        limiter = HostRateLimiter(requests_per_second=100, respect_robots=False)
+        crawler = RequestsCrawler(rate_limiter=limiter)
+        crawler.get(f'{self.server.url}/')
+        self.assertIn('200', crawler.page_source)
+        self.assertEqual(self.statuses, [])
+        crawler.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,8 +1,11 @@
 import unittest
 
+import tiktoken
+from lxml import html, etree
+
 from scraperai.models import WebpageFields, StaticField, DynamicField
-from scraperai.parsers.utils import extract_fields_from_html, extract_items
-from scraperai.utils.html import extract_dynamic_fields_by_xpath, minify_html
+from scraperai.parsers.utils import extract_fields_from_html, extract_fields_from_tree, extract_items, ExtractionPlan
+from scraperai.utils.html import extract_dynamic_fields_by_xpath, minify_html, split_html
 from .settings import DATA_DIR
 
 
@@ -91,6 +94,63 @@ class TestHtmlUtils(unittest.TestCase):
             print(item)
             print()
 
+    def test_extraction_plan(self):
+        with open(DATA_DIR / 'ozon_catalog_page.html', 'r') as f:
+            html_content = f.read()
+        html_content, _ = minify_html(html_content)
+        root_xpath = '//div[@class="vi6 v6i"]'
+        fields = WebpageFields(
+            static_fields=[
+                StaticField(field_name='Card', field_xpath='//div[@class="vi6 v6i"]/@class'),
+                StaticField(field_name='Product Name', field_xpath='//div[@class="i8v"]/a/div/span/text()'),
+                StaticField(field_name='Links', field_xpath='//a/@href', multiple=True),
+            ],
+            dynamic_fields=[
+                DynamicField(
+                    section_name='Test',
+                    name_xpath="//div[@class='ba9 r9i']/span/font/preceding-sibling::text()[1]",
+                    value_xpath="//div[@class='ba9 r9i']/span/font",
+                )
+            ]
+        )
+        tree = html.fromstring(html_content)
+        expected = []
+        for node in tree.xpath(root_xpath):
+            fragment = html.fragment_fromstring(etree.tostring(node, method='html', encoding='unicode'),
+                                                create_parent=True)
+            expected.append(extract_fields_from_tree(fragment, fields, select_context_node=True))
+
+        plan = ExtractionPlan(fields, select_context_node=True)
+        self.assertGreater(len(expected), 1)
+        self.assertEqual(list(plan.extract_items(tree, root_xpath)), expected)
+        # Cards are returned back to the page
+        self.assertEqual(len(tree.xpath(root_xpath)), len(expected))
+        self.assertEqual(etree.tostring(tree, method='html', encoding='unicode'),
+                         etree.tostring(html.fromstring(html_content), method='html', encoding='unicode'))
+
+    def test_split_html(self):
+        # Byte-level encoding, so token counts are sizes in bytes
+        encoding = tiktoken.Encoding(name='bytes', pat_str=r'\S+|\s+',
+                                     mergeable_ranks={bytes([i]): i for i in range(256)}, special_tokens={})
+        with open(DATA_DIR / 'ozon_detail_page.html', 'r') as f:
+            html_content = f.read()
+        html_content, _ = minify_html(html_content, use_substituions=False)
+        parts = split_html(html_content, max_html_size=4000, encoding=encoding)
+        self.assertGreater(len(parts), 1)
+        tree = html.fromstring(html_content)
+        for part in parts:
+            self.assertLessEqual(part.html_size, 4000)
+            self.assertEqual(part.html_size, len(part.html_content.encode('utf-8')))
+            node = tree.xpath(part.xpath)[0]
+            self.assertEqual(part.html_content, etree.tostring(node, method='html', encoding='unicode'))
+            # The parent of every part is too large
+            parent = node.getparent()
+            self.assertGreater(len(etree.tostring(parent, method='html', encoding='utf-8')), 4000)
+
+        parts = split_html(html_content, max_text_size=500, encoding=encoding)
+        self.assertTrue(all(3 < part.text_size <= 500 for part in parts))
+        self.assertTrue(all(part.text_content for part in parts))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,81 @@
+import unittest
+
+from langchain_core.messages import HumanMessage
+
+from scraperai import Scraper
+from scraperai.instrumentation import StatsHook, InstrumentationHook, add_hook, remove_hook, span, _NOOP_SPAN
+from scraperai.parsers.agent import ChatModelAgent
+
+from .fakes import FakeJsonLM
+from .test_scraper import DictCrawler, make_catalog_config
+
+
+class RecordingHook(InstrumentationHook):
+    def __init__(self):
+        self.events = []
+
+    def on_span_start(self, span):
+        self.events.append(('start', span.name))
+
+    def on_span_end(self, span):
+        self.events.append(('end', span.name))
+
+
+class TestInstrumentation(unittest.TestCase):
+    def setUp(self):
+        self.stats = StatsHook(group_by='host')
+        add_hook(self.stats)
+
+    def tearDown(self):
+        remove_hook(self.stats)
+
+    def test_scraper_spans(self):
+        catalog_urls = [f'https://example.com/catalog/{page}' for page in range(2)]
+        pages = {
+            url: '<html><body>' + ''.join(f'<div class="card"><h1>Item {page * 5 + i}</h1></div>' for i in range(5)) +
+                 '</body></html>'
+            for page, url in enumerate(catalog_urls)
+        }
+        rows = list(Scraper(make_catalog_config(catalog_urls, open_nested_pages=False), DictCrawler(pages)).scrape())
+        self.assertEqual(len(rows), 10)
+        counts = {name: stats.count for (name, host), stats in self.stats.stats.items() if host == 'example.com'}
+        self.assertEqual(counts, {'scraper.fetch': 1, 'scraper.page_source': 2, 'scraper.parse': 2,
+                                  'scraper.extract': 2, 'scraper.switch_page': 2})
+        self.assertIn('scraper.extract', self.stats.summary())
+
+    def test_retries_are_counted(self):
+        responses = iter([{'answer': 'wrong'}, {'answer': 'wrong'}, {'answer': 'right'}])
+        agent = ChatModelAgent(FakeJsonLM(lambda messages: next(responses)))
+
+        def validate(response):
+            return None if response['answer'] == 'right' else 'Answer is wrong'
+
+        agent.query_with_validation([HumanMessage(content='Question')], validate)
+        stats = self.stats.stats[('llm.query', None)]
+        self.assertEqual((stats.count, stats.counters['retries']), (1, 2))
+
+    def test_nested_spans_and_errors(self):
+        hook = RecordingHook()
+        add_hook(hook)
+        try:
+            with span('outer') as outer:
+                with self.assertRaises(ValueError):
+                    with span('inner') as inner:
+                        raise ValueError('Failed')
+        finally:
+            remove_hook(hook)
+        self.assertIs(inner.parent, outer)
+        self.assertIn('ValueError', inner.error)
+        self.assertEqual(hook.events, [('start', 'outer'), ('start', 'inner'), ('end', 'inner'), ('end', 'outer')])
+        self.assertEqual(self.stats.stats[('inner', None)].errors, 1)
+
+    def test_no_hooks(self):
+        remove_hook(self.stats)
+        with span('stage', host='example.com') as current_span:
+            current_span.set(size=1)
+        self.assertIs(current_span, _NOOP_SPAN)
+        self.assertEqual(current_span.attributes, {})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import base64
+import io
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+from PIL import Image
+
+from scraperai import ParserAI
+from scraperai.llm.cache import LLMCache
+from scraperai.models import WebpageType
+from .fakes import FakeJsonLM, FakeVision, FakePythonCodeLM
+
+
+def make_screenshot(color: str) -> str:
+    buffered = io.BytesIO()
+    Image.new('RGB', (64, 64), color).save(buffered, format='PNG')
+    return base64.b64encode(buffered.getvalue()).decode()
+
+
+class TestLLMCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache_path = Path(self.tmp_dir.name) / 'cache.sqlite3'
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def make_parser(self, cache: LLMCache) -> tuple[ParserAI, FakeVision]:
+        vision_model = FakeVision('catalog')
+        parser = ParserAI(json_lm_model=FakeJsonLM(lambda messages: {}),
+                          vision_model=vision_model,
+                          code_model=FakePythonCodeLM(),
+                          cache=cache)
+        return parser, vision_model
+
+    def test_parser_responses_are_persisted(self):
+        parser, vision_model = self.make_parser(LLMCache(self.cache_path))
+        self.assertEqual(parser.detect_page_type(screenshot=make_screenshot('white')), WebpageType.CATALOG)
+        self.assertEqual(vision_model.calls, 1)
+        self.assertEqual((parser.cache_hits, parser.cache_misses), (0, 1))
+        parser.cache.close()
+
+        parser, vision_model = self.make_parser(LLMCache(self.cache_path))
+        self.assertEqual(parser.detect_page_type(screenshot=make_screenshot('white')), WebpageType.CATALOG)
+        self.assertEqual(vision_model.calls, 0)
+        self.assertEqual(parser.detect_page_type(screenshot=make_screenshot('black')), WebpageType.CATALOG)
+        self.assertEqual(vision_model.calls, 1)
+        self.assertEqual((parser.cache_hits, parser.cache_misses), (1, 1))
+
+    def test_ttl(self):
+        cache = LLMCache(self.cache_path, ttl=0.05)
+        cache.set('key', {'value': 1})
+        self.assertEqual(cache.get('key'), {'value': 1})
+        time.sleep(0.1)
+        self.assertIsNone(cache.get('key'))
+        self.assertEqual(cache.size, 0)
+
+    def test_lru_eviction(self):
+        cache = LLMCache(self.cache_path, max_size=130)
+        for i in range(4):
+            cache.set(f'key{i}', 'x' * 28)
+            time.sleep(0.01)
+        cache.get('key0')
+        cache.set('key4', 'x' * 28)
+        self.assertIsNotNone(cache.get('key0'))
+        self.assertIsNone(cache.get('key1'))
+        self.assertIsNotNone(cache.get('key4'))
+        self.assertLessEqual(cache.size, 130)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+import hashlib
+import tempfile
+import unittest
+from collections import Counter
+from http.server import BaseHTTPRequestHandler
+
+from scraperai import AsyncHttpCrawler, RequestsCrawler, Scraper
+from scraperai.crawlers import PageCache
+
+from .http_server import LocalServer, send
+from .test_scraper import make_config
+
+
+class CachingServer(LocalServer):
+    """Serves `pages` with ETag validators, if `etags` is set, and counts responses by status"""
+
+    def __init__(self, pages: dict[str, str], etags: bool = True):
+        self.pages = pages
+        self.etags = etags
+        self.statuses = Counter()
+        super().__init__(self.handle)
+
+    def handle(self, request: BaseHTTPRequestHandler) -> None:
+        body = self.pages[request.path].encode()
+        etag = f'"{hashlib.md5(body).hexdigest()}"'
+        if self.etags and request.headers.get('If-None-Match') == etag:
+            self.statuses[304] += 1
+            send(request, 304)
+            return
+        self.statuses[200] += 1
+        headers = {'Content-Type': 'text/html; charset=utf-8'}
+        if self.etags:
+            headers['ETag'] = etag
+        send(request, 200, body, headers)
+
+
+class TestPageCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache = PageCache(f'{self.tmp_dir.name}/pages.sqlite3')
+        self.pages = {f'/items/{i}': f'<html><body><h1>Товар {i}</h1>{"<p>Text</p>" * 100}</body></html>'
+                      for i in range(10)}
+
+    def tearDown(self):
+        self.cache.close()
+        self.tmp_dir.cleanup()
+
+    def test_conditional_requests(self):
+        server = CachingServer(self.pages)
+        self.addCleanup(server.close)
+        crawler = RequestsCrawler(cache=self.cache)
+        url = f'{server.url}/items/1'
+        crawler.get(url)
+        self.assertTrue(crawler.page_changed)
+        self.assertIn('Товар 1', crawler.page_source)
+
+        crawler.get(url)
+        self.assertEqual(server.statuses, {200: 1, 304: 1})
+        self.assertFalse(crawler.page_changed)
+        self.assertEqual(crawler.page_source, self.pages['/items/1'])
+
+        self.pages['/items/1'] = '<html><body><h1>Changed</h1></body></html>'
+        crawler.get(url)
+        self.assertTrue(crawler.page_changed)
+        self.assertIn('Changed', crawler.page_source)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 2))
+
+    def test_unchanged_body_without_validators(self):
+        server = CachingServer(self.pages, etags=False)
+        self.addCleanup(server.close)
+        crawler = RequestsCrawler(cache=self.cache)
+        for _ in range(2):
+            crawler.get(f'{server.url}/items/2')
+        self.assertEqual(server.statuses, {200: 2})
+        self.assertFalse(crawler.page_changed)
+
+    def test_compression(self):
+        self.cache.set('https://example.com/', self.pages['/items/0'].encode(), 'utf-8', {'ETag': '"1"'})
+        size = self.cache._connection.execute('SELECT LENGTH(body) FROM pages').fetchone()[0]
+        self.assertLess(size, len(self.pages['/items/0'].encode()) / 5)
+        page = self.cache.get('https://example.com/')
+        self.assertEqual((PageCache.decode(page), page.etag), (self.pages['/items/0'], '"1"'))
+        self.assertEqual(PageCache.get_conditional_headers(page), {'If-None-Match': '"1"'})
+        self.assertRaises(ValueError, PageCache, f'{self.tmp_dir.name}/other.sqlite3', compression='brotli')
+
+    def test_skip_unchanged_pages(self):
+        server = CachingServer(self.pages)
+        self.addCleanup(server.close)
+        config = make_config([f'{server.url}/items/{i}' for i in range(10)], max_rows=10)
+        rows = list(Scraper(config, RequestsCrawler(cache=self.cache), skip_unchanged=True).scrape())
+        self.assertEqual(len(rows), 10)
+
+        self.pages['/items/3'] = '<html><body><h1>Changed</h1></body></html>'
+        scraper = Scraper(config, RequestsCrawler(cache=self.cache), skip_unchanged=True)
+        self.assertEqual(list(scraper.scrape()), [{'title': 'Changed'}])
+        self.assertEqual(scraper.unchanged_pages, 9)
+        self.assertEqual(server.statuses, {200: 11, 304: 9})
+
+
+class TestAsyncPageCache(unittest.IsolatedAsyncioTestCase):
+    async def test_fetch(self):
+        server = CachingServer({'/': '<html><body><h1>Item</h1></body></html>'})
+        self.addCleanup(server.close)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            cache = PageCache(f'{tmp_dir}/pages.sqlite3', compression=None)
+            async with AsyncHttpCrawler(cache=cache) as crawler:
+                first = await crawler.fetch(f'{server.url}/')
+                self.assertTrue(crawler.is_changed(f'{server.url}/'))
+                second = await crawler.fetch(f'{server.url}/')
+                self.assertFalse(crawler.is_changed(f'{server.url}/'))
+            cache.close()
+        self.assertEqual(first, second)
+        self.assertEqual(server.statuses, {200: 1, 304: 1})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import json
+import unittest
+from unittest import mock
+
+from langchain_core.messages import BaseMessage
+
+from scraperai import ParserAI
+from .fakes import FakeJsonLM, FakeVision, FakePythonCodeLM
+from .test_llm_cache import make_screenshot
+from .test_prompt_compression import ENCODING
+
+# Every part of the page is larger than a half of the parts descriptor limit, so they are described separately
+DETAILS_PAGE = (f'<html><body><header><nav>{"<a href=/catalog>Catalog</a>" * 300}</nav></header>'
+                f'<main><h1 class="title">Item 1</h1><span class="price">10 USD</span>'
+                f'<div class="specs"><span class="name">Color</span><span class="value">Red</span></div>'
+                f'<p class="description">{"Item description. " * 150}</p></main>'
+                f'<footer><p>{"Contacts and other links of the website. " * 60}</p></footer></body></html>')
+
+
+def respond(messages: list[BaseMessage]) -> dict:
+    system_prompt = messages[0].content
+    if 'Extract static data fields' in system_prompt:
+        return {'fields': [{'field_name': 'Title', 'field_xpath': '//h1'},
+                           {'field_name': 'Price', 'field_xpath': '//span[@class="price"]'}]}
+    if 'Extract dynamic sections' in system_prompt:
+        return {'fields': [{'section_name': 'Specs', 'name_xpath': './/span[@class="name"]',
+                            'value_xpath': './/span[@class="value"]'}]}
+    if system_prompt == 'Your primary goal is to describe the content of the websites':
+        parts = json.loads(messages[1].content.split('```')[-2])
+        return {xpath: 'description' for xpath in parts}
+    if system_prompt == 'You are an HTML web scraper.':
+        parts = json.loads(messages[1].content.split('```')[-2])
+        # The page description is passed as context
+        assert 'A product page' in messages[-1].content
+        return {'relevant_xpaths': [xpath for xpath in parts if 'main' in xpath]}
+    raise ValueError(f'Unexpected prompt: {system_prompt}')
+
+
+# Tests do not download tiktoken encodings
+@mock.patch('scraperai.parsers.compression.get_encoding', lambda: ENCODING)
+@mock.patch('scraperai.utils.html.get_encoding', lambda: ENCODING)
+class TestParallelParser(unittest.TestCase):
+    def make_parser(self, parallel: bool) -> ParserAI:
+        return ParserAI(json_lm_model=FakeJsonLM(respond),
+                        vision_model=FakeVision('A product page of an online store'),
+                        code_model=FakePythonCodeLM(),
+                        parallel=parallel)
+
+    def test_extract_fields(self):
+        parsers = [self.make_parser(parallel) for parallel in (False, True)]
+        fields = [parser.extract_fields(DETAILS_PAGE) for parser in parsers]
+        self.assertEqual(fields[0], fields[1])
+        self.assertEqual([f.field_name for f in fields[0].static_fields], ['Title', 'Price'])
+        self.assertEqual(fields[0].dynamic_fields[0].first_values, {'Color': 'Red'})
+        self.assertEqual([parser.json_lm_model.calls for parser in parsers], [2, 2])
+
+    def test_summarize_details_page(self):
+        parsers = [self.make_parser(parallel) for parallel in (False, True)]
+        results = [parser.summarize_details_page_as_valid_html(DETAILS_PAGE, make_screenshot('white'))
+                   for parser in parsers]
+        self.assertEqual(results[0], results[1])
+        self.assertIn('Item 1', results[0])
+        self.assertNotIn('Contacts', results[0])
+        self.assertEqual([(parser.json_lm_model.calls, parser.vision_model.calls) for parser in parsers],
+                         [(2, 1), (2, 1)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import threading
+import time
+import unittest
+
+from langchain_core.messages import BaseMessage
+
+from scraperai import ParserAI
+from scraperai.llm import RateLimiter
+from scraperai.llm.base import BaseVision
+from scraperai.models import WebpageType
+from scraperai.utils.image import compress_b64_image, encode_image_to_b64
+from .fakes import FakeJsonLM, FakePythonCodeLM
+from .test_llm_cache import make_screenshot
+
+
+WHITE = make_screenshot('white')
+BLACK = make_screenshot('black')
+
+
+class ConcurrentVision(BaseVision):
+    """Classifies white screenshots as catalogs and others as details, tracks the number of concurrent calls"""
+
+    def __init__(self, delay: float = 0.05):
+        self.catalog_url = encode_image_to_b64(compress_b64_image(WHITE, aspect_ratio=0.5))
+        self.delay = delay
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+    def invoke(self, messages: list[BaseMessage]) -> str:
+        with self.lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            time.sleep(self.delay)
+            image_url = messages[1].content[1]['image_url']['url']
+            return 'catalog' if image_url == self.catalog_url else 'detailed_page'
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+
+class TestParserBatch(unittest.TestCase):
+    def make_parser(self, vision_model: BaseVision, **kwargs) -> ParserAI:
+        return ParserAI(json_lm_model=FakeJsonLM(lambda messages: {}),
+                        vision_model=vision_model,
+                        code_model=FakePythonCodeLM(),
+                        **kwargs)
+
+    def test_detect_page_types(self):
+        vision_model = ConcurrentVision()
+        parser = self.make_parser(vision_model, max_concurrency=4)
+        screenshots = [WHITE, BLACK, 'not an image', WHITE] * 5
+        results = parser.detect_page_types(screenshots=screenshots)
+
+        self.assertEqual(len(results), len(screenshots))
+        for screenshot, result in zip(screenshots, results):
+            if screenshot == WHITE:
+                self.assertEqual(result, WebpageType.CATALOG)
+            elif screenshot == BLACK:
+                self.assertEqual(result, WebpageType.DETAILS)
+            else:
+                self.assertIsInstance(result, Exception)
+        self.assertGreater(vision_model.max_in_flight, 1)
+        self.assertLessEqual(vision_model.max_in_flight, 4)
+
+    def test_rate_limiter(self):
+        limiter = RateLimiter(requests_per_minute=600)
+        parser = self.make_parser(ConcurrentVision(delay=0), rate_limiter=limiter)
+        # The first minute's budget is available immediately
+        for _ in range(600):
+            limiter.acquire()
+        start_time = time.monotonic()
+        parser.detect_page_types(screenshots=[BLACK] * 5)
+        # 5 requests at 10 requests per second
+        self.assertGreater(time.monotonic() - start_time, 0.4)
+
+    def test_rate_limiter_tokens(self):
+        limiter = RateLimiter(tokens_per_minute=6000)
+        self.assertEqual(limiter.acquire(6000), 0)
+        start_time = time.monotonic()
+        limiter.acquire(50)
+        self.assertAlmostEqual(time.monotonic() - start_time, 0.5, delta=0.2)
+        # Requests larger than the budget wait for the whole budget instead of forever
+        self.assertLess(RateLimiter(tokens_per_minute=100).acquire(1000), 0.1)
+
+
+if __name__ == '__main__':
+    unittest.main()
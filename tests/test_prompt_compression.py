@@ -0,0 +1,104 @@
+import unittest
+
+import tiktoken
+from langchain_core.messages import BaseMessage
+from lxml import html
+
+from scraperai.parsers import CatalogItemDetector, DataFieldsExtractor
+from scraperai.parsers.compression import compress_html
+
+from .fakes import FakeJsonLM
+
+# Byte-level encoding, so that tests do not download tiktoken encodings
+ENCODING = tiktoken.Encoding(name='bytes', pat_str=r'\S+|\s+',
+                             mergeable_ranks={bytes([i]): i for i in range(256)}, special_tokens={})
+
+
+def make_catalog_page(cards_count: int) -> str:
+    cards = ''.join(f'<div class="card"><a href="/items/{i}"><h2>Item {i}</h2></a><span>{i} USD</span></div>'
+                    for i in range(cards_count))
+    return (f'<html><body><header><nav>{"<a href=/>Menu</a>" * 50}</nav></header>'
+            f'<div class="catalog">{cards}</div><button class="next">Next</button>'
+            f'<footer>{"Footer text. " * 50}</footer></body></html>')
+
+
+class TestCompressHtml(unittest.TestCase):
+    def test_within_budget(self):
+        page = make_catalog_page(3)
+        result = compress_html(page, 100_000, encoding=ENCODING)
+        self.assertEqual(result.html_content, page)
+        self.assertEqual(result.stages, [])
+        self.assertIsNone(result.prompt_note)
+        self.assertEqual(result.ratio, 1.0)
+
+    def test_collapse_repeated_siblings(self):
+        page = make_catalog_page(100)
+        result = compress_html(page, 2000, encoding=ENCODING)
+        self.assertLessEqual(result.tokens, 2000)
+        self.assertGreater(result.ratio, 5)
+        self.assertEqual(result.stages, ['drop', 'collapse'])
+        self.assertIn('Repeated similar elements', result.prompt_note)
+
+        tree = html.fromstring(result.html_content)
+        self.assertEqual(len(tree.xpath('//div[@class="card"]')), 2)
+        self.assertEqual(tree.xpath('//comment()')[0].text.strip(), '98 more similar <div> elements')
+        self.assertEqual(tree.xpath('//button/text()'), ['Next'])
+        self.assertEqual(tree.xpath('//nav | //footer'), [])
+
+    def test_shorten_and_truncate(self):
+        classes = ' '.join(f'class-{i}' for i in range(10))
+        page = ''.join(f'<p class="{classes}">{"Long text. " * 50}{i}</p><div>{i}</div>' for i in range(20))
+        result = compress_html(page, 3500, encoding=ENCODING)
+        self.assertEqual(result.stages, ['drop', 'collapse', 'shorten'])
+        self.assertIn('class="class-0 class-1 class-2"', result.html_content)
+
+        result = compress_html(page, 500, keep_tail=True, encoding=ENCODING)
+        self.assertEqual(result.stages[-1], 'truncate')
+        self.assertEqual(result.tokens, 500)
+        self.assertTrue(result.html_content.startswith('<p class="class-0'))
+        self.assertTrue(result.html_content.endswith('<div>19</div>'))
+
+
+class TestDetectorCompression(unittest.TestCase):
+    def test_catalog_item_detector_prompt(self):
+        prompts: list[list[BaseMessage]] = []
+
+        def respond(messages: list[BaseMessage]) -> dict:
+            prompts.append(messages)
+            return {'card': '//div[@class="card"]', 'url': '//div[@class="card"]/a/@href'}
+
+        detector = CatalogItemDetector(FakeJsonLM(respond), min_confidence=2)
+        detector.max_chunk_size = 2000
+        detector.encoding = ENCODING
+        catalog_item = detector.detect_catalog_item(make_catalog_page(100))
+        # The prompt contains only a few cards, but the xpath is validated on the whole page
+        self.assertLess(len(prompts[0][1].content), 2000)
+        self.assertIn('Repeated similar elements', prompts[0][2].content)
+        self.assertEqual(len(catalog_item.urls_on_page), 100)
+
+    def test_data_fields_extractor_keeps_table_rows(self):
+        prompts: list[list[BaseMessage]] = []
+
+        def respond(messages: list[BaseMessage]) -> dict:
+            prompts.append(messages)
+            return {'fields': []}
+
+        classes = ' '.join(f'class-{i}' for i in range(10))
+        rows = ''.join(f'<tr class="{classes}"><td class="label">Property {i}</td>'
+                       f'<td class="value">{"Long value. " * 30}</td></tr>' for i in range(60))
+        page = (f'<html><body><nav>{"<a href=/>Menu</a>" * 200}</nav><h1>Item</h1>'
+                f'<table class="specs">{rows}</table></body></html>')
+        extractor = DataFieldsExtractor(FakeJsonLM(respond))
+        extractor.max_chunk_size = 15000
+        extractor.encoding = ENCODING
+        extractor.extract_static_fields(page)
+        # Rows of a specifications table are different fields, so they are shortened, but not collapsed
+        tree = html.fromstring(prompts[0][1].content)
+        self.assertEqual(tree.xpath('//td[@class="label"]/text()'), [f'Property {i}' for i in range(60)])
+        self.assertEqual(tree.xpath('//comment()'), [])
+        self.assertIn('Class lists are shortened', prompts[0][-1].content)
+        self.assertNotIn('Repeated similar elements', prompts[0][-1].content)
+
+
+if __name__ == '__main__':
+    unittest.main()
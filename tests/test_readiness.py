@@ -0,0 +1,166 @@
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+from scraperai import SeleniumCrawler
+from scraperai.crawlers.webdriver import ReadinessWaiter, TimingProfile
+from scraperai.crawlers.webdriver.readiness import READY_STATE_SCRIPT, RESOURCES_COUNT_SCRIPT, \
+    CONTENT_SIGNATURE_SCRIPT
+from scraperai.models import Pagination
+
+
+class TimelineDriver:
+    """
+    Simulates a page that loads resources for `load_time` seconds and, after a click,
+    appends cards or replaces them with the same number of other cards
+    """
+
+    def __init__(self, load_time: float = 0.3, cards_delay: float = 0.3, append: bool = True):
+        self.load_time = load_time
+        self.cards_delay = cards_delay
+        self.append = append
+        self.current_url = 'about:blank'
+        self.loaded_at = time.monotonic()
+        self.clicked_at = None
+
+    def get(self, url: str):
+        self.current_url = url
+        self.loaded_at = time.monotonic()
+
+    def find_element(self, by, xpath):
+        driver = self
+
+        class Button:
+            def click(self):
+                driver.clicked_at = time.monotonic()
+        return Button()
+
+    def execute_script(self, script: str, *args):
+        elapsed = time.monotonic() - self.loaded_at
+        if script == READY_STATE_SCRIPT:
+            return 'complete' if elapsed > self.load_time / 2 else 'loading'
+        if script == RESOURCES_COUNT_SCRIPT:
+            return int(min(elapsed, self.load_time) * 100)
+        if script == CONTENT_SIGNATURE_SCRIPT:
+            if self.clicked_at is not None and time.monotonic() - self.clicked_at > self.cards_delay:
+                return '20:1:2' if self.append else '10:3:4'
+            return '10:1:2'
+
+
+class PollingDriver(TimelineDriver):
+    """Simulates a page that polls the server, so the network never becomes idle"""
+
+    def execute_script(self, script: str, *args):
+        if script == RESOURCES_COUNT_SCRIPT:
+            return int(time.monotonic() * 1000)
+        return super().execute_script(script, *args)
+
+
+class TestReadinessWaiter(unittest.TestCase):
+    def test_get_waits_for_idle_network(self):
+        driver = TimelineDriver(load_time=0.3)
+        crawler = SeleniumCrawler(driver, waiter=ReadinessWaiter(idle_time=0.2, poll_interval=0.02))
+        start_time = time.monotonic()
+        crawler.get('https://example.com/catalog')
+        elapsed = time.monotonic() - start_time
+        self.assertGreaterEqual(elapsed, 0.5)
+        self.assertLess(elapsed, 1.0)
+
+    def test_click_waits_for_new_cards(self):
+        driver = TimelineDriver(load_time=0, cards_delay=0.4)
+        crawler = SeleniumCrawler(driver, waiter=ReadinessWaiter(idle_time=0, poll_interval=0.02))
+        crawler.set_content_xpath('//div[@class="card"]')
+        start_time = time.monotonic()
+        self.assertTrue(crawler.switch_page(Pagination(type='xpath', xpath='//button')))
+        elapsed = time.monotonic() - start_time
+        self.assertGreaterEqual(elapsed, 0.4)
+        self.assertLess(elapsed, 1.0)
+
+    def test_click_waits_for_replaced_cards(self):
+        driver = TimelineDriver(load_time=0, cards_delay=0.4, append=False)
+        crawler = SeleniumCrawler(driver, waiter=ReadinessWaiter(timeout=5, idle_time=0, poll_interval=0.02))
+        crawler.set_content_xpath('//div[@class="card"]')
+        start_time = time.monotonic()
+        self.assertTrue(crawler.switch_page(Pagination(type='xpath', xpath='//button')))
+        elapsed = time.monotonic() - start_time
+        self.assertGreaterEqual(elapsed, 0.4)
+        self.assertLess(elapsed, 1.0)
+
+    def test_timeout(self):
+        driver = TimelineDriver(load_time=10)
+        waiter = ReadinessWaiter(timeout=0.3, poll_interval=0.02)
+        start_time = time.monotonic()
+        self.assertFalse(waiter.wait(driver, 'example.com'))
+        self.assertLess(time.monotonic() - start_time, 0.5)
+
+    def test_never_idle_page_waits_for_replaced_cards(self):
+        profile = TimingProfile(min_timeout=0.1, min_samples=3)
+        for _ in range(3):
+            profile.record('example.com', 'click', 10, timed_out=True)
+        self.assertEqual(profile.get_timeout('example.com', 'click', default=5), 0.1)
+        driver = PollingDriver(load_time=0, cards_delay=0.5, append=False)
+        waiter = ReadinessWaiter(timeout=5, idle_time=0.2, poll_interval=0.02, profile=profile)
+        signature = waiter.get_content_signature(driver, '//div[@class="card"]')
+        driver.clicked_at = start_time = time.monotonic()
+        # The network is not idle, but the learned timeout does not cut the wait for the next cards
+        waiter.wait(driver, 'example.com', kind='click', content_xpath='//div[@class="card"]',
+                    previous_signature=signature)
+        elapsed = time.monotonic() - start_time
+        self.assertGreaterEqual(elapsed, 0.5)
+        self.assertLess(elapsed, 1.0)
+        self.assertEqual(waiter.get_content_signature(driver, '//div[@class="card"]'), '10:3:4')
+
+
+class TestTimingProfile(unittest.TestCase):
+    def test_learned_timeout(self):
+        profile = TimingProfile(margin=2.0, min_timeout=0.5, min_samples=3)
+        self.assertEqual(profile.get_timeout('example.com', 'get', default=10), 10)
+        for seconds in (0.4, 0.8, 0.6):
+            profile.record('example.com', 'get', seconds)
+        self.assertAlmostEqual(profile.get_timeout('example.com', 'get', default=10), 1.6)
+        self.assertEqual(profile.get_timeout('example.com', 'click', default=10), 10)
+        self.assertEqual(profile.get_timeout('other.com', 'get', default=10), 10)
+        # Timeouts grow back when pages are not ready in time
+        profile.record('example.com', 'get', 1.6, timed_out=True)
+        self.assertAlmostEqual(profile.get_timeout('example.com', 'get', default=10), 3.2)
+        profile.record('example.com', 'get', 1.0)
+        self.assertAlmostEqual(profile.get_timeout('example.com', 'get', default=10), 2.0)
+
+    def test_slow_page_does_not_set_timeout(self):
+        profile = TimingProfile(margin=2.0, min_samples=3)
+        for seconds in [0.5] * 19 + [8.0]:
+            profile.record('example.com', 'get', seconds)
+        self.assertAlmostEqual(profile.get_timeout('example.com', 'get', default=10), 1.0)
+
+    def test_never_idle_page(self):
+        profile = TimingProfile(margin=2.0, min_timeout=1.0, min_samples=3)
+        timeouts = []
+        for _ in range(5):
+            timeouts.append(profile.get_timeout('example.com', 'get', default=10))
+            profile.record('example.com', 'get', timeouts[-1], timed_out=True)
+        # After `min_samples` timeouts in a row the page is not waited for until the default timeout
+        self.assertEqual(timeouts, [10, 10, 10, 1.0, 1.0])
+
+    def test_waiter_uses_profile(self):
+        profile = TimingProfile(min_timeout=0.1, min_samples=1)
+        profile.record('example.com', 'get', 0.1)
+        waiter = ReadinessWaiter(timeout=10, poll_interval=0.02, profile=profile)
+        start_time = time.monotonic()
+        self.assertFalse(waiter.wait(TimelineDriver(load_time=10), 'example.com'))
+        self.assertLess(time.monotonic() - start_time, 0.5)
+
+    def test_persistence(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = Path(tmp_dir) / 'timings.json'
+            profile = TimingProfile(path, min_samples=1)
+            profile.record('example.com', 'get', 2.0)
+            profile.record('other.com', 'get', 10, timed_out=True)
+            profile.save()
+            loaded = TimingProfile(path, min_samples=1)
+            self.assertEqual(loaded.get_timeout('example.com', 'get', default=10), 4.0)
+            self.assertEqual(loaded.get_timeout('other.com', 'get', default=10), 1.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import unittest
+
+from selenium.common import WebDriverException
+
+from scraperai import SeleniumCrawler
+from scraperai.crawlers.webdriver import ResourcePolicy, ReadinessWaiter
+from scraperai.crawlers.webdriver.readiness import READY_STATE_SCRIPT, RESOURCES_COUNT_SCRIPT
+
+
+class CdpDriver:
+    def __init__(self, supports_cdp: bool = True):
+        self.supports_cdp = supports_cdp
+        self.current_url = 'https://example.com/catalog'
+        self.blocked_urls = []
+        self.screenshot_blocked_urls = None
+
+    def execute_cdp_cmd(self, cmd: str, cmd_args: dict):
+        if not self.supports_cdp:
+            raise WebDriverException('CDP is not supported')
+        if cmd == 'Network.setBlockedURLs':
+            self.blocked_urls = cmd_args['urls']
+
+    def execute_script(self, script: str, *args):
+        if script == READY_STATE_SCRIPT:
+            return 'complete'
+        if script == RESOURCES_COUNT_SCRIPT:
+            return 0
+
+    def refresh(self):
+        pass
+
+    def get_screenshot_as_base64(self) -> str:
+        self.screenshot_blocked_urls = self.blocked_urls
+        return ''
+
+
+class TestResourcePolicy(unittest.TestCase):
+    def test_blocked_urls(self):
+        patterns = ResourcePolicy(blocked_patterns=['*/ads/*']).get_blocked_urls()
+        self.assertIn('*.png', patterns)
+        self.assertIn('*.woff2?*', patterns)
+        self.assertIn('*google-analytics.com*', patterns)
+        self.assertIn('*/ads/*', patterns)
+        self.assertNotIn('*.css', patterns)
+
+        patterns = ResourcePolicy(block_images=False, block_stylesheets=True, blocked_domains=[]).get_blocked_urls()
+        self.assertNotIn('*.png', patterns)
+        self.assertIn('*.css', patterns)
+        self.assertFalse(any('google' in pattern for pattern in patterns))
+
+    def test_crawler_allows_resources_for_screenshots(self):
+        driver = CdpDriver()
+        policy = ResourcePolicy()
+        crawler = SeleniumCrawler(driver, waiter=ReadinessWaiter(idle_time=0), resource_policy=policy)
+        self.assertEqual(driver.blocked_urls, policy.get_blocked_urls())
+        crawler.get_screenshot_as_base64()
+        self.assertEqual(driver.screenshot_blocked_urls, [])
+        self.assertEqual(driver.blocked_urls, policy.get_blocked_urls())
+        crawler.set_resource_policy(None)
+        self.assertEqual(driver.blocked_urls, [])
+
+    def test_unsupported_browser(self):
+        crawler = SeleniumCrawler(CdpDriver(supports_cdp=False), resource_policy=ResourcePolicy())
+        self.assertIsNone(crawler.resource_policy)
+
+
+if __name__ == '__main__':
+    unittest.main()
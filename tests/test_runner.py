@@ -0,0 +1,97 @@
+import json
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+from click.testing import CliRunner
+
+from scraperai.cli.app import main
+from scraperai.runner import ConfigRunner, RunOptions
+from scraperai.writers import read_json_lines
+
+from .test_scraper import DictCrawler, make_catalog_config
+
+
+class TestConfigRunner(unittest.TestCase):
+    catalog_urls = [f'https://example.com/catalog/{page}' for page in range(3)]
+    pages = {
+        url: '<html><body>' + ''.join(f'<div class="card"><h1>Item {page * 10 + i}</h1></div>' for i in range(10)) +
+             '</body></html>'
+        for page, url in enumerate(catalog_urls)
+    }
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp_dir.name)
+        config = make_catalog_config(self.catalog_urls, open_nested_pages=False)
+        (self.path / 'catalog.scraperai.json').write_text(config.model_dump_json())
+        (self.path / 'broken.scraperai.json').write_text('{}')
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_run_configs(self):
+        options = RunOptions(output_dir=str(self.path / 'results'), workers=2, max_rows=25)
+        summary = ConfigRunner(options, crawler_factory=lambda: DictCrawler(self.pages)).run([self.path])
+        results = {Path(result.config).name: result for result in summary.results}
+
+        self.assertEqual(summary.failed, 1)
+        self.assertEqual(results['broken.scraperai.json'].status, 'failed')
+        self.assertIn('ValidationError', results['broken.scraperai.json'].error)
+
+        result = results['catalog.scraperai.json']
+        self.assertEqual((result.status, result.rows), ('ok', 25))
+        rows = list(read_json_lines(result.output))
+        self.assertEqual(rows, [{'title': f'Item {i}'} for i in range(25)])
+        self.assertEqual(summary.to_dict()['rows'], 25)
+
+    def test_dedup_rows(self):
+        # Distinct items with equal scraped fields, e.g. variants of a product
+        pages = {url: page.replace('Item 1<', 'Item 0<') for url, page in self.pages.items()}
+        config = self.path / 'catalog.scraperai.json'
+        rows_counts = []
+        for dedup_rows in (False, True):
+            options = RunOptions(output_dir=str(self.path / f'results_{dedup_rows}'), dedup_rows=dedup_rows)
+            summary = ConfigRunner(options, crawler_factory=lambda: DictCrawler(pages)).run([config])
+            rows_counts.append((summary.results[0].rows, summary.results[0].skipped_rows))
+        self.assertEqual(rows_counts, [(30, 0), (29, 1)])
+
+    def test_same_config_names(self):
+        config = make_catalog_config(self.catalog_urls, open_nested_pages=False)
+        for directory in ('a', 'b'):
+            (self.path / directory).mkdir()
+            (self.path / directory / 'catalog.scraperai.json').write_text(config.model_dump_json())
+        options = RunOptions(output_dir=str(self.path / 'results'))
+        runner = ConfigRunner(options, crawler_factory=lambda: DictCrawler(self.pages))
+        summary = runner.run([self.path / 'a', self.path / 'b'])
+        outputs = [result.output for result in summary.results]
+        self.assertEqual(len(set(outputs)), 2)
+        self.assertEqual([len(list(read_json_lines(output))) for output in outputs], [30, 30])
+        # Output files do not change between runs
+        self.assertEqual(runner.get_output_path(self.path / 'a' / 'catalog.scraperai.json'), Path(outputs[0]))
+
+    def test_time_limit(self):
+        class SlowCrawler(DictCrawler):
+            def get(self, url: str):
+                time.sleep(0.05)
+                super().get(url)
+
+        options = RunOptions(output_dir=str(self.path / 'results'), time_limit=0.01)
+        config = self.path / 'catalog.scraperai.json'
+        summary = ConfigRunner(options, crawler_factory=lambda: SlowCrawler(self.pages)).run([config])
+        # The limit is reached while the first catalog page is scraped, so the next page is not opened
+        self.assertEqual((summary.results[0].status, summary.results[0].rows), ('time_limit', 10))
+
+    def test_cli_summary(self):
+        summary_path = self.path / 'summary.json'
+        result = CliRunner().invoke(main, ['run', str(self.path / 'broken.scraperai.json'),
+                                           '--output-dir', str(self.path / 'results'),
+                                           '--summary', str(summary_path)])
+        self.assertEqual(result.exit_code, 1)
+        summary = json.loads(summary_path.read_text())
+        self.assertEqual((summary['configs'], summary['failed']), (1, 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
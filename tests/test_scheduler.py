@@ -0,0 +1,145 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler
+from pathlib import Path
+
+from scraperai.runner import RunOptions
+from scraperai.scheduler import DomainThrottle, Scheduler, SchedulerOptions, _WorkerProcess
+from scraperai.writers import read_json_lines
+
+from .http_server import LocalServer, send
+from .test_scraper import make_catalog_config, make_config
+
+
+class CatalogServer(LocalServer):
+    """Serves catalog pages with 10 cards and records the max number of concurrent requests"""
+
+    def __init__(self, delay: float = 0.02):
+        self.delay = delay
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+        super().__init__(self.handle)
+
+    def handle(self, request: BaseHTTPRequestHandler) -> None:
+        with self._lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(self.delay)
+        page = int(request.path.rsplit('/', 1)[-1])
+        body = ('<html><body>' + ''.join(f'<div class="card"><h1>Item {page * 10 + i}</h1></div>'
+                                         for i in range(10)) + '</body></html>').encode()
+        send(request, 200, body, {'Content-Type': 'text/html; charset=utf-8'})
+        with self._lock:
+            self.active -= 1
+
+
+def crash_after_start(options, throttle, tasks, messages):
+    """Worker that reports a config as started and exits like a crashed process"""
+    index, _ = tasks.get()
+    messages.put(('started', index, os.getpid()))
+    messages.close()
+    messages.join_thread()
+    os._exit(1)
+
+
+def crash_before_start(options, throttle, tasks, messages):
+    """Worker that takes a config and exits before reporting it"""
+    tasks.get()
+    os._exit(1)
+
+
+class CrashingScheduler(Scheduler):
+    """Starts worker processes with `targets` first and then normal ones"""
+
+    def __init__(self, *args, targets: list):
+        super().__init__(*args)
+        self.targets = targets
+
+    def _start_worker(self, options, throttle, messages, target=None) -> _WorkerProcess:
+        if self.targets:
+            return super()._start_worker(options, throttle, messages, self.targets.pop(0))
+        return super()._start_worker(options, throttle, messages)
+
+
+class TestScheduler(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp_dir.name)
+        self.servers = [CatalogServer(), CatalogServer()]
+        for i, server in enumerate(self.servers):
+            for j in range(3):
+                config = make_catalog_config([f'{server.url}/catalog/{page}' for page in range(3)],
+                                             open_nested_pages=False)
+                (self.path / f'site{i}-{j}.scraperai.json').write_text(config.model_dump_json())
+        (self.path / 'broken.scraperai.json').write_text('{}')
+
+    def tearDown(self):
+        for server in self.servers:
+            server.close()
+        self.tmp_dir.cleanup()
+
+    def test_run_with_domain_limit(self):
+        options = RunOptions(output_dir=str(self.path / 'results'))
+        scheduler = Scheduler(options, SchedulerOptions(processes=2, max_per_domain=1, progress_interval=0.1))
+        summary = scheduler.run([self.path])
+
+        self.assertEqual(summary.failed, 1)
+        self.assertEqual(summary.to_dict()['rows'], 6 * 30)
+        for result in summary.results:
+            if result.status == 'ok':
+                rows = list(read_json_lines(result.output))
+                self.assertEqual(rows, [{'title': f'Item {i}'} for i in range(30)])
+        self.assertEqual({domain: stats['configs'] for domain, stats in summary.get_domains().items()},
+                         {server.url.removeprefix('http://'): 3 for server in self.servers} | {None: 1})
+        # Configs of a domain are scraped one by one
+        self.assertEqual([server.max_active for server in self.servers], [1, 1])
+
+    def test_parse_processes(self):
+        # Worker processes start their own processes to extract fields of nested pages
+        config = make_config([f'{self.servers[0].url}/catalog/{page}' for page in range(3)], max_rows=10,
+                             parse_processes=1)
+        (self.path / 'nested.scraperai.json').write_text(config.model_dump_json())
+        options = RunOptions(output_dir=str(self.path / 'results'))
+        summary = Scheduler(options, SchedulerOptions(processes=1)).run([self.path / 'nested.scraperai.json'])
+        self.assertEqual([result.status for result in summary.results], ['ok'])
+        self.assertEqual(list(read_json_lines(summary.results[0].output)),
+                         [{'title': f'Item {page * 10}'} for page in range(3)])
+
+    def test_skip_unchanged(self):
+        config = make_config([f'{self.servers[0].url}/catalog/{page}' for page in range(3)], max_rows=10)
+        (self.path / 'nested.scraperai.json').write_text(config.model_dump_json())
+        options = RunOptions(output_dir=str(self.path / 'results'), http_cache=str(self.path / 'pages.sqlite3'),
+                             skip_unchanged=True)
+        results = [Scheduler(options, SchedulerOptions(processes=1)).run([self.path / 'nested.scraperai.json'])
+                   .results[0] for _ in range(2)]
+        self.assertEqual([(result.rows, result.unchanged_pages) for result in results], [(3, 0), (0, 3)])
+
+    def test_crashed_workers(self):
+        options = RunOptions(output_dir=str(self.path / 'results'))
+        scheduler = CrashingScheduler(options, SchedulerOptions(processes=2, progress_interval=0.1),
+                                      targets=[crash_after_start, crash_before_start])
+        summary = scheduler.run([self.path])
+
+        # The started config fails, the config that was not started is scraped by a new process
+        failed = [result.error for result in summary.results if result.status == 'failed']
+        self.assertEqual(len(failed), 2)
+        self.assertIn('Worker process exited with code 1', failed)
+        self.assertEqual(summary.to_dict()['rows'], 5 * 30)
+
+
+class TestDomainThrottle(unittest.TestCase):
+    def test_wait(self):
+        throttle = DomainThrottle(['example.com'], min_interval=0.1)
+        delays = [throttle.wait(f'https://example.com/{i}') for i in range(3)]
+        self.assertAlmostEqual(delays[0], 0, delta=0.01)
+        self.assertAlmostEqual(delays[1], 0.1, delta=0.03)
+        self.assertAlmostEqual(delays[2], 0.1, delta=0.03)
+        self.assertEqual(throttle.wait('https://other.com/'), 0.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
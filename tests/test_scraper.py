@@ -0,0 +1,255 @@
+import itertools
+import random
+import tempfile
+import threading
+import time
+import unittest
+
+from scraperai import BaseCrawler, Scraper
+from scraperai.dedup import Deduplicator
+from scraperai.journal import RunJournal
+from scraperai.models import ScraperConfig, Pagination, WebpageFields, StaticField, WebpageType, CatalogItem
+
+
+class DictCrawler(BaseCrawler):
+    def __init__(self, pages: dict[str, str], delay: float = 0.0):
+        self.pages = pages
+        self.delay = delay
+        self.closed = False
+        self.current_url = None
+        self.pagination_index = 0
+        self.visited = []
+
+    def get(self, url: str):
+        time.sleep(random.random() * self.delay)
+        self.current_url = url
+        self.visited.append(url)
+
+    @property
+    def page_source(self) -> str:
+        return self.pages[self.current_url.split('?')[0]]
+
+    def switch_page(self, pagination: Pagination) -> bool:
+        if pagination.type != 'urls' or self.pagination_index >= len(pagination.urls):
+            return False
+        self.get(pagination.urls[self.pagination_index])
+        self.pagination_index += 1
+        return True
+
+    def close(self) -> None:
+        self.closed = True
+
+
+def make_config(urls: list[str], **kwargs) -> ScraperConfig:
+    return ScraperConfig(
+        start_url=urls[0],
+        page_type=WebpageType.DETAILS,
+        pagination=Pagination(type='urls', urls=urls),
+        catalog_item=None,
+        open_nested_pages=False,
+        fields=WebpageFields(
+            static_fields=[StaticField(field_name='title', field_xpath='//h1/text()')],
+            dynamic_fields=[]
+        ),
+        max_pages=1,
+        **kwargs
+    )
+
+
+def make_catalog_config(catalog_urls: list[str], open_nested_pages: bool) -> ScraperConfig:
+    return ScraperConfig(
+        start_url=catalog_urls[0],
+        page_type=WebpageType.CATALOG,
+        pagination=Pagination(type='urls', urls=catalog_urls[1:]),
+        catalog_item=CatalogItem(card_xpath='//div[@class="card"]', url_xpath='//div[@class="card"]/a/@href',
+                                 html_snippet='', urls_on_page=[]),
+        open_nested_pages=open_nested_pages,
+        fields=WebpageFields(
+            static_fields=[StaticField(field_name='title', field_xpath='//h1/text()')],
+            dynamic_fields=[]
+        ),
+        max_pages=10,
+        max_rows=100
+    )
+
+
+class TestScraper(unittest.TestCase):
+    urls = [f'https://example.com/items/{i}' for i in range(40)]
+    pages = {url: f'<html><body><h1>Item {i}</h1></body></html>' for i, url in enumerate(urls)}
+
+    def test_sequential_nested_items(self):
+        config = make_config(self.urls, max_rows=10)
+        rows = list(Scraper(config, DictCrawler(self.pages)).scrape())
+        self.assertEqual(rows, [{'title': f'Item {i}'} for i in range(10)])
+
+    def test_concurrent_nested_items(self):
+        created = []
+        lock = threading.Lock()
+
+        def factory() -> BaseCrawler:
+            crawler = DictCrawler(self.pages, delay=0.01)
+            with lock:
+                created.append(crawler)
+            return crawler
+
+        config = make_config(self.urls, max_rows=30, concurrency=4)
+        rows = list(Scraper(config, DictCrawler(self.pages, delay=0.01), crawler_factory=factory).scrape())
+        self.assertEqual(len(rows), 30)
+        self.assertEqual({r['title'] for r in rows}, {f'Item {i}' for i in range(30)})
+        self.assertLessEqual(len(created), 3)
+        self.assertTrue(all(c.closed for c in created))
+
+    def test_concurrent_nested_items_ordered(self):
+        config = make_config(self.urls, max_rows=100, concurrency=5, preserve_order=True)
+        scraper = Scraper(config, DictCrawler(self.pages, delay=0.01),
+                          crawler_factory=lambda: DictCrawler(self.pages, delay=0.01))
+        rows = list(scraper.scrape())
+        self.assertEqual(rows, [{'title': f'Item {i}'} for i in range(len(self.urls))])
+
+    def test_pipelined_nested_items(self):
+        config = make_config(self.urls, max_rows=30, parse_processes=2)
+        crawler = DictCrawler(self.pages)
+        rows = list(Scraper(config, crawler).scrape())
+        self.assertEqual(sorted(r['title'] for r in rows), sorted(f'Item {i}' for i in range(30)))
+        self.assertEqual(len(crawler.visited), 30)
+
+    def test_pipelined_nested_items_ordered(self):
+        config = make_config(self.urls, max_rows=100, concurrency=3, preserve_order=True, parse_processes=2)
+        scraper = Scraper(config, DictCrawler(self.pages, delay=0.01),
+                          crawler_factory=lambda: DictCrawler(self.pages, delay=0.01))
+        rows = list(scraper.scrape())
+        self.assertEqual(rows, [{'title': f'Item {i}'} for i in range(len(self.urls))])
+
+
+class TestScraperJournal(unittest.TestCase):
+    items = {f'https://example.com/items/{i}': f'<html><body><h1>Item {i}</h1></body></html>' for i in range(30)}
+    catalog_urls = [f'https://example.com/catalog/{page}' for page in range(3)]
+    catalog_pages = {
+        url: '<html><body>' + ''.join(
+            f'<div class="card"><a href="/items/{page * 10 + i}"><h1>Item {page * 10 + i}</h1></a></div>'
+            for i in range(10)
+        ) + '</body></html>'
+        for page, url in enumerate(catalog_urls)
+    }
+    pages = items | catalog_pages
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.journal = RunJournal(f'{self.tmp_dir.name}/journal.sqlite3')
+
+    def tearDown(self):
+        self.journal.close()
+        self.tmp_dir.cleanup()
+
+    def test_resume_nested_items(self):
+        config = make_config(list(self.items), max_rows=20)
+        scraper = Scraper(config, DictCrawler(self.pages), journal=self.journal)
+        first_rows = list(itertools.islice(scraper.scrape(), 5))
+
+        crawler = DictCrawler(self.pages)
+        rows = list(Scraper(config, crawler, journal=self.journal).resume(scraper.run_id))
+        # The last row was not requested after the crash, so it is emitted again
+        self.assertEqual(first_rows[:4] + rows, [{'title': f'Item {i}'} for i in range(20)])
+        self.assertEqual(len(crawler.visited), 16)
+        self.assertTrue(self.journal.get_state(scraper.run_id).finished)
+        self.assertEqual(list(Scraper(config, crawler, journal=self.journal).resume(scraper.run_id)), [])
+
+    def test_resume_catalog_with_nested_pages(self):
+        config = make_catalog_config(self.catalog_urls, open_nested_pages=True)
+        scraper = Scraper(config, DictCrawler(self.pages), journal=self.journal)
+        first_rows = list(itertools.islice(scraper.scrape(), 11))
+        self.assertTrue(self.journal.get_state(scraper.run_id).urls_collected)
+
+        crawler = DictCrawler(self.pages)
+        rows = list(Scraper(config, crawler, journal=self.journal).resume(scraper.run_id))
+        self.assertEqual(first_rows[:10] + rows, [{'title': f'Item {i}'} for i in range(30)])
+        # Catalog pages are not opened again
+        self.assertFalse(set(crawler.visited) & set(self.catalog_urls))
+
+    def test_resume_catalog_items(self):
+        config = make_catalog_config(self.catalog_urls, open_nested_pages=False)
+        scraper = Scraper(config, DictCrawler(self.pages), journal=self.journal)
+        first_rows = list(itertools.islice(scraper.scrape(), 16))
+        state = self.journal.get_state(scraper.run_id)
+        self.assertEqual((state.page_number, state.page_offset, state.rows_emitted), (1, 5, 15))
+
+        crawler = DictCrawler(self.pages)
+        rows = list(Scraper(config, crawler, journal=self.journal).resume(scraper.run_id))
+        self.assertEqual([row['title'] for row in first_rows[:15] + rows], [f'Item {i}' for i in range(30)])
+        self.assertEqual(crawler.visited, self.catalog_urls)
+
+    def test_rows_emitted_counts_only_emitted_rows(self):
+        pages = self.pages | {url: '<html><body><h1>Item 0</h1></body></html>' for url in list(self.items)[10:]}
+        config = make_config(list(self.items), max_rows=30)
+        scraper = Scraper(config, DictCrawler(pages), dedup=Deduplicator(), journal=self.journal)
+        rows = list(scraper.scrape())
+        self.assertEqual(len(rows), 10)
+        self.assertEqual(self.journal.get_state(scraper.run_id).rows_emitted, 10)
+
+    def test_time_limit_without_rows(self):
+        # Duplicate rows are not emitted, so the scraper checks the time limit between pages
+        pages = self.pages | {url: '<html><body><h1>Item 0</h1></body></html>' for url in self.items}
+        config = make_config(list(self.items), max_rows=30)
+        crawler = DictCrawler(pages, delay=0.05)
+        scraper = Scraper(config, crawler, dedup=Deduplicator(), journal=self.journal, time_limit=0.2)
+        self.assertEqual(list(scraper.scrape()), [{'title': 'Item 0'}])
+        self.assertTrue(scraper.time_limit_reached)
+        self.assertLess(len(crawler.visited), 30)
+        self.assertFalse(self.journal.get_state(scraper.run_id).finished)
+
+        # The rest of the pages is scraped after resuming
+        completed_count = len(self.journal.get_completed_urls(scraper.run_id))
+        crawler = DictCrawler(self.pages)
+        rows = list(Scraper(config, crawler, journal=self.journal).resume(scraper.run_id))
+        self.assertEqual(len(crawler.visited), 30 - completed_count)
+        self.assertEqual(rows, [{'title': f'Item {i}'} for i in range(completed_count, 30)])
+        self.assertTrue(self.journal.get_state(scraper.run_id).finished)
+
+    def test_completed_urls_are_committed_in_batches(self):
+        path = f'{self.tmp_dir.name}/batches.sqlite3'
+        journal = RunJournal(path, commit_every=10)
+        run_id = journal.start_run(make_config(list(self.items), max_rows=30))
+        for url in list(self.items)[:15]:
+            journal.add_completed_url(run_id, url)
+        reader = RunJournal(path)
+        self.assertEqual(len(reader.get_completed_urls(run_id)), 10)
+        journal.close()
+        self.assertEqual(len(reader.get_completed_urls(run_id)), 15)
+        self.assertEqual(reader.get_state(run_id).rows_emitted, 15)
+        reader.close()
+
+
+class TestScraperDedup(unittest.TestCase):
+    items = {f'https://example.com/items/{i}': f'<html><body><h1>Item {i % 15}</h1></body></html>' for i in range(20)}
+    # Pages overlap by 5 cards and links differ by tracking params
+    catalog_urls = [f'https://example.com/catalog/{page}' for page in range(3)]
+    catalog_pages = {
+        url: '<html><body>' + ''.join(
+            f'<div class="card"><a href="/items/{i}?utm_source=page{page}"><h1>Item {i}</h1></a></div>'
+            for i in range(page * 5, page * 5 + 10)
+        ) + '</body></html>'
+        for page, url in enumerate(catalog_urls)
+    }
+    pages = items | catalog_pages
+
+    def test_catalog_items(self):
+        dedup = Deduplicator()
+        scraper = Scraper(make_catalog_config(self.catalog_urls, open_nested_pages=False), DictCrawler(self.pages),
+                          dedup=dedup)
+        rows = list(scraper.scrape())
+        self.assertEqual(rows, [{'title': f'Item {i}'} for i in range(20)])
+        self.assertEqual((dedup.skipped_urls, dedup.skipped_rows), (0, 10))
+
+    def test_nested_items(self):
+        dedup = Deduplicator()
+        crawler = DictCrawler(self.pages)
+        scraper = Scraper(make_catalog_config(self.catalog_urls, open_nested_pages=True), crawler, dedup=dedup)
+        rows = list(scraper.scrape())
+        # Items 15-19 have the same content as items 0-4
+        self.assertEqual(rows, [{'title': f'Item {i}'} for i in range(15)])
+        self.assertEqual((dedup.skipped_urls, dedup.skipped_rows), (10, 5))
+        self.assertEqual(len(crawler.visited), len(self.catalog_urls) + 20)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+import itertools
+import tempfile
+import unittest
+
+from scraperai import SeleniumCrawler, Scraper
+from scraperai.dedup import Deduplicator
+from scraperai.crawlers.selenium import NEW_NODES_SCRIPT
+from scraperai.crawlers.webdriver import ReadinessWaiter
+from scraperai.crawlers.webdriver.readiness import READY_STATE_SCRIPT, RESOURCES_COUNT_SCRIPT
+from scraperai.journal import RunJournal
+from scraperai.models import ScraperConfig, Pagination, WebpageFields, StaticField, WebpageType, CatalogItem
+
+
+class FeedDriver:
+    """
+    Simulates an infinite feed that appends `batch_size` cards on each scroll.
+    Cards with indexes in `duplicates` repeat the content of other cards
+    """
+
+    def __init__(self, total: int, batch_size: int = 10, duplicates: dict[int, int] = None):
+        self.total = total
+        self.batch_size = batch_size
+        self.duplicates = duplicates or {}
+        self.current_url = 'about:blank'
+        self.loaded = 0
+        self.seen: set[int] = set()
+        self.page_source_calls = 0
+        self.transferred = 0
+
+    def get(self, url: str):
+        self.current_url = url
+        self.loaded = min(self.batch_size, self.total)
+        self.seen.clear()
+
+    def _card(self, index: int) -> str:
+        index = self.duplicates.get(index, index)
+        return f'<div class="card"><h2>Item {index}</h2><span class="price">{index * 10}</span></div>'
+
+    @property
+    def page_source(self) -> str:
+        self.page_source_calls += 1
+        return '<html><body>' + ''.join(self._card(i) for i in range(self.loaded)) + '</body></html>'
+
+    def execute_script(self, script: str, *args):
+        if script == READY_STATE_SCRIPT:
+            return 'complete'
+        if script == RESOURCES_COUNT_SCRIPT:
+            return 0
+        if script == 'return window.pageYOffset;':
+            return self.loaded
+        if script == 'window.scrollBy(0, 500);':
+            self.loaded = min(self.loaded + self.batch_size, self.total)
+            return None
+        if script == NEW_NODES_SCRIPT:
+            new_indexes = [i for i in range(self.loaded) if i not in self.seen]
+            self.seen.update(new_indexes)
+            self.transferred += len(new_indexes)
+            return [self._card(i) for i in new_indexes]
+        raise NotImplementedError(script)
+
+
+def make_config(max_rows: int = 1000) -> ScraperConfig:
+    return ScraperConfig(
+        start_url='https://example.com/feed',
+        page_type=WebpageType.CATALOG,
+        pagination=Pagination(type='scroll'),
+        catalog_item=CatalogItem(card_xpath='//div[@class="card"]', url_xpath=None,
+                                 html_snippet='', urls_on_page=[]),
+        open_nested_pages=False,
+        fields=WebpageFields(
+            static_fields=[
+                StaticField(field_name='title', field_xpath='//div[@class="card"]/h2/text()'),
+                StaticField(field_name='price', field_xpath='//span[@class="price"]/text()'),
+            ],
+            dynamic_fields=[]
+        ),
+        max_pages=1000,
+        max_rows=max_rows
+    )
+
+
+class TestIncrementalScroll(unittest.TestCase):
+    def make_crawler(self, driver: FeedDriver) -> SeleniumCrawler:
+        return SeleniumCrawler(driver, waiter=ReadinessWaiter(idle_time=0))
+
+    def test_only_new_cards_are_extracted(self):
+        driver = FeedDriver(total=95)
+        rows = list(Scraper(make_config(), self.make_crawler(driver)).scrape())
+        self.assertEqual(rows, [{'title': f'Item {i}', 'price': str(i * 10)} for i in range(95)])
+        self.assertEqual(driver.transferred, 95)
+        self.assertEqual(driver.page_source_calls, 0)
+
+    def test_resume(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            journal = RunJournal(f'{tmp_dir}/journal.sqlite3')
+            config = make_config()
+            scraper = Scraper(config, self.make_crawler(FeedDriver(total=50)), journal=journal)
+            first_rows = list(itertools.islice(scraper.scrape(), 26))
+
+            rows = list(Scraper(config, self.make_crawler(FeedDriver(total=50)), journal=journal)
+                        .resume(scraper.run_id))
+            journal.close()
+        self.assertEqual([row['title'] for row in first_rows[:25] + rows], [f'Item {i}' for i in range(50)])
+
+    def test_resume_with_duplicates(self):
+        # Positions of the journal count all cards of the feed, not only emitted rows
+        duplicates = {i: i - 10 for i in range(10, 15)} | {i: i - 10 for i in range(40, 45)}
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            journal = RunJournal(f'{tmp_dir}/journal.sqlite3')
+            config = make_config()
+            scraper = Scraper(config, self.make_crawler(FeedDriver(total=50, duplicates=duplicates)),
+                              journal=journal, dedup=Deduplicator())
+            first_rows = list(itertools.islice(scraper.scrape(), 26))
+
+            rows = list(Scraper(config, self.make_crawler(FeedDriver(total=50, duplicates=duplicates)),
+                                journal=journal, dedup=Deduplicator()).resume(scraper.run_id))
+            journal.close()
+        expected = [i for i in range(50) if i not in duplicates]
+        self.assertEqual([row['title'] for row in first_rows[:25] + rows], [f'Item {i}' for i in expected])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+import threading
+import unittest
+
+from scraperai import SeleniumCrawler
+from scraperai.crawlers.webdriver import WebdriversPool, PoolTimeout, ReadinessWaiter
+from scraperai.crawlers.webdriver.readiness import READY_STATE_SCRIPT, RESOURCES_COUNT_SCRIPT
+
+
+class FakeDriver:
+    def __init__(self):
+        self.current_url = 'about:blank'
+        self.cookies = {}
+        self.local_storage = {}
+        self.healthy = True
+        self.quit_called = False
+        self.visited = []
+
+    def get(self, url: str):
+        self.current_url = url
+        self.visited.append(url)
+        if url != 'about:blank':
+            self.cookies['session'] = url
+            self.local_storage['key'] = url
+
+    @property
+    def page_source(self) -> str:
+        return f'<html><body>{self.current_url}</body></html>'
+
+    def execute_script(self, script: str, *args):
+        if not self.healthy:
+            raise ConnectionError('Session is dead')
+        if script == 'return 1;':
+            return 1
+        if script == READY_STATE_SCRIPT:
+            return 'complete'
+        if script == RESOURCES_COUNT_SCRIPT:
+            return 0
+        if script == 'window.localStorage.clear();':
+            self.local_storage.clear()
+
+    def delete_all_cookies(self):
+        self.cookies.clear()
+
+    def quit(self):
+        self.quit_called = True
+
+
+class TestWebdriversPool(unittest.TestCase):
+    def setUp(self):
+        self.drivers = []
+        self.lock = threading.Lock()
+
+    def driver_factory(self) -> FakeDriver:
+        driver = FakeDriver()
+        with self.lock:
+            self.drivers.append(driver)
+        return driver
+
+    def test_prewarm_and_reuse(self):
+        with WebdriversPool(driver_factory=self.driver_factory, size=3) as pool:
+            drivers = [pool.lease() for _ in range(3)]
+            self.assertEqual(len(self.drivers), 3)
+            self.assertEqual(pool.metrics.in_use, 3)
+            with self.assertRaises(PoolTimeout):
+                pool.lease(timeout=0.1)
+
+            drivers[0].get('https://example.com')
+            pool.release(drivers[0])
+            driver = pool.lease()
+            self.assertIs(driver, drivers[0])
+            # Session state is reset
+            self.assertEqual(driver.cookies, {})
+            self.assertEqual(driver.local_storage, {})
+            self.assertEqual(driver.current_url, 'about:blank')
+            for driver in drivers:
+                pool.release(driver)
+            metrics = pool.metrics
+            self.assertEqual((metrics.size, metrics.idle, metrics.in_use, metrics.created), (3, 3, 0, 3))
+        self.assertTrue(all(driver.quit_called for driver in self.drivers))
+
+    def test_health_check(self):
+        with WebdriversPool(driver_factory=self.driver_factory, size=1, prewarm=False) as pool:
+            driver = pool.lease()
+            pool.release(driver)
+            driver.healthy = False
+            new_driver = pool.lease()
+            self.assertIsNot(new_driver, driver)
+            self.assertTrue(driver.quit_called)
+            self.assertEqual(pool.metrics.failed_health_checks, 1)
+            pool.release(new_driver)
+
+    def test_crawlers_recycle_sessions(self):
+        urls = [f'https://example.com/items/{i}' for i in range(5)]
+        with WebdriversPool(driver_factory=self.driver_factory, size=2, max_pages_per_session=2) as pool:
+            crawler = SeleniumCrawler(pool=pool, waiter=ReadinessWaiter(idle_time=0))
+            for url in urls:
+                crawler.get(url)
+                self.assertIn(url, crawler.page_source)
+            crawler.close()
+            self.assertEqual(pool.metrics.recycled, 2)
+            self.assertEqual(pool.metrics.in_use, 0)
+        visited = [url for driver in self.drivers for url in driver.visited if url != 'about:blank']
+        self.assertEqual(sorted(visited), sorted(urls))
+        self.assertTrue(all(len([u for u in d.visited if u != 'about:blank']) <= 2 for d in self.drivers))
+
+
+if __name__ == '__main__':
+    unittest.main()
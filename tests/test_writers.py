@@ -0,0 +1,94 @@
+import csv
+import importlib.util
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from scraperai.writers import JsonLinesWriter, JsonWriter, CsvWriter, ParquetWriter, create_writer, read_json_lines
+
+
+def make_rows(count: int) -> list[dict]:
+    rows = []
+    for i in range(count):
+        row = {'title': f'Item {i}', 'price': str(i * 10)}
+        if i % 7 == 3:
+            row[f'extra {i}'] = ['a', 'b']
+        rows.append(row)
+    return rows
+
+
+class TestWriters(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp_dir.name)
+        self.rows = make_rows(50)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_json_lines(self):
+        path = self.dir / 'results.jsonl'
+        writer = JsonLinesWriter(path, flush_every=10)
+        for row in self.rows[:25]:
+            writer.write(row)
+        # Flushed rows are readable before the writer is closed
+        self.assertEqual(list(read_json_lines(path)), self.rows[:20])
+        writer.write_rows(self.rows[25:])
+        writer.close()
+        self.assertEqual(list(read_json_lines(path)), self.rows)
+
+    def test_json(self):
+        for indent in (None, 4):
+            path = self.dir / f'results_{indent}.json'
+            with JsonWriter(path, indent=indent) as writer:
+                writer.write_rows(self.rows)
+            with open(path) as f:
+                self.assertEqual(json.load(f), self.rows)
+
+        with JsonWriter(self.dir / 'empty.json'):
+            pass
+        with open(self.dir / 'empty.json') as f:
+            self.assertEqual(json.load(f), [])
+
+    def test_csv_dynamic_columns(self):
+        path = self.dir / 'results.csv'
+        with CsvWriter(path, flush_every=5) as writer:
+            writer.write_rows(self.rows)
+        with open(path, newline='') as f:
+            reader = csv.DictReader(f)
+            self.assertEqual(reader.fieldnames, ['title', 'price', 'extra 3', 'extra 10', 'extra 17',
+                                                 'extra 24', 'extra 31', 'extra 38', 'extra 45'])
+            csv_rows = list(reader)
+        self.assertEqual(len(csv_rows), len(self.rows))
+        for row, csv_row in zip(self.rows, csv_rows):
+            expected = {column: '' for column in csv_row} | {
+                key: json.dumps(value) if isinstance(value, list) else value for key, value in row.items()
+            }
+            self.assertEqual(csv_row, expected)
+
+    @unittest.skipUnless(importlib.util.find_spec('pyarrow'), 'pyarrow is not installed')
+    def test_parquet(self):
+        import pyarrow.parquet as pq
+
+        path = self.dir / 'results.parquet'
+        with ParquetWriter(path, row_group_size=20) as writer:
+            writer.write_rows(self.rows)
+        parquet_file = pq.ParquetFile(path)
+        self.assertEqual(parquet_file.metadata.num_row_groups, 3)
+        table = parquet_file.read()
+        self.assertEqual(table.column('title').to_pylist(), [row['title'] for row in self.rows])
+        # Columns that appeared after the first row group are dropped
+        self.assertNotIn('extra 24', table.column_names)
+
+    def test_create_writer(self):
+        with create_writer(self.dir / 'results.csv') as writer:
+            self.assertIsInstance(writer, CsvWriter)
+        with create_writer(self.dir / 'results.txt', 'jsonl') as writer:
+            self.assertIsInstance(writer, JsonLinesWriter)
+        with self.assertRaises(ValueError):
+            create_writer(self.dir / 'results.txt')
+
+
+if __name__ == '__main__':
+    unittest.main()